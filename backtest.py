@@ -0,0 +1,108 @@
+"""
+Backtests a screener strategy over history and sweeps its parameters.
+
+    python backtest.py --timeframe 1h --strategy trend_continuation_refined
+    python backtest.py --timeframe 5m --profile high_vol_profile --grid stoch_check.k_max=15,20,25 --out sweep.csv
+    python backtest.py --timeframe 1d --strategy momentum_trend_refined --no-sweep --out trades.csv
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+import yaml
+from your_logic.api_manager import AlpacaManager
+from your_logic.backtester import prepare_history, run_backtest, run_sweep
+from your_logic.config_loader import get_config
+from your_logic.data_fetcher import fetch_data_batch
+from your_logic.request_scheduler import configure_requests
+from your_logic.resampler import resample_ohlcv
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def parse_grid(specs):
+    """['stoch_check.k_min=40,50', ...] -> {'stoch_check.k_min': [40, 50], ...}; values are parsed as YAML scalars."""
+    grid = {}
+    for spec in specs:
+        key, _, values = spec.partition('=')
+        if not values:
+            raise ValueError(f"grid entry '{spec}' must look like key=value1,value2")
+        grid[key.strip()] = [yaml.safe_load(value) for value in values.split(',')]
+    return grid
+
+async def fetch_history(api, config, symbols, timeframe, days):
+    """Bars of `timeframe` for `symbols` over the last `days` days, resampled from the configured base timeframe."""
+    base_tf = config.scan.get('resample_from', {}).get(timeframe, timeframe)
+    configure_requests(**config.scan.get('rate_limit', {}), max_in_flight=config.scan.get('max_concurrent_requests'))
+    end = datetime.now()
+    frames = await fetch_data_batch(api, symbols, (end - timedelta(days=days)).strftime('%Y-%m-%d'),
+                                    end.strftime('%Y-%m-%d'), interval=base_tf,
+                                    chunk_size=config.scan.get('batch_size', 50))
+    if base_tf != timeframe:
+        frames = {symbol: resample_ohlcv(df, timeframe) for symbol, df in frames.items()}
+    return {symbol: df for symbol, df in frames.items() if df is not None and not df.empty}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--timeframe', required=True)
+    parser.add_argument('--strategy', help="Strategy to test (default: the profile's strategy for the timeframe)")
+    parser.add_argument('--profile', default='low_vol_profile')
+    parser.add_argument('--symbols', help="Comma-separated symbols (default: backtest.symbols from the config)")
+    parser.add_argument('--days', type=int, help="History length (default: backtest.history_days)")
+    parser.add_argument('--grid', action='append', default=[], help="key=v1,v2,... (replaces the configured grid)")
+    parser.add_argument('--no-sweep', action='store_true', help="Backtest the configured settings only and list the trades")
+    parser.add_argument('--workers', type=int, help="Sweep worker processes (default: backtest.max_workers)")
+    parser.add_argument('--top', type=int, default=20, help="Sweep results to print")
+    parser.add_argument('--out', help="Write the sweep results (or trades) to this CSV file")
+    args = parser.parse_args()
+
+    config = get_config()
+    if not config:
+        raise SystemExit("No valid configuration loaded.")
+    backtest_cfg = config.raw['defaults'].get('backtest', {})
+    strategy_name = args.strategy
+    if not strategy_name:
+        resolved = config.resolve(args.profile, args.timeframe)
+        if resolved is None:
+            raise SystemExit(f"Profile '{args.profile}' has no strategy on {args.timeframe}.")
+        strategy_name = resolved.strategy_name
+    strategy_cfg = config.raw['defaults']['strategies'].get(strategy_name)
+    if strategy_cfg is None:
+        raise SystemExit(f"Unknown strategy '{strategy_name}'.")
+    risk_cfg = config.raw['defaults']['risk_management']
+    cooldown = risk_cfg.get('trade_cooldown_candles', 0)
+
+    api_manager = AlpacaManager()
+    api_manager.initialize()
+    api = api_manager.get_market_data_api(config.scan.get('market_data_client', 'async'))
+    if not api:
+        raise SystemExit("Alpaca API not initialized.")
+    symbols = args.symbols.split(',') if args.symbols else backtest_cfg.get('symbols', [])
+
+    async def load_history():
+        try:
+            return await fetch_history(api, config, symbols, args.timeframe, args.days or backtest_cfg.get('history_days', 730))
+        finally:
+            await api_manager.close_bars_client()
+    frames = asyncio.run(load_history())
+    history = prepare_history(frames, config.raw, args.timeframe, config.indicators.get(args.timeframe))
+
+    if args.no_sweep:
+        trades, metrics = run_backtest(history, strategy_name, strategy_cfg, risk_cfg, cooldown)
+        print(trades.to_string(index=False))
+        print(metrics)
+        if args.out:
+            trades.to_csv(args.out, index=False)
+        return
+
+    grid = parse_grid(args.grid) if args.grid else backtest_cfg.get('grids', {}).get(strategy_name)
+    if not grid:
+        raise SystemExit(f"No grid configured for '{strategy_name}'; pass --grid key=v1,v2.")
+    results = run_sweep(history, strategy_name, strategy_cfg, risk_cfg, grid, cooldown,
+                        args.workers or backtest_cfg.get('max_workers') or None)
+    results = results.sort_values('total_return_pct', ascending=False)
+    print(results.head(args.top).to_string(index=False))
+    if args.out:
+        results.to_csv(args.out, index=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/fake_server.py
+import asyncio
+import json
+import threading
+import time
+from aiohttp import web
+from benchmarks.synthetic import generate_bars
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(value):
+        return json.dumps(value).encode()
+
+BAR_FIELDS = {"open": "o", "high": "h", "low": "l", "close": "c", "volume": "v", "trade_count": "n", "vwap": "vw"}
+INTEGER_COLUMNS = ("volume", "trade_count")
+
+class FakeBarsServer:
+    """
+    Local HTTP stand-in for Alpaca's multi-symbol bars endpoint (GET /v2/stocks/bars), serving the bars of
+    a FakeMarketAPI with its latency, errors and rate limit, paginated like the real endpoint and with its
+    X-RateLimit-* headers. Runs on its own thread and event loop, so any client or loop can use it:
+
+        with FakeBarsServer(FakeMarketAPI(latency=0.05)) as server:
+            client = AsyncBarsClient("key", "secret", base_url=server.url)
+    """
+    def __init__(self, api, host="127.0.0.1", port=0):
+        self.api = api
+        self.host = host
+        self.port = port
+        self.url = None
+        self.loop = None
+        self.runner = None
+        self.thread = None
+        self.frames = {}
+
+    def _frames(self, symbols, timeframe, start, end):
+        """Bars of each requested symbol, kept across the pages of a request."""
+        key = (symbols, timeframe, start, end)
+        if key not in self.frames:
+            if len(self.frames) >= 64:
+                self.frames.pop(next(iter(self.frames)))
+            self.frames[key] = [(symbol, generate_bars(symbol, timeframe, start, end, self.api.seed)) for symbol in symbols.split(",")]
+        return self.frames[key]
+
+    def _rate_headers(self):
+        if not self.api.rate_limit:
+            return {}
+        with self.api.lock:
+            now = time.monotonic()
+            recent = [t for t in self.api.request_times if now - t < 60]
+            reset = time.time() + (60 - (now - recent[0]) if recent else 0)
+        return {"X-RateLimit-Limit": str(self.api.rate_limit),
+                "X-RateLimit-Remaining": str(max(0, self.api.rate_limit - len(recent))),
+                "X-RateLimit-Reset": str(int(reset) + 1)}
+
+    async def _bars(self, request):
+        query = request.query
+        delay, error = self.api._admit()
+        if delay:
+            await asyncio.sleep(delay)
+        headers = self._rate_headers()
+        if error is not None:
+            return web.json_response({"code": error.code, "message": str(error)}, status=error.status_code or 500, headers=headers)
+        end = query.get("end") or time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        limit = int(query.get("limit", 1000))
+        offset = int(query.get("page_token", 0))
+        page, position = {}, 0
+        # Bars are ordered by symbol, then time; a page holds the next `limit` of them.
+        for symbol, df in self._frames(query["symbols"], query["timeframe"], query["start"], end):
+            first, last = max(offset - position, 0), min(offset + limit - position, len(df))
+            position += len(df)
+            if first >= last:
+                continue
+            rows = df.iloc[first:last]
+            fields = ("t", *BAR_FIELDS.values())
+            # Volume and trade count are integers in the real responses.
+            columns = (rows.index.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                       *(rows[column].astype("int64" if column in INTEGER_COLUMNS else "float64").tolist() for column in BAR_FIELDS))
+            page[symbol] = [dict(zip(fields, row)) for row in zip(*columns)]
+        served = sum(len(bars) for bars in page.values())
+        with self.api.lock:
+            self.api.stats["bars"] += served
+        token = str(offset + limit) if offset + limit < position else None
+        # Encoding runs on the server's thread but holds the GIL, so keep it cheap next to the client's decoding.
+        return web.Response(body=_dumps({"bars": page, "next_page_token": token}), content_type="application/json",
+                            headers=headers)
+
+    def start(self):
+        started = threading.Event()
+
+        def serve():
+            self.loop = asyncio.new_event_loop()
+            app = web.Application()
+            app.router.add_get("/v2/stocks/bars", self._bars)
+            self.runner = web.AppRunner(app, access_log=None)
+            self.loop.run_until_complete(self.runner.setup())
+            site = web.TCPSite(self.runner, self.host, self.port)
+            self.loop.run_until_complete(site.start())
+            self.port = self.runner.addresses[0][1]
+            self.url = f"http://{self.host}:{self.port}"
+            started.set()
+            self.loop.run_forever()
+            self.loop.run_until_complete(self.runner.cleanup())
+            self.loop.close()
+
+        self.thread = threading.Thread(target=serve, name="fake-bars-server", daemon=True)
+        self.thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,293 @@
+"""
+Scan performance benchmarks on synthetic data; no Alpaca credentials or network access needed.
+
+    python -m benchmarks.run                                   # every benchmark at 10/100/1000/5000 symbols
+    python -m benchmarks.run --sizes 10,100 --only indicators,signals
+    python -m benchmarks.run --latency 0.1 --error-rate 0.02 --rate-limit 200 --only fetch,scan
+    python -m benchmarks.run --http --only fetch,scan              # async bars client against a local HTTP stand-in
+    python -m benchmarks.run --save-baseline                   # store these results as the baseline
+
+Each benchmark reports throughput (symbols per second), per-call latency percentiles and peak traced
+memory. Results are compared with benchmarks/baseline.json when it exists: throughput more than
+--tolerance below the baseline, or p95 latency or peak memory more than --tolerance above it, is a
+regression and makes the run exit with status 1. Baselines are machine-specific, so record one on the
+machine that runs the comparison.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import numpy as np
+import yaml
+from benchmarks.fake_server import FakeBarsServer
+from benchmarks.synthetic import FakeMarketAPI, generate_bars, synthetic_symbols
+from screener_engine import run_screener_instance
+from your_logic.bars_client import AsyncBarsClient
+from your_logic.config_loader import DEFAULT_CONFIG_PATH, get_config
+from your_logic.data_fetcher import TIMEFRAME_STR_MAP, fetch_data
+from your_logic.divergence_calculator import find_divergence
+from your_logic.indicator_calculator import calculate_all_indicators
+from your_logic.request_scheduler import configure_requests
+from your_logic.signal_generator import generate_signals
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+BENCHMARKS = ("fetch", "indicators", "divergence", "signals", "scan")
+# Per-function benchmarks trace memory on this many symbols; tracing slows every allocation down.
+MEMORY_SAMPLE = 20
+
+# --- Measurement ---
+
+def summarize(name, size, elapsed, latencies, peak_bytes):
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "benchmark": name, "symbols": size, "seconds": round(elapsed, 3),
+        "throughput": round(size / elapsed, 2) if elapsed else None,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3) if len(latencies_ms) else None,
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3) if len(latencies_ms) else None,
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3) if len(latencies_ms) else None,
+        "peak_mb": round(peak_bytes / 2**20, 2) if peak_bytes is not None else None,
+    }
+
+def traced_peak(run):
+    """Peak memory allocated while `run()` executes, in bytes."""
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def time_calls(name, symbols, prepare, call, measure_memory):
+    """
+    Times `call(prepared)` once per symbol, where `prepared = prepare(symbol)` is built untimed; then,
+    unless disabled, traces the largest single-call memory peak over a sample of the symbols.
+    """
+    latencies = []
+    for symbol in symbols:
+        prepared = prepare(symbol)
+        start = time.perf_counter()
+        call(prepared)
+        latencies.append(time.perf_counter() - start)
+    peak = None
+    if measure_memory:
+        peak = 0
+        for symbol in symbols[:MEMORY_SAMPLE]:
+            prepared = prepare(symbol)
+            peak = max(peak, traced_peak(lambda: call(prepared)))
+    return summarize(name, len(symbols), sum(latencies), latencies, peak)
+
+# --- Benchmarks ---
+
+class BenchContext:
+    """
+    Settings shared by the benchmarks: the scan config, the fake API (called in-process, or with --http
+    served over local HTTP to the async bars client) and the history window.
+    """
+    def __init__(self, args, workdir):
+        self.args = args
+        self.config_path = write_bench_config(args, workdir)
+        self.config = get_config(self.config_path)
+        self.fake_api = FakeMarketAPI(args.latency, args.jitter, args.error_rate, args.rate_limit, args.seed)
+        self.server = None
+        self.api = self.fake_api
+        if args.http:
+            self.server = FakeBarsServer(self.fake_api).start()
+            self.api = AsyncBarsClient("bench", "bench", base_url=self.server.url)
+        self.end = datetime(2025, 6, 30)
+        self.start = self.end - timedelta(days=args.days)
+        self.profiles = list(self.config.raw['asset_profiles'])
+
+    def run(self, coroutine):
+        """asyncio.run for the code under test, closing the connections the bars client opened on its loop."""
+        async def run_and_close():
+            try:
+                return await coroutine
+            finally:
+                if self.server is not None:
+                    await self.api.close()
+        return asyncio.run(run_and_close())
+
+    def close(self):
+        if self.server is not None:
+            self.server.stop()
+
+    def bars(self, symbol):
+        return generate_bars(symbol, TIMEFRAME_STR_MAP[self.args.timeframe], self.start.isoformat(),
+                             self.end.isoformat(), self.args.seed)
+
+    def with_indicators(self, symbol):
+        return calculate_all_indicators(self.bars(symbol), self.config.raw, self.args.timeframe, self.profiles[0])
+
+def bench_fetch(ctx, size):
+    """fetch_data per symbol against the fake API, with the scan's request concurrency and rate limit."""
+    symbols = synthetic_symbols(size, "F")
+    tf, start, end = ctx.args.timeframe, ctx.start.strftime('%Y-%m-%d'), ctx.end.strftime('%Y-%m-%d')
+
+    configure_requests(**ctx.config.scan.get('rate_limit', {}), max_in_flight=ctx.config.scan.get('max_concurrent_requests'))
+
+    async def run(latencies):
+        async def fetch_one(symbol):
+            started = time.perf_counter()
+            await fetch_data(ctx.api, symbol, start, end, interval=tf)
+            latencies.append(time.perf_counter() - started)
+        await asyncio.gather(*(fetch_one(symbol) for symbol in symbols))
+
+    latencies = []
+    started = time.perf_counter()
+    ctx.run(run(latencies))
+    elapsed = time.perf_counter() - started
+    peak = traced_peak(lambda: ctx.run(run([]))) if ctx.args.memory else None
+    return summarize("fetch", size, elapsed, latencies, peak)
+
+def bench_indicators(ctx, size):
+    return time_calls("indicators", synthetic_symbols(size, "I"), ctx.bars,
+                      lambda df: calculate_all_indicators(df, ctx.config.raw, ctx.args.timeframe, ctx.profiles[0]),
+                      ctx.args.memory)
+
+def bench_divergence(ctx, size):
+    div_cfg = dict(ctx.config.raw['defaults'].get('divergence', {}), enabled=True)
+    return time_calls("divergence", synthetic_symbols(size, "D"), ctx.with_indicators,
+                      lambda df: find_divergence(df, div_cfg), ctx.args.memory)
+
+def bench_signals(ctx, size):
+    tf = ctx.args.timeframe
+    return time_calls("signals", synthetic_symbols(size, "G"), ctx.with_indicators,
+                      lambda df: generate_signals({tf: df}, ctx.config.raw, tf, ctx.profiles[0]), ctx.args.memory)
+
+def bench_scan(ctx, size):
+    """A full run_screener_instance; latencies are the times at which each symbol's results completed."""
+    def run(prefix, latencies):
+        symbol_config = {symbol: ctx.profiles[i % len(ctx.profiles)]
+                         for i, symbol in enumerate(synthetic_symbols(size, prefix))}
+        started = time.perf_counter()
+
+        async def on_progress(progress, message):
+            latencies.append(time.perf_counter() - started)
+        ctx.run(run_screener_instance(ctx.api, symbol_config, on_progress, config_path=ctx.config_path))
+        return time.perf_counter() - started
+
+    latencies = []
+    # Fresh symbols for every run, so no run reuses another's incremental indicator state.
+    elapsed = run(f"S{size}T", latencies)
+    peak = traced_peak(lambda: run(f"S{size}M", [])) if ctx.args.memory else None
+    return summarize("scan", size, elapsed, latencies, peak)
+
+BENCHMARK_FUNCTIONS = {"fetch": bench_fetch, "indicators": bench_indicators, "divergence": bench_divergence,
+                       "signals": bench_signals, "scan": bench_scan}
+
+def write_bench_config(args, workdir):
+    """Copy of the screener config that keeps all scan state inside `workdir`."""
+    with open(DEFAULT_CONFIG_PATH) as file:
+        raw = yaml.safe_load(file)
+    scan_cfg = raw['defaults'].setdefault('scan', {})
+    scan_cfg['bar_store'] = {'enabled': args.bar_store, 'path': os.path.join(workdir, 'bars'), 'retention_days': 120}
+    scan_cfg['indicator_state_path'] = os.path.join(workdir, 'indicator_state.pkl')
+    scan_cfg['indicator_mode'] = args.indicator_mode or scan_cfg.get('indicator_mode', 'batch')
+    scan_cfg['compute_executor'] = args.compute_executor or scan_cfg.get('compute_executor', 'thread')
+    scan_cfg.setdefault('live', {})['enabled'] = False
+    # Only the fake API's own limit (if any) applies, with the same margin a real account's config keeps.
+    scan_cfg.setdefault('rate_limit', {})['requests_per_minute'] = int(args.rate_limit * 0.95) if args.rate_limit else 0
+    path = os.path.join(workdir, 'config.yml')
+    with open(path, 'w') as file:
+        yaml.safe_dump(raw, file)
+    return path
+
+# --- Baseline comparison ---
+
+def compare(results, baseline, tolerance):
+    """Regression messages for results that fall more than `tolerance` behind the baseline."""
+    previous = {(r['benchmark'], r['symbols']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result['benchmark'], result['symbols']))
+        if before is None:
+            continue
+        label = f"{result['benchmark']} @ {result['symbols']} symbols"
+        if before.get('throughput') and result['throughput'] is not None \
+                and result['throughput'] < before['throughput'] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {result['throughput']}/s vs {before['throughput']}/s")
+        for key in ('p95_ms', 'peak_mb'):
+            if before.get(key) and result[key] is not None and result[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{label}: {key} {result[key]} vs {before[key]}")
+    return regressions
+
+def print_table(results):
+    columns = ("benchmark", "symbols", "seconds", "throughput", "p50_ms", "p95_ms", "p99_ms", "peak_mb")
+    print(" ".join(f"{c:>12}" for c in columns))
+    for result in results:
+        print(" ".join(f"{'-' if result[c] is None else result[c]:>12}" for c in columns))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated symbol counts")
+    parser.add_argument('--only', default=",".join(BENCHMARKS), help=f"Comma-separated subset of {', '.join(BENCHMARKS)}")
+    parser.add_argument('--timeframe', default='1h', help="Timeframe of the per-function benchmarks")
+    parser.add_argument('--days', type=int, default=365, help="History length of the per-function benchmarks")
+    parser.add_argument('--latency', type=float, default=0.05, help="Fake API seconds per request")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument('--rate-limit', type=int, help="Requests per minute before the fake API answers 429")
+    parser.add_argument('--indicator-mode', choices=('batch', 'incremental', 'panel'), help="Overrides scan.indicator_mode")
+    parser.add_argument('--compute-executor', choices=('thread', 'process'), help="Overrides scan.compute_executor")
+    parser.add_argument('--bar-store', action='store_true', help="Enable the bar store (in a temporary directory)")
+    parser.add_argument('--http', action='store_true', help="Serve the fake API over local HTTP and fetch with the async bars client")
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="Skip the memory-tracing passes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown before a result is a regression")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    # The code under test logs every symbol at INFO level; keep only problems.
+    logging.getLogger().setLevel(logging.WARNING)
+    sizes = [int(size) for size in args.sizes.split(',')]
+    names = [name for name in args.only.split(',') if name]
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="screener-bench-") as workdir:
+        ctx = BenchContext(args, workdir)
+        try:
+            for name in names:
+                for size in sizes:
+                    result = BENCHMARK_FUNCTIONS[name](ctx, size)
+                    results.append(result)
+                    print(f"{name} @ {size}: {result['throughput']} symbols/s, p95 {result['p95_ms']} ms, peak {result['peak_mb']} MB",
+                          flush=True)
+        finally:
+            ctx.close()
+        api_stats = ctx.fake_api.stats
+
+    print_table(results)
+    print(f"Fake API: {api_stats}")
+    report = {"created": datetime.now().isoformat(timespec='seconds'), "machine": platform.platform(),
+              "python": platform.python_version(), "cpus": os.cpu_count(), "settings": vars(args), "results": results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Saved baseline to {args.baseline}.")
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"No regressions against {args.baseline}.")
+
+if __name__ == '__main__':
+    main()
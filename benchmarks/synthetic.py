@@ -0,0 +1,128 @@
+# benchmarks/synthetic.py
+import functools
+import threading
+import time
+import zlib
+import numpy as np
+import pandas as pd
+import requests
+from alpaca_trade_api.rest import APIError
+
+SESSION_TZ = "America/New_York"
+# Alpaca timeframe strings (as sent by data_fetcher) -> bar length.
+BAR_FREQ = {"1Min": "1min", "5Min": "5min", "15Min": "15min", "1Hour": "1h", "4Hour": "4h", "1Day": "1D", "1Week": "7D"}
+
+def synthetic_symbols(count, prefix="SYN"):
+    """`count` made-up tickers; a distinct prefix keeps different runs from sharing cached state."""
+    return [f"{prefix}{i:05d}" for i in range(count)]
+
+def _to_utc(value):
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
+
+@functools.lru_cache(maxsize=64)
+def session_index(timeframe, start, end):
+    """
+    Bar timestamps (UTC) between `start` and `end` inclusive, shaped like Alpaca's: intraday bars during
+    regular weekday sessions, daily bars at New York midnight and weekly bars on Mondays. Holidays are ignored.
+    """
+    start, end = _to_utc(start), _to_utc(end)
+    days = pd.date_range(start.tz_convert(SESSION_TZ).normalize(), end.tz_convert(SESSION_TZ).normalize(), freq='D')
+    days = days[days.weekday < 5]
+    if timeframe == "1Week":
+        days = days[days.weekday == 0]
+    if timeframe in ("1Day", "1Week"):
+        stamps = days.tz_convert('UTC')
+    else:
+        freq = pd.Timedelta(BAR_FREQ[timeframe])
+        session_open = (pd.Timedelta(hours=9, minutes=30) // freq) * freq  # Aligned to the bar grid
+        offsets = np.arange(session_open.value, pd.Timedelta(hours=16).value, freq.value)
+        # Session wall-clock times localized day by day, so DST shifts move the bars' UTC times like real ones.
+        local = days.tz_localize(None).asi8[:, None] + offsets[None, :]
+        stamps = pd.DatetimeIndex(local.ravel()).tz_localize(SESSION_TZ).tz_convert('UTC')
+    return stamps[(stamps >= start) & (stamps <= end)]
+
+def generate_bars(symbol, timeframe, start, end, seed=0):
+    """
+    Deterministic OHLCV bars for `symbol`: a geometric random walk with per-symbol drift and volatility,
+    seeded from the symbol, timeframe and `seed`, so the same request always returns the same bars.
+    """
+    index = session_index(timeframe, str(start), str(end))
+    rng = np.random.default_rng(zlib.crc32(f"{seed}:{symbol}:{timeframe}".encode()))
+    n = len(index)
+    volatility = rng.uniform(0.002, 0.02)
+    close = rng.uniform(5, 500) * np.exp(np.cumsum(rng.normal(rng.uniform(-0.0003, 0.0006), volatility, n)))
+    open_ = np.empty(n)
+    open_[:1] = close[:1]
+    open_[1:] = close[:-1] * (1 + rng.normal(0, volatility / 4, n - 1))
+    wick = np.abs(rng.normal(0, volatility / 2, (2, n)))
+    frame = pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + wick[0]),
+        'low': np.minimum(open_, close) * (1 - wick[1]),
+        'close': close,
+        'volume': np.round(rng.lognormal(11, 1, n)),
+        'trade_count': rng.integers(50, 5000, n),
+        'vwap': (open_ + close) / 2,
+    }, index=index)
+    frame.index.name = 'timestamp'
+    return frame
+
+class _Bars:
+    __slots__ = ('df',)
+
+    def __init__(self, df):
+        self.df = df
+
+class FakeMarketAPI:
+    """
+    In-process stand-in for the `get_bars` part of alpaca_trade_api.REST, serving synthetic bars.
+    `latency` (+ up to `jitter`) seconds are slept per request; `error_rate` of requests fail with an
+    APIError; with `rate_limit`, requests beyond that many per minute fail with a 429 APIError, as Alpaca's do.
+    Safe to call from the worker threads data_fetcher uses.
+    """
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.lock = threading.Lock()
+        self.request_times = []
+        self.stats = {"requests": 0, "errors": 0, "throttled": 0, "bars": 0}
+
+    def _admit(self):
+        """Counts the request against the rate limit and decides its delay and outcome; returns (delay, error or None)."""
+        with self.lock:
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+            self.stats["requests"] += 1
+            now = time.monotonic()
+            if self.rate_limit:
+                self.request_times = [t for t in self.request_times if now - t < 60]
+                if len(self.request_times) >= self.rate_limit:
+                    self.stats["throttled"] += 1
+                    response = requests.Response()
+                    response.status_code = 429
+                    return delay, APIError({"code": 42910000, "message": "rate limit exceeded"}, requests.HTTPError(response=response))
+                self.request_times.append(now)
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return delay, APIError({"code": 50010000, "message": "internal server error"})
+            return delay, None
+
+    def get_bars(self, symbol, timeframe, start=None, end=None, adjustment=None, feed=None, limit=None, **kwargs):
+        delay, error = self._admit()
+        if delay:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+        end = end or pd.Timestamp.now(tz='UTC').isoformat()
+        if isinstance(symbol, str):
+            df = generate_bars(symbol, timeframe, start, end, self.seed)
+        else:
+            frames = [generate_bars(s, timeframe, start, end, self.seed).assign(symbol=s) for s in symbol]
+            df = pd.concat(frames) if frames else pd.DataFrame()
+        with self.lock:
+            self.stats["bars"] += len(df)
+        return _Bars(df)
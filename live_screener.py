@@ -0,0 +1,229 @@
+import asyncio
+import heapq
+import logging
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from your_logic.bar_feeds import AlpacaBarFeed, ReplayBarFeed
+from your_logic.bar_schedule import SESSION_TZ, MarketCalendar, bucket_bounds
+from your_logic.config_loader import get_config
+from your_logic.data_fetcher import fetch_data_batch
+from your_logic.incremental_indicators import IncrementalIndicatorEngine
+from your_logic.resampler import resample_ohlcv
+from screener_engine import analyze_timeframe, fetch_windows, pack_frame, plan_base_timeframes, unpack_frame
+
+MINUTE = pd.Timedelta(minutes=1)
+
+class _BarBuilder:
+    """
+    Aggregates minute bars into one timeframe's bars and hands each bar over as soon as it closes: on its
+    final minute, or at `deadline` (its end, or the session close if that comes first) when the minutes
+    left in it have no trades.
+    """
+    __slots__ = ('timeframe', 'calendar', 'start', 'end', 'deadline', 'values')
+
+    def __init__(self, timeframe, calendar):
+        self.timeframe = timeframe
+        self.calendar = calendar
+        self.start = self.end = self.deadline = None
+        self.values = None
+
+    def _open(self, timestamp, values):
+        self.start, self.end = bucket_bounds(timestamp, self.timeframe)
+        self.deadline = max(self.calendar.last_trading_time(self.end), timestamp + MINUTE)
+        self.values = values
+
+    def seed(self, start, values):
+        """Continues a bar that was still forming when history was loaded."""
+        self._open(start, list(values))
+
+    def add(self, bar):
+        """Adds a minute bar; returns the [(start, [o, h, l, c, v]), ...] bars it closed."""
+        if self.start is not None and bar.timestamp < (self.start if self.values is not None else self.end):
+            return []  # Late bar for an already closed bucket
+        closed = []
+        if self.values is not None and bar.timestamp >= self.end:
+            # The bucket's last minute never arrived (no trades); close it on the first bar after it.
+            closed.append((self.start, self.values))
+            self.values = None
+        if self.values is None:
+            self._open(bar.timestamp, [bar.open, bar.high, bar.low, bar.close, bar.volume])
+        else:
+            values = self.values
+            values[1] = max(values[1], bar.high)
+            values[2] = min(values[2], bar.low)
+            values[3] = bar.close
+            values[4] += bar.volume
+        if bar.timestamp + MINUTE >= self.end:
+            closed.append((self.start, self.values))
+            self.values = None
+        return closed
+
+    def expire(self, start):
+        """Closes the bucket starting at `start` if it is still open; returns [(start, values)] or []."""
+        if self.values is None or self.start != start:
+            return []
+        closed, self.values = [(self.start, self.values)], None
+        return closed
+
+class _SeriesBuffer:
+    """Closed bars of one series in preallocated arrays; appends are O(1) amortized, unlike DataFrame concat."""
+    __slots__ = ('max_bars', 'timestamps', 'values', 'size')
+
+    def __init__(self, timestamps, values, max_bars):
+        self.max_bars = max_bars
+        keep = slice(max(0, len(timestamps) - max_bars), len(timestamps))
+        self.size = keep.stop - keep.start
+        self.timestamps = np.empty(2 * max_bars, dtype='i8')
+        self.values = np.empty((2 * max_bars, values.shape[1]), dtype='f8')
+        self.timestamps[:self.size] = timestamps[keep]
+        self.values[:self.size] = values[keep]
+
+    def append(self, timestamp, values):
+        if self.size == len(self.timestamps):
+            # Full: slide the newest max_bars - 1 bars to the front, once per max_bars appends.
+            keep = self.max_bars - 1
+            self.timestamps[:keep] = self.timestamps[self.size - keep:self.size]
+            self.values[:keep] = self.values[self.size - keep:self.size]
+            self.size = keep
+        self.timestamps[self.size] = timestamp.value
+        self.values[self.size] = values
+        self.size += 1
+
+    def frame(self):
+        """A DataFrame of the newest max_bars bars that owns its data (safe to hand to a worker thread)."""
+        start = max(0, self.size - self.max_bars)
+        return unpack_frame(self.timestamps[start:self.size].copy(), self.values[start:self.size].copy())
+
+class LiveScreener:
+    """
+    Event-driven screening: minute bars are aggregated into every configured timeframe, and when a
+    timeframe bar closes only that (symbol, timeframe) is re-evaluated. `on_change(symbol, timeframe, result)`
+    is awaited with the new result row, or None when the pair has no signal. Bars whose last minutes
+    have no trades are closed by `close_due` once their deadline plus `grace_seconds` has passed.
+    """
+    def __init__(self, config, symbol_config, on_change, max_bars=2000, grace_seconds=10):
+        self.config = config
+        self.symbol_config = symbol_config
+        self.on_change = on_change
+        self.max_bars = max_bars
+        self.grace = pd.Timedelta(seconds=grace_seconds)
+        self.history = {}
+        calendar = MarketCalendar.from_config(config.scan.get('schedule', {}))
+        self.builders = {(symbol, tf): _BarBuilder(tf, calendar) for symbol in symbol_config for tf in config.timeframes}
+        # Heap of (deadline, (symbol, timeframe), bucket start) of every bucket opened; stale entries are skipped.
+        self.deadlines = []
+        # Its own engine: live updates must not interleave with a scheduled scan's state for the same series.
+        self.indicator_engine = IncrementalIndicatorEngine()
+        self.locks = {}
+        self.pending = set()
+
+    def seed(self, symbol, timeframe, df, history_end):
+        """Installs a pair's history; a last bar still forming at `history_end` is continued from the feed."""
+        timestamps, values = pack_frame(df)
+        if len(df) and bucket_bounds(df.index[-1], timeframe)[1] > history_end:
+            builder = self.builders[(symbol, timeframe)]
+            builder.seed(df.index[-1], values[-1].tolist())
+            heapq.heappush(self.deadlines, (builder.deadline, (symbol, timeframe), builder.start))
+            timestamps, values = timestamps[:-1], values[:-1]
+        self.history[(symbol, timeframe)] = _SeriesBuffer(timestamps, values, self.max_bars)
+
+    def on_bar(self, bar):
+        """Feeds one minute bar and schedules re-evaluation of every timeframe bar it closes."""
+        if bar.symbol not in self.symbol_config:
+            return
+        for timeframe in self.config.timeframes:
+            key = (bar.symbol, timeframe)
+            builder = self.builders[key]
+            previous = builder.start
+            for start, values in builder.add(bar):
+                self._close(key, start, values)
+            if builder.values is not None and builder.start != previous:
+                heapq.heappush(self.deadlines, (builder.deadline, key, builder.start))
+
+    def close_due(self, now):
+        """Closes every open bar whose deadline plus the grace period has passed at `now`."""
+        while self.deadlines and self.deadlines[0][0] + self.grace <= now:
+            _, key, start = heapq.heappop(self.deadlines)
+            for start, values in self.builders[key].expire(start):
+                self._close(key, start, values)
+
+    def _close(self, key, start, values):
+        """Appends a closed bar to its series and schedules the pair's re-evaluation."""
+        history = self.history.get(key)
+        if history is None:
+            history = self.history[key] = _SeriesBuffer(np.empty(0, dtype='i8'), np.empty((0, 5)), self.max_bars)
+        history.append(start, values)
+        task = asyncio.create_task(self._evaluate(key, history.frame()))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def _evaluate(self, key, history):
+        symbol, timeframe = key
+        # Per-pair lock: evaluations of one series run in bar order; different pairs run concurrently.
+        async with self.locks.setdefault(key, asyncio.Lock()):
+            try:
+                result = await asyncio.to_thread(analyze_timeframe, history, self.config, symbol,
+                                                 self.symbol_config[symbol], timeframe, self.indicator_engine)
+            except Exception as e:
+                logging.error(f"Error evaluating live {symbol} on {timeframe}: {e}")
+                return
+            await self.on_change(symbol, timeframe, result)
+
+async def load_history(screener, api, history_end):
+    """Fetches and seeds every (symbol, timeframe) history, using only bars that start before `history_end`."""
+    config = screener.config
+    symbols = list(screener.symbol_config)
+    plan = plan_base_timeframes(config.timeframes, config.scan.get('resample_from', {}))
+    windows = fetch_windows(plan, config.lookbacks, config.scan.get('history_days', 90))
+    for base_tf, timeframes in plan.items():
+        start_date = (history_end - timedelta(days=windows[base_tf])).strftime('%Y-%m-%d')
+        frames = await fetch_data_batch(api, symbols, start_date, history_end.isoformat(), interval=base_tf,
+                                        chunk_size=config.scan.get('batch_size', 50))
+        for symbol, base_df in frames.items():
+            base_df = base_df[base_df.index < history_end]
+            if base_df.empty:
+                continue
+            for timeframe in timeframes:
+                df = base_df if timeframe == base_tf else resample_ohlcv(base_df, timeframe)
+                if df is not None:
+                    screener.seed(symbol, timeframe, df, history_end)
+    logging.info(f"Live screener seeded {len(screener.history)} series up to {history_end}.")
+
+async def create_feed(api, stream_factory, symbols, live_cfg):
+    """Builds the configured bar feed; returns (feed, time the feed's bars start from)."""
+    if live_cfg.get('feed', 'alpaca') == 'replay':
+        end = pd.Timestamp.now(tz='UTC').floor('min')
+        start = (end - pd.Timedelta(days=live_cfg.get('replay_days', 2))).tz_convert(SESSION_TZ).normalize().tz_convert('UTC')
+        frames = await fetch_data_batch(api, symbols, start.isoformat(), end.isoformat(), interval='1m')
+        feed = ReplayBarFeed(frames, live_cfg.get('replay_speed', 60))
+        return feed, feed.start or end
+    stream = stream_factory()
+    if stream is None:
+        raise RuntimeError("market data stream is not available")
+    return AlpacaBarFeed(stream, symbols), pd.Timestamp.now(tz='UTC')
+
+async def close_bars_on_time(screener, clock, interval=1.0):
+    """Closes bars that no further minute bar will close, checking `clock()` every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        screener.close_due(clock())
+
+async def run_live_screener(api, symbol_config, feed, on_change, history_end=None):
+    """Seeds history, then screens every closed bar from `feed` until it ends or the task is cancelled."""
+    config = get_config()
+    if not config:
+        return
+    history_end = history_end or pd.Timestamp.now(tz='UTC')
+    live_cfg = config.scan.get('live', {})
+    screener = LiveScreener(config, symbol_config, on_change, live_cfg.get('max_bars', 2000),
+                            live_cfg.get('close_grace_seconds', 10))
+    await load_history(screener, api, history_end)
+    closer = asyncio.create_task(close_bars_on_time(screener, feed.now))
+    try:
+        async for bar in feed.bars():
+            screener.on_bar(bar)
+    finally:
+        closer.cancel()
+    await asyncio.gather(*screener.pending)
+    logging.info("Live bar feed ended.")
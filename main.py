@@ -1,16 +1,33 @@
-from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect, Query, HTTPException
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
 import asyncio
 import json
+import os
+import socket
+import uuid
 
 from your_logic.api_manager import AlpacaManager
-from screener_engine import run_screener_instance
+from your_logic.bar_schedule import BarCloseTrigger, EvaluationCache, MarketCalendar
+from screener_engine import run_screener_instance, shutdown_compute_pool
+from live_screener import create_feed, run_live_screener
+from your_logic.config_loader import get_config
+from your_logic.request_scheduler import configure_requests
+from your_logic.scan_queue import ScanQueue
+from your_logic.signal_store import SignalStore
+from your_logic.universe import load_universe
+from your_logic.scan_metrics import (SCAN_SECONDS, SCAN_SIGNALS, SCANS, WEBSOCKET_CLIENTS, monitor_event_loop,
+                                      render_metrics, start_trace, timed)
+from results_book import ResultBook, SORTABLE_FIELDS
+from ws_manager import ConnectionManager
 
 # --- Global State & Configuration ---
 screener_results = []
@@ -18,17 +35,14 @@ scan_status = {
     "last_scan": "Never", "next_scan": "Not Scheduled",
     "auto_run": "Off", "status_message": "Idle", "progress": 0
 }
-SYMBOL_CONFIG = {
-    'AAPL': 'low_vol_profile', 'MSFT': 'low_vol_profile', 'GOOGL': 'low_vol_profile',
-    'NVDA': 'mid_vol_profile', 'AMD': 'mid_vol_profile', 'TSLA': 'high_vol_profile',
-    'MSTR': 'high_vol_profile', 'RIOT': 'high_vol_profile', 'MARA': 'high_vol_profile',
-    'SOFI': 'micro_cap_profile', 'PLTR': 'micro_cap_profile', 'RIVN': 'micro_cap_profile'
-}
+# Symbols and profiles from defaults.scan.universe; file and asset-list sources are reloaded after refresh_minutes.
+universe_cache = {"symbols": None, "loaded_at": 0.0, "config_mtime": None}
 
 app = FastAPI()
 scheduler = AsyncIOScheduler()
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 api_manager = AlpacaManager()
 api_manager.initialize()
@@ -36,54 +50,390 @@ api = api_manager.get_api()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+# --- Live updates: clients get a snapshot on connect, then sequenced deltas ---
+results_book = ResultBook()
+# Tells this process's result sequence numbers apart from another process's (see /results).
+BOOT_ID = uuid.uuid4().hex[:12]
+
+def snapshot_message():
+    return json.dumps({"type": "snapshot", "seq": results_book.seq,
+                       "data": {"results": results_book.snapshot(), "status": scan_status}})
+
+manager = ConnectionManager(snapshot_message)
+
+async def broadcast_delta(delta):
+    if delta:
+        with timed('broadcast'):
+            await manager.broadcast(json.dumps({"type": "delta", **delta}))
 
-manager = ConnectionManager()
+async def share_status(kind="status"):
+    """Sends scan_status to the dashboards; in cluster mode through the shared state, so every web worker sends it."""
+    if scan_queue is not None:
+        await asyncio.to_thread(scan_queue.publish, 'scan_status', {"kind": kind, "status": scan_status})
+        return
+    with timed('broadcast'):
+        await manager.broadcast(json.dumps({"type": kind, "data": scan_status}))
 
 async def update_progress_and_broadcast(progress: float, message: str):
     scan_status['progress'] = progress
     scan_status['status_message'] = message
-    await manager.broadcast(json.dumps({"type": "progress", "data": scan_status}))
+    await share_status("progress")
+
+async def broadcast_result(result: dict):
+    await broadcast_delta(results_book.upsert(result))
+
+async def on_live_result(symbol: str, timeframe: str, result: dict | None):
+    """
+    Pushes a live signal as soon as its bar closes, or clears it once it no longer holds. In cluster mode
+    it reaches every web worker's result book, this one's included, through the shared state.
+    """
+    global live_updates_dirty
+    if scan_queue is not None:
+        pair = f"{symbol}|{timeframe}"
+        previous = live_updates[pair] if pair in live_updates else results_book.rows.get((symbol, timeframe))
+        if result and result != previous and signal_store is not None:
+            live_signals.append((time.time(), result))
+        live_updates[pair] = result
+        live_updates_dirty = True
+        return
+    delta = results_book.upsert(result) if result else results_book.remove(symbol, timeframe)
+    if result and delta and signal_store is not None:
+        live_signals.append((time.time(), result))
+    await broadcast_delta(delta)
+
+def market_data_api(config):
+    """The client scans and live screening fetch bars with (defaults.scan.market_data_client)."""
+    return api_manager.get_market_data_api(config.scan.get('market_data_client', 'async') if config else 'async')
+
+async def current_universe():
+    """Returns {symbol: profile or None} for the next scan, reloading it when stale or the config changed."""
+    config = get_config()
+    universe_cfg = config.scan.get('universe', {}) if config else {}
+    max_age = universe_cfg.get('refresh_minutes', 1440) * 60
+    if (universe_cache['symbols'] is None or universe_cache['config_mtime'] != (config.mtime if config else None)
+            or time.monotonic() - universe_cache['loaded_at'] > max_age):
+        universe_cache['symbols'] = await asyncio.to_thread(load_universe, universe_cfg, api)
+        universe_cache['loaded_at'] = time.monotonic()
+        universe_cache['config_mtime'] = config.mtime if config else None
+    return universe_cache['symbols']
+
+live_task = None
+loop_monitor_task = None
+
+# --- Scheduled scans (defaults.scan.schedule): in bar_close mode scans run as bars close, and each one
+# only re-evaluates the (symbol, timeframe) pairs with a newly closed bar. A trigger that arrives while
+# a scan runs is coalesced into one follow-up scan. ---
+scan_evaluations = EvaluationCache()
+scan_running = False
+scan_pending = False
+
+def schedule_mode(config):
+    return config.scan.get('schedule', {}).get('mode', 'interval') if config else 'interval'
+
+# --- Signal history (defaults.scan.history): every scan's signals are recorded, and the newest scan's
+# results and status are restored at startup. Live signals are buffered and written in batches. ---
+signal_store = None
+live_signals = []
+history_task = None
+# Per-process scheduling state, not restored with the rest of scan_status.
+PROCESS_STATUS_KEYS = ('auto_run', 'next_scan')
+
+async def record_scan_history(results, history_cfg):
+    status = {key: value for key, value in scan_status.items() if key not in PROCESS_STATUS_KEYS}
+    try:
+        await asyncio.to_thread(signal_store.record_scan, results, status)
+        await asyncio.to_thread(signal_store.prune, history_cfg.get('keep_days', 180))
+    except Exception as e:
+        logging.error(f"Could not record the scan in the signal history: {e}", exc_info=True)
+
+async def restore_last_scan():
+    """Shows the newest recorded scan's results and status until the next scan replaces them."""
+    global screener_results
+    latest = await asyncio.to_thread(signal_store.latest_scan)
+    if latest is None:
+        return
+    recorded, status, rows = latest
+    scan_status.update({key: value for key, value in status.items() if key not in PROCESS_STATUS_KEYS})
+    scan_status['status_message'] = f"Showing results of the scan at {scan_status['last_scan']}"
+    screener_results = rows
+    results_book.replace(rows)
+    logging.info(f"Restored {len(rows)} results of the scan recorded at {datetime.fromtimestamp(recorded)}.")
+
+async def flush_live_signals(history_cfg):
+    """Writes the buffered live signals every flush_seconds."""
+    while True:
+        await asyncio.sleep(history_cfg.get('flush_seconds', 5))
+        if live_signals:
+            events = live_signals[:]
+            del live_signals[:len(events)]
+            try:
+                await asyncio.to_thread(signal_store.record_live, events)
+            except Exception as e:
+                logging.error(f"Could not record {len(events)} live signals: {e}", exc_info=True)
+
+async def run_live_screening(live_cfg):
+    try:
+        # Streaming has no daily prefilter phase, so only symbols with an explicit profile are followed.
+        universe = await current_universe()
+        symbol_config = {symbol: profile for symbol, profile in universe.items() if profile}
+        if len(symbol_config) < len(universe):
+            logging.info(f"Live screening skips {len(universe) - len(symbol_config)} symbols without a profile.")
+        data_api = market_data_api(get_config())
+        feed, history_end = await create_feed(data_api, api_manager.create_stream, list(symbol_config), live_cfg)
+        await run_live_screener(data_api, symbol_config, feed, on_live_result, history_end)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logging.error(f"Live screening stopped: {e}", exc_info=True)
+
+# --- Sharded scans (defaults.scan.cluster): scan_worker.py processes scan shards from a shared queue.
+# Every web worker follows the shared scan state; the one holding the scheduler lease runs the schedule,
+# submits scans and merges their shards' results. ---
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+scan_queue = None
+cluster_task = None
+owns_scheduler = False
+# Live results since the owner's last final results ("symbol|timeframe" -> row, or None once cleared),
+# published as one shared value on every poll and applied by each web worker after the results.
+live_updates = {}
+live_updates_dirty = False
 
-async def scheduled_scan_job():
-    global screener_results, scan_status
-    if not api:
+async def run_sharded_scan(symbol_config, cluster_cfg, scan_id=None):
+    """
+    Queues a scan of `symbol_config` for the scan workers (or follows the already queued `scan_id`),
+    sharing progress and the results of each finished shard. Returns the merged results.
+    """
+    if scan_id is None:
+        scan_id = await asyncio.to_thread(scan_queue.submit, symbol_config, cluster_cfg.get('shard_size', 100))
+    shard_results = {}
+    while True:
+        state = await asyncio.to_thread(scan_queue.scan_progress, scan_id, set(shard_results))
+        if state['results']:
+            shard_results.update(state['results'])
+            rows = [row for shard in sorted(shard_results) for row in shard_results[shard]]
+            await asyncio.to_thread(scan_queue.publish, 'results', {"final": False, "rows": rows})
+        finished = state['done'] + state['failed']
+        message = f"Scan {scan_id}: {state['done']} of {state['shards']} shards done"
+        if state['failed']:
+            message += f", {state['failed']} failed"
+        if finished < state['shards'] and not state['leased']:
+            message += "; waiting for a scan worker"
+        if (state['progress'], message) != (scan_status['progress'], scan_status['status_message']):
+            await update_progress_and_broadcast(state['progress'], message)
+        if finished == state['shards']:
+            break
+        await asyncio.sleep(cluster_cfg.get('poll_seconds', 1.0))
+    await asyncio.to_thread(scan_queue.finish_scan, scan_id, 'failed' if state['failed'] else 'completed')
+    if state['failed']:
+        logging.error(f"Scan {scan_id}: {state['failed']} of {state['shards']} shards failed; their symbols have no results.")
+    return [row for shard in sorted(shard_results) for row in shard_results[shard]]
+
+async def apply_final_results(results):
+    """Replaces the previous scan's rows with `results`; in cluster mode every web worker does so via the shared state."""
+    global screener_results
+    if scan_queue is not None:
+        # The final results replace the live rows too, as in a single process.
+        live_updates.clear()
+        await asyncio.to_thread(scan_queue.publish, 'results', {"final": True, "rows": results})
+        return
+    screener_results = results
+    await broadcast_delta(results_book.replace(results))
+
+async def scheduled_scan_job(scan_id=None):
+    """Runs a scan, or, if one is already running, has one more scan follow it (however many triggers arrive)."""
+    global scan_running, scan_pending
+    if scan_running:
+        scan_pending = True
+        return
+    scan_running = True
+    try:
+        while True:
+            scan_pending = False
+            await run_scan(scan_id)
+            if not scan_pending:
+                break
+            scan_id = None
+    finally:
+        scan_running = False
+
+async def run_scan(scan_id=None):
+    config = get_config()
+    cluster_cfg = config.scan.get('cluster', {}) if config else {}
+    if scan_queue is not None and not owns_scheduler:
+        return
+    if not api and scan_queue is None:
         scan_status['status_message'] = "Error: API not initialized"
-        await manager.broadcast(json.dumps({"type": "status", "data": scan_status}))
+        await share_status()
         return
 
+    # Stage timings of this scan, from every task and worker thread it starts, end up in scan_status['trace'].
+    trace = start_trace()
+    scan_started = time.perf_counter()
     await update_progress_and_broadcast(0, "Initializing scan...")
     try:
-        results = await run_screener_instance(api, SYMBOL_CONFIG, update_progress_and_broadcast)
-        screener_results = results
+        if scan_queue is not None:
+            # A scan still running (e.g. one a previous scheduler owner queued) is followed, not queued again.
+            scan_id = scan_id or await asyncio.to_thread(scan_queue.running_scan)
+            symbol_config = await current_universe() if scan_id is None else None
+            results = await run_sharded_scan(symbol_config, cluster_cfg, scan_id)
+        else:
+            evaluations = scan_evaluations if schedule_mode(config) == 'bar_close' else None
+            results = await run_screener_instance(market_data_api(config), await current_universe(),
+                                                  update_progress_and_broadcast, broadcast_result, evaluations=evaluations)
+        SCANS.inc(outcome="completed")
+        SCAN_SECONDS.observe(time.perf_counter() - scan_started)
+        SCAN_SIGNALS.set(len(results))
         scan_status['last_scan'] = datetime.now().strftime('%d-%m-%Y %H:%M:%S')
         job = scheduler.get_job('scan-job')
         scan_status['next_scan'] = job.next_run_time.strftime('%d-%m-%Y %H:%M:%S') if job else 'N/A'
         scan_status['status_message'] = f"Scan Completed at {scan_status['last_scan']}"
         scan_status['progress'] = 100
-        await manager.broadcast(json.dumps({"type": "full_update", "data": {"results": screener_results, "status": scan_status}}))
+        # Rows from the previous scan that did not signal again are removed here.
+        await apply_final_results(results)
+        scan_status['trace'] = trace.summary()
+        if signal_store is not None:
+            await record_scan_history(results, config.scan.get('history', {}) if config else {})
+        await share_status()
     except Exception as e:
         logging.error(f"Error during scan: {e}", exc_info=True)
+        SCANS.inc(outcome="failed")
         scan_status['status_message'] = f"Error: {e}"
-        await manager.broadcast(json.dumps({"type": "status", "data": scan_status}))
+        scan_status['trace'] = trace.summary()
+        await share_status()
+
+async def apply_schedule(frequency):
+    """Installs (or, for 0, removes) the scan job in this process's scheduler and shows it in scan_status."""
+    if scheduler.get_job('scan-job'):
+        scheduler.remove_job('scan-job')
+    if frequency > 0:
+        config = get_config()
+        if schedule_mode(config) == 'bar_close':
+            # The frequency becomes the shortest spacing between scans.
+            schedule_cfg = config.scan.get('schedule', {})
+            trigger = BarCloseTrigger(MarketCalendar.from_config(schedule_cfg), config.timeframes,
+                                      schedule_cfg.get('settle_seconds', 10), frequency * 60)
+            scan_status['auto_run'] = f"At bar closes, at most every {frequency} min"
+        else:
+            trigger = IntervalTrigger(minutes=frequency)
+            scan_status['auto_run'] = f"Every {frequency} min"
+        # A second instance may start while a scan runs, so scheduled_scan_job can coalesce it.
+        scheduler.add_job(scheduled_scan_job, trigger, id='scan-job', max_instances=2,
+                          next_run_time=datetime.now() + timedelta(seconds=5))
+        await asyncio.sleep(0.1)
+        job = scheduler.get_job('scan-job')
+        scan_status['next_scan'] = job.next_run_time.strftime('%d-%m-%Y %H:%M:%S') if job else "N/A"
+    else:
+        scan_status['auto_run'] = "Off"
+        scan_status['next_scan'] = "Not Scheduled"
+
+def start_live_screening(config):
+    global live_task
+    live_cfg = config.scan.get('live', {}) if config else {}
+    if live_cfg.get('enabled', False) and api and live_task is None:
+        live_task = asyncio.create_task(run_live_screening(live_cfg))
+
+def stop_live_screening():
+    global live_task
+    if live_task is not None:
+        live_task.cancel()
+        live_task = None
+
+async def follow_cluster(cluster_cfg):
+    """
+    Runs in every web worker: holds or waits for the scheduler lease, and applies the scan status and
+    results shared by the owner to this worker's result book and dashboard clients. The owner also runs
+    the schedule and live screening (the data stream allows one connection), and resumes a scan a
+    previous owner left running.
+    """
+    global owns_scheduler, screener_results, live_updates_dirty
+    versions = {}
+    while True:
+        try:
+            owner = await asyncio.to_thread(scan_queue.acquire_lease, 'scheduler', WORKER_ID,
+                                            cluster_cfg.get('scheduler_lease_seconds', 30))
+            if owner and not owns_scheduler:
+                owns_scheduler = True
+                logging.info(f"{WORKER_ID} now owns the scan scheduler.")
+                schedule = await asyncio.to_thread(scan_queue.read, 'schedule', {"frequency": 0})
+                await apply_schedule(schedule['frequency'])
+                start_live_screening(get_config())
+                scan_id = await asyncio.to_thread(scan_queue.running_scan)
+                if scan_id is not None:
+                    asyncio.create_task(scheduled_scan_job(scan_id))
+            elif not owner and owns_scheduler:
+                owns_scheduler = False
+                logging.warning(f"{WORKER_ID} lost the scan scheduler lease.")
+                await apply_schedule(0)
+                stop_live_screening()
+                live_updates.clear()
+
+            if owns_scheduler and live_updates_dirty:
+                live_updates_dirty = False
+                await asyncio.to_thread(scan_queue.publish, 'live', dict(live_updates))
+
+            changes = await asyncio.to_thread(scan_queue.changes, versions)
+            # Live updates are newer than the results they arrive with.
+            for key, value in sorted(changes.items(), key=lambda change: change[0] == 'live'):
+                if key == 'schedule' and owns_scheduler:
+                    await apply_schedule(value['frequency'])
+                    await share_status()
+                elif key == 'scan_status':
+                    scan_status.update(value['status'])
+                    await manager.broadcast(json.dumps({"type": value['kind'], "data": scan_status}))
+                elif key == 'results':
+                    if value['final']:
+                        screener_results = value['rows']
+                        await broadcast_delta(results_book.replace(value['rows']))
+                    else:
+                        for row in value['rows']:
+                            await broadcast_result(row)
+                elif key == 'live':
+                    for pair, row in value.items():
+                        symbol, timeframe = pair.split('|')
+                        await broadcast_delta(results_book.upsert(row) if row else results_book.remove(symbol, timeframe))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Error following the shared scan state: {e}", exc_info=True)
+        await asyncio.sleep(cluster_cfg.get('poll_seconds', 1.0))
 
 @app.on_event("startup")
 async def startup_event():
+    global loop_monitor_task, scan_queue, cluster_task, signal_store, history_task
     scheduler.start()
+    loop_monitor_task = asyncio.create_task(monitor_event_loop())
+    config = get_config()
+    cluster_cfg = config.scan.get('cluster', {}) if config else {}
+    history_cfg = config.scan.get('history', {}) if config else {}
+    if config:
+        # Live screening shares the request budget too; every scan re-applies it from the current config.
+        configure_requests(**config.scan.get('rate_limit', {}), max_in_flight=config.scan.get('max_concurrent_requests'))
+    if history_cfg.get('enabled', False):
+        signal_store = SignalStore(history_cfg.get('db_path', 'data/signal_history.db'))
+        history_task = asyncio.create_task(flush_live_signals(history_cfg))
+        # In cluster mode the shared scan state already holds the last results and status.
+        if not cluster_cfg.get('enabled', False):
+            await restore_last_scan()
+    if cluster_cfg.get('enabled', False):
+        scan_queue = ScanQueue(cluster_cfg.get('db_path', 'data/scan_state.db'))
+        cluster_task = asyncio.create_task(follow_cluster(cluster_cfg))
+    else:
+        start_live_screening(config)
 
 @app.on_event("shutdown")
 async def shutdown_event():
     scheduler.shutdown()
+    stop_live_screening()
+    for task in (loop_monitor_task, cluster_task, history_task):
+        if task is not None:
+            task.cancel()
+    if signal_store is not None and live_signals:
+        signal_store.record_live(live_signals)
+    if scan_queue is not None and owns_scheduler:
+        # Lets another web worker take over the schedule right away instead of after the lease runs out.
+        scan_queue.release_lease('scheduler', WORKER_ID)
+    await api_manager.close_bars_client()
+    shutdown_compute_pool()
 
 class ScheduleRequest(BaseModel):
     frequency: int
@@ -94,23 +444,75 @@ async def read_root(request: Request):
 
 @app.get("/get_initial_data")
 async def get_initial_data():
-    return {"results": screener_results, "status": scan_status}
+    return {"results": results_book.snapshot(), "status": scan_status, "seq": results_book.seq}
+
+@app.get("/results")
+async def query_results(
+    request: Request,
+    signal: str | None = None, profile: str | None = None, tf: str | None = None, symbol: str | None = None,
+    sort: str | None = None, order: str = Query("asc", pattern="^(asc|desc)$"),
+    offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+):
+    """Filtered, sorted and paginated results; answers 304 while the results are unchanged."""
+    if sort is not None and sort not in SORTABLE_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SORTABLE_FIELDS)}")
+    # The sequence number changes with every result change; it restarts with the process and every web
+    # worker keeps its own, so the process's boot id makes it identify this URL's representation.
+    etag = f'"{BOOT_ID}-{results_book.seq}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    filters = {"signal": signal, "profile": profile, "tf": tf, "symbol": symbol.upper() if symbol else None}
+    total, rows = results_book.query(filters, sort, order == "desc", offset, limit)
+    body = json.dumps({"seq": results_book.seq, "total": total, "offset": offset, "limit": limit,
+                       "results": rows, "facets": results_book.facets()})
+    return Response(body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+def _history_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp is not None else None
+
+@app.get("/signals/history")
+async def signal_history(
+    symbol: str | None = None, tf: str | None = None, signal: str | None = None,
+    since: datetime | None = None, until: datetime | None = None,
+    source: str | None = Query(None, pattern="^(scan|live)$"), limit: int = Query(500, ge=1, le=5000),
+):
+    """Recorded signals, newest first; `since`/`until` are ISO 8601 times (UTC unless they carry an offset)."""
+    if signal_store is None:
+        raise HTTPException(status_code=404, detail="Signal history is disabled (defaults.scan.history.enabled)")
+    bounds = [bound.replace(tzinfo=bound.tzinfo or timezone.utc).timestamp() if bound else None for bound in (since, until)]
+    rows = await asyncio.to_thread(signal_store.history, symbol.upper() if symbol else None, tf, signal,
+                                   *bounds, source, limit)
+    for row in rows:
+        row['time'] = _history_time(row['time'])
+    return {"results": rows}
+
+@app.get("/signals/first_fired")
+async def signal_first_fired(symbol: str, tf: str):
+    """When `symbol` first (and last) signalled on `tf`, and since when it has signalled in every scan."""
+    if signal_store is None:
+        raise HTTPException(status_code=404, detail="Signal history is disabled (defaults.scan.history.enabled)")
+    summary = await asyncio.to_thread(signal_store.first_fired, symbol.upper(), tf)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"No recorded signal for {symbol.upper()} {tf}")
+    return {"Symbol": symbol.upper(), "TF": tf, **summary,
+            **{key: _history_time(summary[key]) for key in ('first', 'last', 'streak_start')}}
+
+@app.get("/metrics")
+async def metrics():
+    """Scan, API and event-loop metrics in the Prometheus text format."""
+    WEBSOCKET_CLIENTS.set(len(manager.clients))
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
 
 @app.post("/update_schedule")
 async def update_schedule(schedule_request: ScheduleRequest):
     frequency = schedule_request.frequency
-    if scheduler.get_job('scan-job'):
-        scheduler.remove_job('scan-job')
-    if frequency > 0:
-        scheduler.add_job(scheduled_scan_job, 'interval', minutes=frequency, id='scan-job', next_run_time=datetime.now() + timedelta(seconds=5))
-        scan_status['auto_run'] = f"Every {frequency} min"
-        await asyncio.sleep(0.1)
-        job = scheduler.get_job('scan-job')
-        scan_status['next_scan'] = job.next_run_time.strftime('%d-%m-%Y %H:%M:%S') if job else "N/A"
-    else:
-        scan_status['auto_run'] = "Off"
-        scan_status['next_scan'] = "Not Scheduled"
-    await manager.broadcast(json.dumps({"type": "status", "data": scan_status}))
+    if scan_queue is not None:
+        # The scheduler owner, possibly another web worker, applies it and shares the new status.
+        await asyncio.to_thread(scan_queue.publish, 'schedule', {"frequency": frequency})
+        return {"message": "Schedule updated."}
+    await apply_schedule(frequency)
+    await share_status()
     return {"message": "Schedule updated."}
 
 @app.websocket("/ws")
@@ -118,6 +520,12 @@ async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
     try:
         while True:
-            await websocket.receive_text()
+            message = await websocket.receive_text()
+            try:
+                request = json.loads(message)
+            except ValueError:
+                continue
+            if isinstance(request, dict) and request.get("type") == "resync":
+                await manager.send_snapshot(websocket)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
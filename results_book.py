@@ -0,0 +1,141 @@
+from collections import defaultdict
+from your_logic.config_loader import KNOWN_TIMEFRAMES
+
+# Query parameter -> function giving the index keys of a row. A signal is indexed both by its full name
+# ("Buy (momentum_trend_refined)") and by its base name ("Buy"), which is what the dashboard filter offers.
+INDEXED_FIELDS = {
+    'signal': lambda row: {row['Signal'], row['Signal'].split('(')[0].strip()},
+    'profile': lambda row: {row['Profile']},
+    'tf': lambda row: {row['TF']},
+    'symbol': lambda row: {row['Symbol']},
+}
+SORTABLE_FIELDS = ('Symbol', 'TF', 'Price', 'Volume', 'VWMA', 'Stoch_k', 'Stoch_d', 'Signal', 'Candle', 'SL', 'TP', 'Profile')
+TF_ORDER = {tf: i for i, tf in enumerate(KNOWN_TIMEFRAMES)}
+QUERY_CACHE_SIZE = 64
+
+def result_key(row):
+    return row['Symbol'], row['TF']
+
+def _sort_value(field):
+    if field == 'TF':
+        return lambda row: TF_ORDER.get(row['TF'], len(TF_ORDER))
+    # Rows without a value (e.g. no SL) sort after all others when ascending.
+    return lambda row: (row[field] is None, row[field] if row[field] is not None else 0)
+
+class ResultBook:
+    """
+    The current result rows keyed by (Symbol, TF), plus a sequence number bumped on every change.
+    Each mutation returns the delta to broadcast (or None if nothing changed); clients apply deltas in
+    sequence order and ask for a snapshot when they see a gap. Rows are also indexed by signal, profile,
+    timeframe and symbol for server-side queries, whose results are cached until the next change.
+    """
+    def __init__(self):
+        self.rows = {}
+        self.seq = 0
+        self.position = {}
+        self.indexes = {field: defaultdict(set) for field in INDEXED_FIELDS}
+        self._query_cache = {}
+
+    def snapshot(self):
+        return list(self.rows.values())
+
+    # --- Index maintenance ---
+
+    def _index(self, key, row):
+        for field, keys_of in INDEXED_FIELDS.items():
+            for value in keys_of(row):
+                self.indexes[field][value].add(key)
+
+    def _unindex(self, key, row):
+        for field, keys_of in INDEXED_FIELDS.items():
+            index = self.indexes[field]
+            for value in keys_of(row):
+                index[value].discard(key)
+                if not index[value]:
+                    del index[value]
+
+    def _delta(self, added, changed, removed):
+        if not (added or changed or removed):
+            return None
+        self.seq += 1
+        self._query_cache.clear()
+        return {"seq": self.seq, "data": {
+            "added": added, "changed": changed,
+            "removed": [{"Symbol": symbol, "TF": tf} for symbol, tf in removed],
+        }}
+
+    # --- Mutations ---
+
+    def upsert(self, row):
+        """Adds or updates a single row, as results stream in during a scan."""
+        key = result_key(row)
+        previous = self.rows.get(key)
+        if previous == row:
+            return None
+        if previous is None:
+            self.position[key] = len(self.position)
+        else:
+            self._unindex(key, previous)
+        self.rows[key] = row
+        self._index(key, row)
+        return self._delta([row] if previous is None else [], [] if previous is None else [row], [])
+
+    def remove(self, symbol, timeframe):
+        """Removes a row whose signal has cleared."""
+        key = (symbol, timeframe)
+        previous = self.rows.pop(key, None)
+        if previous is None:
+            return None
+        self.position.pop(key, None)
+        self._unindex(key, previous)
+        return self._delta([], [], [key])
+
+    def replace(self, rows):
+        """Makes `rows` the complete result set (end of a scan); rows no longer present are removed."""
+        new_rows = {result_key(row): row for row in rows}
+        added = [row for key, row in new_rows.items() if key not in self.rows]
+        changed = [row for key, row in new_rows.items() if key in self.rows and self.rows[key] != row]
+        removed = [key for key in self.rows if key not in new_rows]
+        self.rows = new_rows
+        self.position = {key: i for i, key in enumerate(new_rows)}
+        self.indexes = {field: defaultdict(set) for field in INDEXED_FIELDS}
+        for key, row in new_rows.items():
+            self._index(key, row)
+        return self._delta(added, changed, removed)
+
+    # --- Queries ---
+
+    def facets(self):
+        """Distinct filter values currently present, for populating filter controls."""
+        return {
+            "signals": sorted({row['Signal'].split('(')[0].strip() for row in self.rows.values()}),
+            "profiles": sorted(self.indexes['profile']),
+            "timeframes": sorted(self.indexes['tf'], key=lambda tf: TF_ORDER.get(tf, len(TF_ORDER))),
+        }
+
+    def query(self, filters=None, sort=None, descending=False, offset=0, limit=None):
+        """
+        Rows matching every given filter (field -> value, fields as in INDEXED_FIELDS), optionally sorted
+        by one of SORTABLE_FIELDS, and paginated. Returns (total matching rows, page of rows).
+        """
+        filters = {field: value for field, value in (filters or {}).items() if value}
+        cache_key = (tuple(sorted(filters.items())), sort, descending, offset, limit)
+        cached = self._query_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        if filters:
+            # Intersect from the smallest candidate set.
+            candidates = sorted((self.indexes[field].get(value, set()) for field, value in filters.items()), key=len)
+            keys = set(candidates[0]).intersection(*candidates[1:])
+            matched = [self.rows[key] for key in sorted(keys, key=self.position.get)]
+        else:
+            matched = list(self.rows.values())
+        if sort:
+            matched.sort(key=_sort_value(sort), reverse=descending)
+
+        page = matched[offset:offset + limit] if limit is not None else matched[offset:]
+        if len(self._query_cache) >= QUERY_CACHE_SIZE:
+            self._query_cache.clear()
+        self._query_cache[cache_key] = (len(matched), page)
+        return len(matched), page
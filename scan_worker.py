@@ -0,0 +1,115 @@
+"""
+Scan worker: claims shards of queued scans from the shared scan queue, scans them and stores the results.
+Run as many as the machine and the API rate limit allow, on this host or on others sharing the queue
+database (defaults.scan.cluster):
+
+    python scan_worker.py
+    python scan_worker.py --once    # exit as soon as the queue is empty
+    python scan_worker.py --name w2 # a second worker on this host: each name keeps its own indicator state
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+from your_logic.api_manager import AlpacaManager
+from your_logic.config_loader import get_config
+from your_logic.scan_queue import ScanQueue
+from screener_engine import run_screener_instance, shutdown_compute_pool
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def worker_state_path(state_path, name):
+    """The incremental indicator state file of the worker called `name`, e.g. data/indicator_state.<name>.pkl."""
+    root, ext = os.path.splitext(state_path)
+    return f"{root}.{name}{ext}"
+
+async def scan_shard(queue, api, worker_id, claim, cluster_cfg, state_path=None):
+    """Scans one claimed shard, renewing its lease until the results are stored; gives it up if the lease is lost."""
+    scan_id, shard, symbol_config = claim
+    lease_seconds = cluster_cfg.get('lease_seconds', 300)
+    progress = {"value": 0.0}
+    lease_lost = False
+
+    async def on_progress(value, message):
+        progress["value"] = value
+
+    scan = asyncio.create_task(run_screener_instance(api, symbol_config, on_progress, state_path=state_path))
+
+    async def keep_lease():
+        nonlocal lease_lost
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            if not await asyncio.to_thread(queue.heartbeat, scan_id, shard, worker_id, lease_seconds, progress["value"]):
+                # The shard was handed to another worker (e.g. this one stalled past its lease); stop duplicating its work.
+                logging.warning(f"Lost the lease on scan {scan_id} shard {shard}; abandoning it to the worker that has it.")
+                lease_lost = True
+                scan.cancel()
+                return
+
+    logging.info(f"Scanning scan {scan_id} shard {shard} ({len(symbol_config)} symbols).")
+    heartbeat = asyncio.create_task(keep_lease())
+    try:
+        results = await scan
+    except asyncio.CancelledError:
+        if lease_lost:
+            return
+        raise
+    except Exception as e:
+        logging.error(f"Scan {scan_id} shard {shard} failed: {e}", exc_info=True)
+        await asyncio.to_thread(queue.release, scan_id, shard, worker_id, e)
+        return
+    finally:
+        heartbeat.cancel()
+        scan.cancel()
+    if await asyncio.to_thread(queue.complete, scan_id, shard, worker_id, results):
+        logging.info(f"Finished scan {scan_id} shard {shard}: {len(results)} signals.")
+    else:
+        logging.warning(f"Discarded the results of scan {scan_id} shard {shard}: its lease was lost.")
+
+async def run_worker(api, once=False, name=None):
+    config = get_config()
+    cluster_cfg = config.scan.get('cluster', {})
+    queue = ScanQueue(cluster_cfg.get('db_path', 'data/scan_state.db'))
+    name = name or socket.gethostname()
+    worker_id = f"{name}:{os.getpid()}"
+    # Workers scan different shards each time, so each keeps its own state rather than overwriting a shared file.
+    state_path = worker_state_path(config.scan.get('indicator_state_path', 'data/indicator_state.pkl'), name)
+    logging.info(f"Scan worker {worker_id} polling {queue.path}.")
+    while True:
+        cluster_cfg = get_config().scan.get('cluster', {})
+        claim = await asyncio.to_thread(queue.claim, worker_id, cluster_cfg.get('lease_seconds', 300),
+                                        cluster_cfg.get('max_attempts', 3))
+        if claim is not None:
+            await scan_shard(queue, api, worker_id, claim, cluster_cfg, state_path)
+        elif once:
+            return
+        else:
+            await asyncio.sleep(cluster_cfg.get('poll_seconds', 1.0))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--once', action='store_true', help="Exit when no shard is waiting")
+    parser.add_argument('--name', help="Worker name, unique among the workers sharing the queue (default: the host name)")
+    args = parser.parse_args()
+
+    api_manager = AlpacaManager()
+    api_manager.initialize()
+    api = api_manager.get_market_data_api(get_config().scan.get('market_data_client', 'async'))
+    if not api:
+        raise SystemExit("Alpaca API is not available; check the credentials in .env")
+
+    async def work():
+        try:
+            await run_worker(api, args.once, args.name)
+        finally:
+            await api_manager.close_bars_client()
+    try:
+        asyncio.run(work())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_compute_pool()
+
+if __name__ == '__main__':
+    main()
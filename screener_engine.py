@@ -2,10 +2,22 @@ import pandas as pd
 from datetime import datetime, timedelta
 import logging
 import asyncio
-from your_logic.config_loader import load_config
-from your_logic.data_fetcher import fetch_data
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from your_logic.bar_block import BarBlock
+from your_logic.bar_schedule import MarketCalendar
+from your_logic.bar_store import BarStore
+from your_logic.config_loader import DEFAULT_CONFIG_PATH, get_config
+from your_logic.data_fetcher import TIMEFRAME_MINUTES, fetch_data_batch, lookback_days
 from your_logic.indicator_calculator import calculate_all_indicators
-from your_logic.signal_generator import generate_signals
+from your_logic.incremental_indicators import IncrementalIndicatorEngine
+from your_logic.panel_indicators import calculate_panel_indicators
+from your_logic.pattern_calculator import pattern_names
+from your_logic.request_scheduler import configure_requests
+from your_logic.resampler import resample_ohlcv
+from your_logic.scan_metrics import ANALYSIS_ERRORS, CACHE_LOOKUPS, PREFILTER_SYMBOLS, count, recording, replay, timed
+from your_logic.universe import assign_profiles, daily_stats, prefilter_symbols
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -29,56 +41,524 @@ def calculate_sl_tp(row, strategy_cfg, risk_cfg, timeframe):
 
     return sl_price, tp_price
 
-async def run_screener_instance(api, symbol_config, update_progress_callback=None):
-    """Runs a single, full market scan instance with progress reporting."""
+def _number(value, digits=2):
+    """JSON-safe rounded number; NaN or missing values become None."""
+    return None if value is None or pd.isna(value) else round(float(value), digits)
+
+def evaluate_latest(df_with_indicators, config, symbol, profile, timeframe):
+    """Evaluates the compiled strategy on the latest candle and returns a result row if it is a buy, else None."""
+    resolved = config.resolve(profile, timeframe)
+    if resolved is None:
+        logging.error(f"Strategy not defined for profile '{profile}' on timeframe '{timeframe}'. Skipping.")
+        return None
+    strategy = resolved.strategy
+    if not strategy.evaluate_latest(df_with_indicators):
+        return None
+
+    latest_candle = df_with_indicators.iloc[-1]
+    risk_cfg = config.raw['defaults']['risk_management']
+    sl, tp = calculate_sl_tp(latest_candle, strategy.config, risk_cfg, timeframe)
+    candle = ", ".join(pattern_names(int(latest_candle.get('pattern_mask', 0)))) or "-"
+    # Numbers stay numeric so results can be sorted and filtered; the dashboard formats them.
+    return {
+        "Symbol": symbol, "TF": timeframe, "Price": _number(latest_candle['close']),
+        "Volume": _number(latest_candle['volume'], 0), "VWMA": _number(latest_candle.get('vwma_slow')),
+        "Stoch_k": _number(latest_candle.get('stoch_k')), "Stoch_d": _number(latest_candle.get('stoch_d')),
+        "Signal": strategy.signal_name, "Candle": candle, "SL": _number(sl) if sl else None,
+        "TP": _number(tp) if tp else None, "Profile": profile
+    }
+
+def analyze_timeframe(data, config, symbol, profile, timeframe, indicator_engine=None):
+    """
+    Runs indicators and signal generation for one (symbol, timeframe) and returns a result row or None.
+    Indicator columns are added to `data` itself, so pass a frame nothing else uses (e.g. from BarBlock.frame()).
+    """
+    params = config.indicators.get(timeframe)
+    with timed('indicators', timeframe, symbol):
+        incremental = indicator_engine is not None and indicator_engine.supports(data, config.raw, timeframe, params)
+        if indicator_engine is not None:
+            # A hit resumes from saved state; a miss computes the series from its first bar.
+            hit = incremental and (symbol, timeframe) in indicator_engine.states
+            count(CACHE_LOOKUPS, 'incremental_hits' if hit else 'incremental_misses',
+                  cache='incremental', result='hit' if hit else 'miss')
+        if incremental:
+            # Only bars not seen by a previous scan are processed; the frame holds just those bars.
+            df_with_indicators = indicator_engine.update((symbol, timeframe), data, config.raw, timeframe, params)
+        else:
+            df_with_indicators = calculate_all_indicators(data, config.raw, timeframe, profile, params)
+    with timed('signals', timeframe, symbol):
+        return evaluate_latest(df_with_indicators, config, symbol, profile, timeframe)
+
+def derive_timeframe(base_block, base_tf, timeframe, config, cutoff=None):
+    """
+    A fresh frame of the newest lookback bars of `timeframe`, resampled from the base block when it is
+    not the base timeframe itself. Only the base bars those lookback bars are built from are resampled.
+    With a `cutoff`, bars of `timeframe` starting at or after it (still forming) are left out.
+    """
+    bars = config.lookbacks.get(timeframe)
+    if cutoff is not None:
+        # The cutoff is a bucket boundary of `timeframe`, so base bars before it only make closed bars.
+        base_block = base_block.before(cutoff)
+    if timeframe == base_tf:
+        return base_block.tail(bars).frame()
+    ratio = TIMEFRAME_MINUTES[timeframe] // TIMEFRAME_MINUTES[base_tf]
+    # One extra bar's worth, as the oldest resampled bucket may be partial; it is trimmed away below.
+    source = base_block.tail(None if bars is None else (bars + 1) * ratio)
+    resampled = resample_ohlcv(source.frame(), timeframe)
+    if resampled is None:
+        return None
+    return BarBlock.from_frame(resampled, bars, base_block.prices.dtype).frame()
+
+def analyze_base_frame(base_block, base_tf, timeframes, config, symbol, profile, indicator_engine=None, cutoffs=None):
+    """
+    Derives every timeframe built from one base BarBlock and analyzes each; returns [(timeframe, result), ...].
+    `cutoffs` ({timeframe: cutoff}, see derive_timeframe) limits the analysis to closed bars.
+    """
+    outcomes = []
+    cutoffs = cutoffs or {}
+    for timeframe in timeframes:
+        try:
+            if timeframe == base_tf:
+                data = derive_timeframe(base_block, base_tf, timeframe, config, cutoffs.get(timeframe))
+            else:
+                with timed('resample', timeframe, symbol):
+                    data = derive_timeframe(base_block, base_tf, timeframe, config, cutoffs.get(timeframe))
+            if data is None or data.empty:
+                outcomes.append((timeframe, None))
+                continue
+            outcomes.append((timeframe, analyze_timeframe(data, config, symbol, profile, timeframe, indicator_engine)))
+        except Exception as e:
+            logging.error(f"Error processing {symbol} on {timeframe}: {e}")
+            count(ANALYSIS_ERRORS, 'analysis_errors', timeframe=timeframe)
+            outcomes.append((timeframe, None))
+    return outcomes
+
+def analyze_chunk_panel(blocks, base_tf, timeframes, config, symbol_config, cutoffs=None):
+    """
+    Panel-mode counterpart of analyze_base_frame: each timeframe's indicators are computed for the
+    whole chunk of symbols in one vectorized pass. Returns {symbol: [(timeframe, result), ...]}.
+    """
+    outcomes = {symbol: [] for symbol in blocks}
+    cutoffs = cutoffs or {}
+    for timeframe in timeframes:
+        cutoff = cutoffs.get(timeframe)
+        try:
+            if timeframe == base_tf:
+                tf_frames = {s: derive_timeframe(block, base_tf, timeframe, config, cutoff) for s, block in blocks.items()}
+            else:
+                with timed('resample', timeframe):
+                    tf_frames = {s: derive_timeframe(block, base_tf, timeframe, config, cutoff) for s, block in blocks.items()}
+            with timed('indicators', timeframe):
+                with_indicators = calculate_panel_indicators(tf_frames, config.raw, timeframe, config.indicators.get(timeframe))
+        except Exception as e:
+            logging.error(f"Error computing {timeframe} panel for {', '.join(blocks)}: {e}")
+            count(ANALYSIS_ERRORS, 'analysis_errors', len(blocks), timeframe=timeframe)
+            with_indicators = {}
+        for symbol in blocks:
+            result = None
+            if symbol in with_indicators:
+                try:
+                    with timed('signals', timeframe, symbol):
+                        result = evaluate_latest(with_indicators[symbol], config, symbol, symbol_config[symbol], timeframe)
+                except Exception as e:
+                    logging.error(f"Error processing {symbol} on {timeframe}: {e}")
+                    count(ANALYSIS_ERRORS, 'analysis_errors', timeframe=timeframe)
+            outcomes[symbol].append((timeframe, result))
+    return outcomes
+
+# --- Process-pool compute stage ---
+# Work units carry only a symbol, its profile and its base BarBlock; each worker receives the config
+# once, through the pool initializer. pack_frame/unpack_frame serve the live screener's bar buffers.
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+_worker_config = None
+
+def pack_frame(df):
+    """Compact work-unit form of a bar frame: int64 UTC nanosecond timestamps and a float64 OHLCV block."""
+    return df.index.asi8, df[OHLCV_COLUMNS].to_numpy(dtype='f8')
+
+def unpack_frame(timestamps, values):
+    return pd.DataFrame(values, columns=OHLCV_COLUMNS,
+                        index=pd.DatetimeIndex(timestamps, tz='UTC', name='timestamp'))
+
+def _init_compute_worker(config):
+    global _worker_config
+    _worker_config = config
+
+def _analyze_units(units, base_tf, timeframes, indicator_mode, cutoffs=None):
+    """
+    Worker entry point: analyzes a chunk of (symbol, profile, BarBlock) units. Returns the
+    [(symbol, outcomes), ...] list plus the metrics recorded meanwhile, which the parent replays.
+    """
+    blocks = {symbol: block for symbol, _, block in units}
+    symbol_config = {symbol: profile for symbol, profile, _ in units}
+    with recording() as records:
+        if indicator_mode == 'panel':
+            outcomes = list(analyze_chunk_panel(blocks, base_tf, timeframes, _worker_config, symbol_config, cutoffs).items())
+        else:
+            outcomes = [(symbol, analyze_base_frame(blocks[symbol], base_tf, timeframes, _worker_config, symbol,
+                                                    symbol_config[symbol], cutoffs=cutoffs)) for symbol in blocks]
+    return outcomes, records
+
+class ComputePool:
+    """Process pool for indicator and signal work, sized to the machine by default."""
+    def __init__(self, config, max_workers=None, chunk_size=8):
+        self.config = config
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = max(1, int(chunk_size))
+        # 'spawn' avoids forking a process that already runs event-loop and fetch threads.
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=_init_compute_worker, initargs=(config,))
+        logging.info(f"Started compute pool with {self.max_workers} worker processes.")
+
+    async def analyze(self, blocks, symbol_config, base_tf, timeframes, indicator_mode, cutoffs=None):
+        """Ships the bar blocks to the workers in chunks and yields (symbol, outcomes) as each chunk finishes."""
+        loop = asyncio.get_running_loop()
+        units = [(symbol, symbol_config[symbol], block) for symbol, block in blocks.items()]
+        futures = [
+            loop.run_in_executor(self.executor, _analyze_units, units[i:i + self.chunk_size], base_tf, timeframes, indicator_mode, cutoffs)
+            for i in range(0, len(units), self.chunk_size)
+        ]
+        for completed in asyncio.as_completed(futures):
+            chunk_outcomes, records = await completed
+            replay(records)
+            for symbol, outcomes in chunk_outcomes:
+                yield symbol, outcomes
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+_compute_pool = None
+
+def get_compute_pool(config, max_workers=None, chunk_size=8):
+    """Returns the shared compute pool, restarting it when the config is reloaded or pool settings change."""
+    global _compute_pool
+    max_workers = max_workers or os.cpu_count() or 1
+    if _compute_pool is not None and (_compute_pool.config is not config or _compute_pool.max_workers != max_workers):
+        _compute_pool.shutdown()
+        _compute_pool = None
+    if _compute_pool is None:
+        _compute_pool = ComputePool(config, max_workers, chunk_size)
+    _compute_pool.chunk_size = max(1, int(chunk_size))
+    return _compute_pool
+
+def shutdown_compute_pool():
+    global _compute_pool
+    if _compute_pool is not None:
+        _compute_pool.shutdown()
+        _compute_pool = None
+
+class ScanContext:
+    """Everything a scan task needs besides its own chunk and timeframes."""
+    def __init__(self, api, config, symbol_config, start_date, end_date,
+                 bar_store=None, indicator_mode='batch', indicator_engine=None, compute_pool=None,
+                 start_dates=None, bar_dtype='float32', cutoffs=None):
+        self.api = api
+        self.config = config
+        self.symbol_config = symbol_config
+        self.start_date = start_date
+        self.end_date = end_date
+        self.bar_store = bar_store
+        self.indicator_mode = indicator_mode
+        self.indicator_engine = indicator_engine
+        self.compute_pool = compute_pool
+        # Per base timeframe; start_date (the longest window) covers the rest.
+        self.start_dates = start_dates or {}
+        self.bar_dtype = bar_dtype
+        # {timeframe: cutoff} in bar-close scans, which evaluate closed bars only; None evaluates the newest bar.
+        self.cutoffs = cutoffs
+
+async def _fetch_chunk_base(ctx, symbols, base_tf):
+    """One batched request for a chunk of symbols, admitted by the shared request scheduler; {} if it fails."""
+    try:
+        return await fetch_data_batch(ctx.api, symbols, ctx.start_dates.get(base_tf, ctx.start_date), ctx.end_date, interval=base_tf,
+                                      bar_store=ctx.bar_store, chunk_size=len(symbols))
+    except Exception as e:
+        logging.error(f"Error fetching {base_tf} data for {', '.join(symbols)}: {e}")
+        return {}
+
+async def _scan_chunk_base(ctx, symbols, base_tf, timeframes, on_symbol_done, frames=None):
+    """
+    Fetches one base timeframe for a chunk of symbols in a single batched request through the
+    request scheduler (unless its `frames` were already fetched), then derives and analyzes each
+    symbol's timeframes in worker threads. Only the base bars the timeframes' lookbacks need are
+    kept, as compact BarBlocks.
+    """
+    missing = symbols if frames is None else [symbol for symbol in symbols if symbol not in frames]
+    if missing:
+        fetched = await _fetch_chunk_base(ctx, missing, base_tf)
+        frames = fetched if frames is None else {**frames, **fetched}
+    # One spare bar per timeframe in bar-close scans, whose still-forming bar is dropped.
+    retention = base_retention(base_tf, timeframes, ctx.config.lookbacks, 1 if ctx.cutoffs else 0)
+    blocks = {symbol: BarBlock.from_frame(df, retention, ctx.bar_dtype) for symbol, df in frames.items() if not df.empty}
+    del frames
+
+    for symbol in symbols:
+        if symbol not in blocks:
+            await on_symbol_done(symbol, [(tf, None) for tf in timeframes], evaluated=False)
+
+    # Compute runs off the loop so it overlaps with the fetches still in flight.
+    if ctx.compute_pool is not None:
+        if blocks:
+            async for symbol, outcomes in ctx.compute_pool.analyze(blocks, ctx.symbol_config, base_tf, timeframes, ctx.indicator_mode,
+                                                                   ctx.cutoffs):
+                await on_symbol_done(symbol, outcomes)
+        return
+
+    if ctx.indicator_mode == 'panel':
+        if blocks:
+            panel_outcomes = await asyncio.to_thread(analyze_chunk_panel, blocks, base_tf, timeframes, ctx.config, ctx.symbol_config,
+                                                     ctx.cutoffs)
+            for symbol, outcomes in panel_outcomes.items():
+                await on_symbol_done(symbol, outcomes)
+        return
+
+    async def analyze_symbol(symbol):
+        return symbol, await asyncio.to_thread(analyze_base_frame, blocks[symbol], base_tf, timeframes, ctx.config,
+                                               symbol, ctx.symbol_config[symbol], ctx.indicator_engine, ctx.cutoffs)
+
+    for completed in asyncio.as_completed([analyze_symbol(symbol) for symbol in blocks]):
+        symbol, outcomes = await completed
+        await on_symbol_done(symbol, outcomes)
+
+_incremental_engine = None
+
+def get_incremental_engine(state_path):
+    """Returns the process-wide incremental indicator engine, restoring persisted state on first use."""
+    global _incremental_engine
+    if _incremental_engine is None:
+        _incremental_engine = IncrementalIndicatorEngine.load(state_path)
+    return _incremental_engine
+
+# --- Phase 1: universe prefilter ---
+PREFILTER_TIMEFRAME = '1d'
+
+async def prefilter_universe(ctx, symbol_config):
+    """
+    Phase 1 of a scan: fetches daily bars for the whole universe in batched requests, gives symbols
+    listed without a profile one from the universe's profile rules, and, when the prefilter is enabled,
+    drops symbols outside its price band, below its liquidity floor or (optionally) below their daily
+    slow VWMA. Symbols that got no daily bars cannot be judged and go on unfiltered. Returns
+    (symbol_config, daily frames) of the symbols that go on to the full scan, and the symbols that
+    got no daily bars.
+    """
+    scan_cfg = ctx.config.scan
+    prefilter_cfg = scan_cfg.get('prefilter', {})
+    batch_size = max(1, int(scan_cfg.get('batch_size', 50)))
+    symbols = list(symbol_config)
+    frames = {}
+    for chunk_frames in await asyncio.gather(*(_fetch_chunk_base(ctx, symbols[i:i + batch_size], PREFILTER_TIMEFRAME)
+                                               for i in range(0, len(symbols), batch_size))):
+        frames.update(chunk_frames)
+
+    params = ctx.config.indicators.get(PREFILTER_TIMEFRAME)
+    stats = daily_stats(frames, params.slow_vwma if params else 150, prefilter_cfg.get('liquidity_days', 20),
+                        params.atr_period if params else 14)
+    symbol_config = assign_profiles(symbol_config, stats, scan_cfg.get('universe', {}).get('profile_rules', []))
+    candidates = stats.loc[stats.index.intersection(list(symbol_config))]
+    if prefilter_cfg.get('enabled', False):
+        passed, rejected = prefilter_symbols(candidates, prefilter_cfg)
+    else:
+        passed, rejected = list(candidates.index), {}
+    unfiltered = [symbol for symbol in symbol_config if symbol not in stats.index]
+    missing = [symbol for symbol in symbols if symbol not in stats.index]
+
+    passed = set(passed).union(unfiltered)
+    survivors = {symbol: profile for symbol, profile in symbol_config.items() if symbol in passed}
+    count(PREFILTER_SYMBOLS, 'prefilter_passed', len(survivors) - len(unfiltered), result='passed')
+    count(PREFILTER_SYMBOLS, 'prefilter_unfiltered', len(unfiltered), result='no_data')
+    for reason, rejected_count in rejected.items():
+        count(PREFILTER_SYMBOLS, f'prefilter_rejected_{reason}', rejected_count, result=f'rejected_{reason}')
+    logging.info(f"Prefilter: {len(survivors)} of {len(symbols)} symbols go on to the full scan, {len(unfiltered)} of them "
+                 f"without daily bars (rejected: {', '.join(f'{reason} {n}' for reason, n in rejected.items()) or 'none'}).")
+    return survivors, {symbol: frames[symbol] for symbol in survivors if symbol in frames}, missing
+
+async def _prefilter(ctx, symbol_config, evaluations=None, daily_key=None):
+    """
+    prefilter_universe, reusing the outcome of a bar-close scan's previous prefilter while the daily
+    bar it was based on is unchanged; only symbols that got no daily bars then are prefiltered again.
+    Returns (symbol_config, daily frames) like prefilter_universe.
+    """
+    cached = evaluations.prefilter if evaluations is not None else None
+    if cached is None or cached[0] != daily_key or cached[1] != symbol_config:
+        survivors, frames, missing = await prefilter_universe(ctx, symbol_config)
+    else:
+        survivors, missing, frames = cached[2], cached[3], {}
+        if missing:
+            # They went on unfiltered last time; now they are judged like the rest if they have daily bars.
+            judged = {symbol: profile for symbol, profile in survivors.items() if symbol not in missing}
+            retried, frames, missing = await prefilter_universe(ctx, {symbol: symbol_config[symbol] for symbol in missing})
+            merged = {**judged, **retried}
+            survivors = {symbol: merged[symbol] for symbol in symbol_config if symbol in merged}
+    if evaluations is not None:
+        evaluations.prefilter = (daily_key, dict(symbol_config), survivors, missing)
+    return survivors, frames
+
+def plan_base_timeframes(timeframes_to_scan, resample_from):
+    """Groups the timeframes to scan by the base timeframe actually requested from the API."""
+    plan = {}
+    for timeframe in timeframes_to_scan:
+        plan.setdefault(resample_from.get(timeframe, timeframe), []).append(timeframe)
+    return plan
+
+# --- Lookback: how much history each base timeframe needs ---
+
+def base_retention(base_tf, timeframes, lookbacks, spare=0):
+    """
+    Base bars to keep so every timeframe built from them still gets its full lookback, plus `spare`
+    bars of each timeframe; None keeps all. A derived bar never spans more base bars than the ratio
+    of their lengths.
+    """
+    needed = 0
+    for timeframe in timeframes:
+        bars = lookbacks.get(timeframe)
+        if bars is None:
+            return None
+        bars += spare
+        ratio = TIMEFRAME_MINUTES[timeframe] // TIMEFRAME_MINUTES[base_tf]
+        needed = max(needed, bars if timeframe == base_tf else (bars + 1) * ratio)
+    return needed
+
+def fetch_windows(plan, lookbacks, history_days):
+    """Calendar days to request per base timeframe: enough for each derived timeframe's lookback, at most history_days."""
+    return {
+        base_tf: min(history_days, max(lookback_days(tf, lookbacks[tf]) if lookbacks.get(tf) else history_days for tf in timeframes))
+        for base_tf, timeframes in plan.items()
+    }
+
+async def run_screener_instance(api, symbol_config, update_progress_callback=None, result_callback=None, max_concurrency=None,
+                                config_path=DEFAULT_CONFIG_PATH, state_path=None, evaluations=None):
+    """
+    Runs a single, full market scan instance with progress reporting.
+    Only base timeframes are requested from the API (higher ones are resampled locally), in batched
+    requests of `batch_size` symbols. Every (chunk, base timeframe) pair is fetched and analyzed as an
+    independent task; the request scheduler keeps at most `max_concurrency` requests in flight within
+    scan.rate_limit. Progress and results are reported as each symbol's timeframes complete.
+    `state_path` overrides scan.indicator_state_path.
+
+    With an EvaluationCache as `evaluations` this is a bar-close scan: only closed bars are evaluated,
+    only (symbol, timeframe) pairs with a bar that closed since their last evaluation are fetched and
+    analyzed, and the other pairs' results are returned from the cache.
+    """
     logging.info("Starting a new screener run...")
-    config = load_config('your_logic/stock_signals_v1.yml')
+    # Parsed and validated once; re-read only when the file changes on disk.
+    config = get_config(config_path)
     if not config:
         return []
 
-    timeframes_to_scan = config['defaults']['timeframes_to_test']
+    timeframes_to_scan = config.timeframes
+    scan_cfg = config.scan
+    max_concurrency = max_concurrency or scan_cfg.get('max_concurrent_requests', 8)
+    configure_requests(**scan_cfg.get('rate_limit', {}), max_in_flight=max_concurrency)
+    store_cfg = scan_cfg.get('bar_store', {})
+    bar_store = None
+    if store_cfg.get('enabled', False):
+        bar_store = BarStore(store_cfg.get('path', 'data/bars'), store_cfg.get('retention_days', 120))
+
+    state_path = state_path or scan_cfg.get('indicator_state_path', 'data/indicator_state.pkl')
+    indicator_mode = scan_cfg.get('indicator_mode', 'batch')
+    indicator_engine = None
+    if indicator_mode == 'incremental':
+        indicator_engine = get_incremental_engine(state_path)
+
+    compute_pool = None
+    if scan_cfg.get('compute_executor', 'thread') == 'process':
+        if indicator_engine is not None:
+            # Incremental state lives in this process, so that mode keeps computing on threads.
+            logging.warning("compute_executor 'process' is not used with indicator_mode 'incremental'; computing on threads.")
+        else:
+            compute_pool = get_compute_pool(config, scan_cfg.get('compute_workers') or None, scan_cfg.get('compute_chunk_size', 8))
+
+    # Each base timeframe is requested only as far back as its timeframes' lookbacks reach.
+    base_plan = plan_base_timeframes(timeframes_to_scan, scan_cfg.get('resample_from', {}))
+    history_days = scan_cfg.get('history_days', 90)
+    now = datetime.now()
+    start_date = (now - timedelta(days=history_days)).strftime('%Y-%m-%d')
+    start_dates = {base_tf: (now - timedelta(days=days)).strftime('%Y-%m-%d')
+                   for base_tf, days in fetch_windows(base_plan, config.lookbacks, history_days).items()}
+    end_date = now.strftime('%Y-%m-%d')
+
+    # Bar-close scans: per timeframe, the newest closed bar (key) and where the still-forming bars start (cutoff).
+    keys, cutoffs = {}, None
+    if evaluations is not None:
+        evaluations.bind(config)
+        schedule_cfg = scan_cfg.get('schedule', {})
+        calendar = MarketCalendar.from_config(schedule_cfg)
+        moment = pd.Timestamp.now(tz='UTC') - pd.Timedelta(seconds=schedule_cfg.get('settle_seconds', 10))
+        cutoffs = {}
+        for timeframe in {*timeframes_to_scan, PREFILTER_TIMEFRAME}:
+            keys[timeframe], cutoffs[timeframe] = calendar.closed_bar(timeframe, moment)
+    ctx = ScanContext(api, config, symbol_config, start_date, end_date,
+                      bar_store, indicator_mode, indicator_engine, compute_pool,
+                      start_dates, scan_cfg.get('bar_dtype', 'float32'), cutoffs)
+
+    # --- Phase 1: a cheap daily pass decides which symbols get the multi-timeframe scan ---
+    daily_frames = {}
+    if scan_cfg.get('prefilter', {}).get('enabled', False) or None in symbol_config.values():
+        with timed('prefilter'):
+            symbol_config, daily_frames = await _prefilter(ctx, symbol_config, evaluations, keys.get(PREFILTER_TIMEFRAME))
+        ctx.symbol_config = symbol_config
+        if update_progress_callback:
+            await update_progress_callback(0, f"Prefilter passed {len(symbol_config)} symbols; scanning...")
+
     all_results = []
-    total_symbols = len(symbol_config)
+    due = {symbol: set(timeframes_to_scan) for symbol in symbol_config}
+    if evaluations is not None:
+        due, kept = evaluations.plan(symbol_config, timeframes_to_scan, keys)
+        all_results.extend(kept)
+        logging.info(f"Bar-close scan: {sum(map(len, due.values()))} of {len(symbol_config) * len(timeframes_to_scan)} "
+                     f"symbol/timeframe pairs have a newly closed bar; {len(kept)} signals kept from earlier scans.")
+    total_pairs = sum(map(len, due.values()))
     processed_count = 0
 
-    for symbol, profile in symbol_config.items():
-        try:
-            # Fetch and process data for the symbol
-            all_tf_data = {}
-            for tf in timeframes_to_scan:
-                start_date = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
-                end_date = datetime.now().strftime('%Y-%m-%d')
-                data = await fetch_data(api, symbol, start_date, end_date, interval=tf)
-                if data is not None and not data.empty:
-                    all_tf_data[tf] = data
-            
-            for timeframe in timeframes_to_scan:
-                if timeframe not in all_tf_data: continue
-                
-                df_with_indicators = calculate_all_indicators(all_tf_data[timeframe].copy(), config, timeframe, profile)
-                data_for_signal_gen = {tf: df_with_indicators for tf in [timeframe]}
-                df_with_signals = generate_signals(data_for_signal_gen, config, timeframe, profile)
-                latest_candle = df_with_signals.iloc[-1]
-                
-                if "Buy" in latest_candle['signal']:
-                    strategy_name = config['asset_profiles'][profile][timeframe]['strategy']
-                    strategy_cfg = config['defaults']['strategies'][strategy_name]
-                    risk_cfg = config['defaults']['risk_management']
-                    sl, tp = calculate_sl_tp(latest_candle, strategy_cfg, risk_cfg, timeframe)
-                    all_results.append({
-                        "Symbol": symbol, "TF": timeframe, "Price": f"{latest_candle['close']:.2f}",
-                        "Volume": f"{latest_candle['volume']:.0f}", "VWMA": f"{latest_candle.get('vwma_slow', 0):.2f}",
-                        "Stoch_k": f"{latest_candle.get('stoch_k', 0):.2f}", "Stoch_d": f"{latest_candle.get('stoch_d', 0):.2f}",
-                        "Signal": latest_candle['signal'], "Candle": "Pattern", "SL": f"{sl:.2f}" if sl else "N/A",
-                        "TP": f"{tp:.2f}" if tp else "N/A", "Profile": profile
-                    })
-        except Exception as e:
-            logging.error(f"Error processing symbol {symbol}: {e}")
-        
-        processed_count += 1
+    async def on_symbol_done(symbol, outcomes, evaluated=True):
+        nonlocal processed_count
+        for timeframe, result in outcomes:
+            # Pairs without data were not evaluated; they are tried again by the next scan.
+            if evaluations is not None and evaluated:
+                evaluations.record(symbol, timeframe, symbol_config[symbol], keys[timeframe], result)
+            if result:
+                all_results.append(result)
+                if result_callback:
+                    await result_callback(result)
+
+        processed_count += len(outcomes)
         if update_progress_callback:
-            progress = (processed_count / total_symbols) * 100
-            await update_progress_callback(progress, f"Scanning {symbol}...")
+            progress = (processed_count / total_pairs) * 100
+            await update_progress_callback(progress, f"Scanned {symbol} {', '.join(tf for tf, _ in outcomes)}...")
+
+    batch_size = max(1, int(scan_cfg.get('batch_size', 50)))
+    work = []
+    for base_tf, tfs in base_plan.items():
+        # Symbols due on the same timeframes of a base timeframe share its batched requests.
+        groups = {}
+        for symbol in symbol_config:
+            due_tfs = tuple(tf for tf in tfs if tf in due.get(symbol, ()))
+            if due_tfs:
+                groups.setdefault(due_tfs, []).append(symbol)
+        for due_tfs, group in groups.items():
+            work += [(i, base_tf, list(due_tfs), group[i:i + batch_size]) for i in range(0, len(group), batch_size)]
+    # Chunk by chunk across base timeframes, so the first symbols finish first.
+    work.sort(key=lambda item: item[0])
+
+    def prefetched(chunk, base_tf):
+        """Daily bars fetched by the prefilter, reused rather than requested again."""
+        if base_tf != PREFILTER_TIMEFRAME or not daily_frames:
+            return None
+        return {symbol: daily_frames[symbol] for symbol in chunk if symbol in daily_frames}
+
+    await asyncio.gather(*(_scan_chunk_base(ctx, chunk, base_tf, tfs, on_symbol_done, prefetched(chunk, base_tf))
+                           for _, base_tf, tfs, chunk in work))
+
+    if indicator_engine is not None:
+        try:
+            await asyncio.to_thread(indicator_engine.save, state_path)
+        except OSError as e:
+            logging.warning(f"Could not persist incremental indicator state: {e}")
+
+    # Keep the familiar symbol-then-timeframe ordering regardless of completion order.
+    symbol_order = {symbol: i for i, symbol in enumerate(symbol_config)}
+    tf_order = {tf: i for i, tf in enumerate(timeframes_to_scan)}
+    all_results.sort(key=lambda r: (symbol_order[r['Symbol']], tf_order[r['TF']]))
 
     logging.info(f"Screener run finished. Found {len(all_results)} signals.")
     return all_results
@@ -10,20 +10,46 @@ document.addEventListener('DOMContentLoaded', () => {
     const themeLabel = document.querySelector('.theme-label');
 
     let allResults = [];
+    let lastSeq = null;
     let currentFilters = { signal: '', profile: '' };
 
+    const rowKey = (row) => `${row.Symbol}|${row.TF}`;
+    const fmt = (value, digits = 2) => (value === null || value === undefined) ? 'N/A' : Number(value).toFixed(digits);
+
+    function applyDelta(delta) {
+        const removed = new Set(delta.removed.map(rowKey));
+        const changed = new Map(delta.changed.map(row => [rowKey(row), row]));
+        allResults = allResults
+            .filter(row => !removed.has(rowKey(row)))
+            .map(row => changed.get(rowKey(row)) || row)
+            .concat(delta.added);
+    }
+
     function connectWebSocket() {
         const wsProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
         const socket = new WebSocket(`${wsProtocol}//${window.location.host}/ws`);
 
-        socket.onopen = () => fetchInitialData();
+        // The server sends a snapshot on connect; deltas must then arrive in sequence, otherwise resync.
+        socket.onopen = () => { lastSeq = null; };
         socket.onmessage = (event) => {
             const message = JSON.parse(event.data);
-            if (message.type === 'full_update') {
+            if (message.type === 'snapshot') {
+                lastSeq = message.seq;
                 allResults = message.data.results;
                 updateStatus(message.data.status);
                 updateTable();
                 populateFilters();
+            } else if (message.type === 'delta') {
+                if (lastSeq === null) return; // A snapshot is on its way
+                if (message.seq !== lastSeq + 1) {
+                    lastSeq = null;
+                    socket.send(JSON.stringify({ type: 'resync' }));
+                    return;
+                }
+                lastSeq = message.seq;
+                applyDelta(message.data);
+                updateTable();
+                populateFilters();
             } else if (message.type === 'status' || message.type === 'progress') {
                 updateStatus(message.data);
             }
@@ -32,17 +58,6 @@ document.addEventListener('DOMContentLoaded', () => {
         socket.onerror = (error) => { console.error("WebSocket error:", error); socket.close(); };
     }
 
-    async function fetchInitialData() {
-        try {
-            const response = await fetch('/get_initial_data');
-            const data = await response.json();
-            allResults = data.results;
-            updateStatus(data.status);
-            updateTable();
-            populateFilters();
-        } catch (error) { console.error("Error fetching initial data:", error); }
-    }
-
     function updateTable() {
         resultsBody.innerHTML = '';
         const filtered = allResults.filter(row => 
@@ -55,7 +70,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }
         filtered.forEach(row => {
             const tr = document.createElement('tr');
-            tr.innerHTML = `<td>${row.Symbol}</td><td>${row.TF}</td><td>${row.Price}</td><td>${row.Volume}</td><td>${row.VWMA}</td><td>${row.Stoch_k}</td><td>${row.Stoch_d}</td><td>${row.Signal}</td><td>${row.Candle}</td><td>${row.SL}</td><td>${row.TP}</td><td>${row.Profile}</td>`;
+            tr.innerHTML = `<td>${row.Symbol}</td><td>${row.TF}</td><td>${fmt(row.Price)}</td><td>${fmt(row.Volume, 0)}</td><td>${fmt(row.VWMA)}</td><td>${fmt(row.Stoch_k)}</td><td>${fmt(row.Stoch_d)}</td><td>${row.Signal}</td><td>${row.Candle}</td><td>${fmt(row.SL)}</td><td>${fmt(row.TP)}</td><td>${row.Profile}</td>`;
             resultsBody.appendChild(tr);
         });
     }
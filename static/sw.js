@@ -1,11 +1,18 @@
 // static/sw.js
-const CACHE_NAME = 'stock-screener-cache-v1';
+const CACHE_NAME = 'stock-screener-cache-v3';
 const urlsToCache = [ '/', '/static/css/style.css', '/static/js/main.js' ];
 
 self.addEventListener('install', event => {
   event.waitUntil(caches.open(CACHE_NAME).then(cache => cache.addAll(urlsToCache)));
 });
 
+// Drop caches from earlier versions so updated scripts (e.g. the WebSocket protocol) are picked up.
+self.addEventListener('activate', event => {
+  event.waitUntil(caches.keys().then(names => Promise.all(
+    names.filter(name => name !== CACHE_NAME).map(name => caches.delete(name))
+  )));
+});
+
 self.addEventListener('fetch', event => {
   event.respondWith(
     caches.match(event.request).then(response => response || fetch(event.request))
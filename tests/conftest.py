@@ -0,0 +1,44 @@
+import copy
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+from your_logic import request_scheduler
+from your_logic.config_loader import load_config
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "your_logic" / "stock_signals_v1.yml"
+
+def _session_bars(freq, start, end, seed=0):
+    """Random-walk bars of `freq` stamped like the API: daily bars at New York midnight, intraday bars within 04:00-20:00 New York time."""
+    if freq == "1D":
+        index = pd.bdate_range(start, end, inclusive="left", tz="America/New_York")
+    else:
+        index = pd.date_range(start, end, freq=freq, inclusive="left", tz="America/New_York")
+        index = index[(index.weekday < 5) & (index.hour >= 4) & (index.hour < 20)]
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, len(index)))
+    open_ = close + rng.normal(0, 0.5, len(index))
+    return pd.DataFrame({'open': open_, 'high': np.maximum(open_, close) + rng.random(len(index)),
+                         'low': np.minimum(open_, close) - rng.random(len(index)), 'close': close,
+                         'volume': rng.integers(1_000, 10_000, len(index)).astype(float),
+                         'trade_count': rng.integers(10, 100, len(index)), 'vwap': close + rng.normal(0, 0.1, len(index))},
+                        index=index.tz_convert("UTC").rename("timestamp"))
+
+@pytest.fixture
+def session_bars():
+    return _session_bars
+
+@pytest.fixture(scope="session")
+def _shipped_config():
+    return load_config(str(CONFIG_PATH))
+
+@pytest.fixture
+def raw_config(_shipped_config):
+    """A private copy of the shipped configuration that a test may modify."""
+    return copy.deepcopy(_shipped_config)
+
+@pytest.fixture(autouse=True)
+def _fresh_request_budget(monkeypatch):
+    """Rate-limit headers a test's fake server sent (e.g. a 429) must not pause the next test's requests."""
+    monkeypatch.setattr(request_scheduler, "_observed", {"version": 0, "limit": None, "remaining": None, "reset": None})
+    monkeypatch.setattr(request_scheduler, "_scheduler", None)
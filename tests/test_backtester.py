@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+from your_logic.backtester import (VECTOR_EXIT_BARS, BacktestHistory, apply_overrides, exit_bars, expand_grid,
+                                   prepare_history, run_backtest, run_sweep, simulate_trades)
+from your_logic.config_loader import ScreenerConfig
+
+FLAT = (10.0, 10.5, 9.5, 10.0)
+STOP, TARGET = 9.0, 12.0
+
+def history_of(*symbol_bars):
+    """BacktestHistory of hand-built (open, high, low, close) bar lists, one per symbol."""
+    frames = {}
+    for i, bars in enumerate(symbol_bars):
+        frames[f"S{i}"] = pd.DataFrame(bars, columns=['open', 'high', 'low', 'close'],
+                                       index=pd.date_range("2026-01-05", periods=len(bars), freq="h", tz="UTC"))
+    return BacktestHistory("1h", frames)
+
+def levels(history):
+    return np.full(len(history), STOP), np.full(len(history), TARGET)
+
+def entries_at(history, *indices):
+    entries = np.zeros(len(history), dtype=bool)
+    entries[list(indices)] = True
+    return entries
+
+@pytest.mark.parametrize("bar, price", [
+    ((9.8, 10.0, 8.5, 9.2), STOP),
+    ((8.0, 8.5, 7.5, 8.2), 8.0),  # Gaps through the stop: filled at the open
+    ((11.0, 12.5, 10.8, 12.2), TARGET),
+    ((13.0, 13.5, 12.8, 13.2), 13.0),  # Gaps through the target
+    ((10.0, 12.5, 8.5, 11.0), STOP),  # Both levels touched: counts as stopped out
+])
+def test_exit_fills(bar, price):
+    history = history_of([FLAT, FLAT, bar, FLAT])
+    exit_at, exit_price = exit_bars(history, *levels(history))
+    assert exit_at[0] == 2 and exit_price[0] == price
+    trades = simulate_trades(history, entries_at(history, 0), *levels(history))
+    assert trades[1].tolist() == [2] and trades[3].tolist() == [price]
+
+def test_exits_beyond_the_vectorized_window_are_found_on_entry():
+    hit = VECTOR_EXIT_BARS + 16
+    bars = [FLAT] * 100
+    bars[hit] = (9.8, 10.0, 8.5, 9.2)
+    history = history_of(bars)
+    stop, target = levels(history)
+    assert exit_bars(history, stop, target)[0][0] == -1
+    entry_idx, exit_idx, _, exit_prices = simulate_trades(history, entries_at(history, 0), stop, target)
+    assert entry_idx.tolist() == [0] and exit_idx.tolist() == [hit] and exit_prices.tolist() == [STOP]
+
+def test_positions_still_open_close_at_their_symbols_last_bar():
+    # The second symbol's first bar would stop out a position that ran over the boundary.
+    long_bars = [FLAT] * 99 + [(10.0, 10.5, 9.5, 10.25)]
+    short_bars = [FLAT] * 9 + [(10.0, 10.5, 9.5, 10.25)]
+    stopped = [(9.8, 10.0, 8.5, 9.2)] + [FLAT] * 5
+    for bars in (long_bars, short_bars):
+        history = history_of(bars, stopped)
+        exit_at, _ = exit_bars(history, *levels(history))
+        assert exit_at[len(bars) - 1] == -1 and (exit_at[:len(bars)] == -1).all()
+        _, exit_idx, _, exit_prices = simulate_trades(history, entries_at(history, 3), *levels(history))
+        assert exit_idx.tolist() == [len(bars) - 1] and exit_prices.tolist() == [10.25]
+
+@pytest.mark.parametrize("cooldown, expected", [(0, [0, 4, 11]), (2, [0, 6, 13])])
+def test_cooldown_delays_the_next_entry(cooldown, expected):
+    bars = [FLAT] * 20
+    bars[3] = bars[10] = (9.8, 10.0, 8.5, 9.2)
+    history = history_of(bars)
+    entries = np.ones(len(history), dtype=bool)
+    entry_idx, exit_idx, _, _ = simulate_trades(history, entries, *levels(history), cooldown=cooldown)
+    assert entry_idx.tolist() == expected
+    assert exit_idx.tolist() == [3, 10, 19]
+
+def test_no_trade_crosses_a_symbol_boundary():
+    history = history_of([FLAT] * 8, [FLAT] * 3 + [(9.8, 10.0, 8.5, 9.2)] + [FLAT] * 4, [FLAT] * 5)
+    entries = np.ones(len(history), dtype=bool)
+    entry_idx, exit_idx, _, _ = simulate_trades(history, entries, *levels(history), cooldown=5)
+    # Each symbol's first bar is entered despite the previous symbol's open position and cooldown, and
+    # no symbol's last bar is entered.
+    assert entry_idx.tolist() == [0, 8, 16]
+    assert exit_idx.tolist() == [7, 11, 20]
+    assert (exit_idx < history.segment_end[entry_idx]).all()
+    assert history.symbol_of(entry_idx).tolist() == ["S0", "S1", "S2"]
+
+def test_sweep_matches_individual_backtests(raw_config, session_bars):
+    config = ScreenerConfig(raw_config)
+    frames = {f"S{i}": session_bars("1h", "2026-01-01", "2026-06-01", seed=i) for i in range(3)}
+    history = prepare_history(frames, config.raw, "1h", config.indicators["1h"])
+    name = 'momentum_trend_refined'
+    strategy_cfg = raw_config['defaults']['strategies'][name]
+    risk_cfg = {**raw_config['defaults']['risk_management'], 'stop_loss': {'atr_multiple_by_tf': {'1h': 2.0}}}
+    grid = {'stoch_check.k_min': [20, 50, 99], 'stoch_check.k_max': [80, 95], 'stop_loss_atr_multiple': [1.0, 2.0]}
+    sweep = run_sweep(history, name, strategy_cfg, risk_cfg, grid, cooldown=2, max_workers=1)
+    # k_min 99 above both k_max values is skipped.
+    assert len(sweep) == 8
+    assert sweep['trades'].sum() > 0
+    for overrides in expand_grid(grid):
+        if overrides['stoch_check.k_min'] == 99:
+            continue
+        row = sweep.loc[(sweep[list(overrides)] == pd.Series(overrides)).all(axis=1)]
+        _, metrics = run_backtest(history, name, apply_overrides(strategy_cfg, overrides), risk_cfg, cooldown=2)
+        assert row.iloc[0][list(metrics)].to_dict() == pytest.approx(metrics, nan_ok=True), overrides
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from screener_engine import base_retention, fetch_windows, plan_base_timeframes
+from your_logic.bar_block import BarBlock
+from your_logic.config_loader import ScreenerConfig
+from your_logic.resampler import resample_ohlcv
+
+OHLCV = ['open', 'high', 'low', 'close', 'volume']
+END = pd.Timestamp("2026-10-01")
+
+def test_frame_round_trips_the_scanned_columns(session_bars):
+    df = session_bars("5min", "2026-09-01", "2026-09-15")
+    restored = BarBlock.from_frame(df, dtype='float64').frame()
+    pd.testing.assert_frame_equal(restored, df[OHLCV], check_dtype=False, check_freq=False)
+    assert restored['volume'].dtype == np.int64
+
+    compact = BarBlock.from_frame(df).frame()
+    assert compact['close'].dtype == np.float32
+    np.testing.assert_allclose(compact[OHLCV].to_numpy(), df[OHLCV].to_numpy(), rtol=1e-6)
+
+def test_from_frame_keeps_the_newest_bars_and_shares_arrays(session_bars):
+    df = session_bars("1h", "2026-09-01", "2026-09-15")
+    block = BarBlock.from_frame(df, bars=50)
+    assert len(block) == 50 and block.timestamps[-1] == df.index[-1].value
+    tail = block.tail(10)
+    assert np.shares_memory(tail.prices, block.prices)
+    frame = tail.frame()
+    frame['close'] = 0.0
+    assert (block.prices[3] != 0).all()
+
+@pytest.mark.parametrize("lookbacks", [
+    None,  # The shipped configuration's
+    {'5m': 100, '15m': 120, '1h': 50, '4h': 30, '1d': 50, '1w': 20},
+])
+def test_base_retention_keeps_every_derived_lookback(raw_config, session_bars, lookbacks):
+    config = ScreenerConfig(raw_config)
+    lookbacks = lookbacks or config.lookbacks
+    history_days = config.scan.get('history_days', 90)
+    plan = plan_base_timeframes(config.timeframes, config.scan.get('resample_from', {}))
+    windows = fetch_windows(plan, lookbacks, history_days)
+    for base_tf, timeframes in plan.items():
+        freq = {'5m': '5min', '1d': '1D'}[base_tf]
+        full = session_bars(freq, END - pd.Timedelta(days=windows[base_tf]), END)
+        trimmed = BarBlock.from_frame(full, base_retention(base_tf, timeframes, lookbacks), 'float64').frame()
+        for timeframe in timeframes:
+            expected = full[OHLCV] if timeframe == base_tf else resample_ohlcv(full[OHLCV], timeframe)
+            actual = trimmed if timeframe == base_tf else resample_ohlcv(trimmed, timeframe)
+            bars = lookbacks[timeframe]
+            if windows[base_tf] < history_days:
+                # The window was sized for the lookbacks rather than capped.
+                assert len(expected) >= bars, (base_tf, timeframe)
+            assert len(actual) >= min(bars, len(expected)), (base_tf, timeframe)
+            pd.testing.assert_frame_equal(actual.iloc[-bars:], expected.iloc[-bars:], check_dtype=False, check_freq=False)
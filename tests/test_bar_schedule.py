@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+import pandas as pd
+import pytest
+from your_logic.bar_schedule import BarCloseTrigger, EvaluationCache, MarketCalendar, bucket_bounds
+
+def ny(moment):
+    return pd.Timestamp(moment, tz="America/New_York").tz_convert("UTC")
+
+@pytest.fixture
+def calendar():
+    return MarketCalendar("04:00", "20:00", holidays=["2026-11-26"])
+
+@pytest.mark.parametrize("timeframe, now, key, cutoff", [
+    # During a session the newest closed bar is the one before the current bucket.
+    ("5m", "2026-10-14 10:03", "2026-10-14 10:00", "2026-10-14 10:00"),
+    ("1d", "2026-10-14 10:03", "2026-10-13 20:00", "2026-10-14 00:00"),
+    # After the close no session time is left in the day's buckets, so they count as closed.
+    ("5m", "2026-10-14 21:00", "2026-10-14 20:00", "2026-10-14 21:05"),
+    ("1d", "2026-10-14 20:00", "2026-10-14 20:00", "2026-10-15 00:00"),
+    # Over a weekend the keys stay at Friday's close.
+    ("5m", "2026-10-17 12:00", "2026-10-16 20:00", "2026-10-17 12:05"),
+    ("1w", "2026-10-17 12:00", "2026-10-16 20:00", "2026-10-19 00:00"),
+    ("1w", "2026-10-14 10:03", "2026-10-09 20:00", "2026-10-12 00:00"),
+    # A holiday is skipped like a weekend day.
+    ("1d", "2026-11-26 12:00", "2026-11-25 20:00", "2026-11-27 00:00"),
+])
+def test_closed_bar(calendar, timeframe, now, key, cutoff):
+    assert calendar.closed_bar(timeframe, ny(now)) == (ny(key), ny(cutoff))
+
+@pytest.mark.parametrize("timeframe, now, expected", [
+    ("5m", "2026-10-14 10:03", "2026-10-14 10:05"),
+    ("5m", "2026-10-14 20:00", "2026-10-15 04:05"),
+    # The daily and weekly bars close with the session, not at midnight.
+    ("1d", "2026-10-14 10:03", "2026-10-14 20:00"),
+    ("1w", "2026-10-14 10:03", "2026-10-16 20:00"),
+    ("1d", "2026-10-16 21:00", "2026-10-19 20:00"),
+    ("5m", "2026-10-17 12:00", "2026-10-19 04:05"),
+    ("5m", "2026-11-26 12:00", "2026-11-27 04:05"),
+    # 4h buckets are anchored to UTC, so their New York times move by an hour with daylight saving time.
+    ("4h", "2026-10-30 10:00", "2026-10-30 12:00"),
+    ("4h", "2026-11-02 10:00", "2026-11-02 11:00"),
+    ("4h", "2026-03-06 10:00", "2026-03-06 11:00"),
+    ("4h", "2026-03-09 04:30", "2026-03-09 08:00"),
+])
+def test_next_bar_close(calendar, timeframe, now, expected):
+    assert calendar.next_bar_close(timeframe, ny(now)) == ny(expected)
+
+def test_daily_and_weekly_buckets_follow_new_york_midnight_across_dst():
+    assert bucket_bounds(ny("2026-11-02 10:00"), "1d") == (ny("2026-11-02 00:00"), ny("2026-11-03 00:00"))
+    start, end = bucket_bounds(ny("2026-11-04 10:00"), "1w")
+    assert (start, end) == (ny("2026-11-02 00:00"), ny("2026-11-09 00:00"))
+    assert start.hour == 5
+
+def test_trigger_idles_until_the_next_session(calendar):
+    trigger = BarCloseTrigger(calendar, ["5m", "1h", "1d"], settle_seconds=10, min_interval=300)
+    saturday = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+    first = trigger.get_next_fire_time(None, saturday)
+    assert pd.Timestamp(first) == ny("2026-10-19 04:05:10")
+    assert pd.Timestamp(trigger.get_next_fire_time(first, first)) == ny("2026-10-19 04:10:10")
+
+def test_evaluation_cache_plans_only_pairs_with_a_new_bar():
+    cache = EvaluationCache()
+    cache.bind(object())
+    keys = {"5m": ny("2026-10-14 10:00"), "1d": ny("2026-10-13 20:00")}
+    due, kept = cache.plan({"AAPL": "low", "MSFT": "low"}, ["5m", "1d"], keys)
+    assert due == {"AAPL": {"5m", "1d"}, "MSFT": {"5m", "1d"}} and kept == []
+    for symbol in ("AAPL", "MSFT"):
+        for timeframe in ("5m", "1d"):
+            cache.record(symbol, timeframe, "low", keys[timeframe], {"Symbol": symbol} if timeframe == "1d" else None)
+
+    keys["5m"] = ny("2026-10-14 10:05")
+    due, kept = cache.plan({"AAPL": "low", "MSFT": "high"}, ["5m", "1d"], keys)
+    assert due == {"AAPL": {"5m"}, "MSFT": {"5m", "1d"}}
+    assert kept == [{"Symbol": "AAPL"}]
@@ -0,0 +1,45 @@
+import os
+import numpy as np
+import pandas as pd
+from your_logic.bar_store import BAR_DTYPE, BarStore
+
+def bars(start, periods, freq="1D", close=10.0):
+    index = pd.date_range(start, periods=periods, freq=freq, tz="UTC", name="timestamp")
+    values = close + np.arange(periods, dtype=float)
+    return pd.DataFrame({'open': values, 'high': values + 1, 'low': values - 1, 'close': values,
+                         'volume': 1000.0, 'trade_count': np.arange(periods, dtype='int64'), 'vwap': values},
+                        index=index)
+
+def test_appended_bars_load_back(tmp_path):
+    store = BarStore(str(tmp_path))
+    df = bars(pd.Timestamp.now(tz="UTC").normalize() - pd.Timedelta(days=9), 10)
+    store.append("AAPL", "1d", df)
+    pd.testing.assert_frame_equal(store.load("AAPL", "1d"), df, check_freq=False)
+    pd.testing.assert_frame_equal(store.load("AAPL", "1d", start=df.index[4]), df.iloc[4:], check_freq=False)
+    assert store.last_timestamp("AAPL", "1d") == df.index[-1]
+    assert store.load("MSFT", "1d") is None and store.last_timestamp("MSFT", "1d") is None
+
+def test_overlapping_append_replaces_the_stored_tail(tmp_path):
+    store = BarStore(str(tmp_path))
+    first = bars(pd.Timestamp.now(tz="UTC").normalize() - pd.Timedelta(days=9), 5)
+    # The refetched last bar had been stored while it was still forming.
+    second = bars(first.index[3], 7, close=50.0)
+    store.append("AAPL", "1d", first)
+    store.append("AAPL", "1d", second)
+    expected = pd.concat([first.iloc[:3], second])
+    pd.testing.assert_frame_equal(store.load("AAPL", "1d"), expected, check_freq=False)
+
+def test_expired_bars_are_compacted_away(tmp_path):
+    store = BarStore(str(tmp_path), retention_days=10, compact_ratio=0.25)
+    now = pd.Timestamp.now(tz="UTC").normalize()
+    old = bars(now - pd.Timedelta(days=30), 29)
+    store.append("AAPL", "1d", old)
+    assert len(store.load("AAPL", "1d")) == 29  # Nothing is dropped until enough bars have expired
+
+    store.append("AAPL", "1d", bars(now - pd.Timedelta(days=1), 2, close=99.0))
+    stored = store.load("AAPL", "1d")
+    assert stored.index[0] >= now - pd.Timedelta(days=10)
+    assert stored.index[-1] == now and stored['close'].iloc[-1] == 100.0
+    path = os.path.join(str(tmp_path), "1d", "AAPL.bars")
+    assert os.path.getsize(path) == len(stored) * BAR_DTYPE.itemsize
+    assert not os.path.exists(path + ".tmp")
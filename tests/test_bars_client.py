@@ -0,0 +1,55 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.fake_server import FakeBarsServer
+from benchmarks.synthetic import FakeMarketAPI, generate_bars
+from your_logic.bars_client import AsyncBarsClient, BarsAPIError, _SymbolColumns
+
+START, END = "2026-09-01T00:00:00Z", "2026-10-01T00:00:00Z"
+
+def _fetch(client, symbols, timeframe):
+    async def run():
+        try:
+            return await client.get_bar_frames(symbols, timeframe, START, END)
+        finally:
+            await client.close()
+    return asyncio.run(run())
+
+def test_pages_are_followed_and_decoded():
+    symbols = ["AAPL", "MSFT", "NVDA"]
+    with FakeBarsServer(FakeMarketAPI()) as server:
+        # A page limit that splits symbols across pages.
+        client = AsyncBarsClient("key", "secret", base_url=server.url, page_limit=333)
+        frames = _fetch(client, symbols, "1Hour")
+        requests = server.api.stats["requests"]
+    assert sorted(frames) == symbols
+    total = 0
+    for symbol in symbols:
+        expected = generate_bars(symbol, "1Hour", START, END)
+        total += len(expected)
+        pd.testing.assert_frame_equal(frames[symbol], expected, check_dtype=False, check_freq=False)
+        assert str(frames[symbol].index.tz) == "UTC"
+    assert requests == -(-total // 333)
+
+def test_rate_limited_request_raises_with_its_status():
+    with FakeBarsServer(FakeMarketAPI(rate_limit=1)) as server:
+        client = AsyncBarsClient("key", "secret", base_url=server.url)
+        _fetch(client, ["AAPL"], "1Day")
+        with pytest.raises(BarsAPIError) as excinfo:
+            _fetch(client, ["AAPL"], "1Day")
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.response.headers["X-RateLimit-Remaining"] == "0"
+
+def test_unreachable_server_raises_connection_error():
+    client = AsyncBarsClient("key", "secret", base_url="http://127.0.0.1:9")
+    with pytest.raises(ConnectionError):
+        _fetch(client, ["AAPL"], "1Day")
+
+def test_bars_without_trade_count_or_vwap_get_defaults():
+    columns = _SymbolColumns()
+    columns.add([{"t": "2026-10-01T04:00:00Z", "o": 1.0, "h": 2.0, "l": 0.5, "c": 1.5, "v": 10},
+                 {"t": "2026-10-02T04:00:00Z", "o": 1.5, "h": 2.5, "l": 1.0, "c": 2.0, "v": 20, "n": 3, "vw": 1.8}])
+    frame = columns.frame()
+    assert frame['trade_count'].tolist() == [0, 3]
+    assert np.isnan(frame['vwap'].iloc[0]) and frame['vwap'].iloc[1] == 1.8
@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+import screener_engine
+from screener_engine import analyze_base_frame, analyze_chunk_panel, get_compute_pool, shutdown_compute_pool
+from your_logic.bar_block import BarBlock
+from your_logic.config_loader import ScreenerConfig
+
+TIMEFRAMES = ['5m', '15m', '1h', '4h']
+
+@pytest.fixture
+def chunk(session_bars):
+    frames = {f"S{i}": BarBlock.from_frame(session_bars("5min", "2026-08-01", "2026-10-01", seed=i)) for i in range(6)}
+    profiles = ['low_vol_profile', 'mid_vol_profile', 'high_vol_profile']
+    return frames, {symbol: profiles[i % 3] for i, symbol in enumerate(frames)}
+
+def _pool_outcomes(config, frames, symbol_config, indicator_mode):
+    async def run():
+        pool = get_compute_pool(config, max_workers=2, chunk_size=4)
+        return {symbol: outcomes async for symbol, outcomes in pool.analyze(frames, symbol_config, '5m', TIMEFRAMES, indicator_mode)}
+    return asyncio.run(run())
+
+@pytest.fixture(autouse=True)
+def _shutdown_pool():
+    yield
+    shutdown_compute_pool()
+
+def test_spawned_workers_return_the_in_process_rows(raw_config, chunk):
+    frames, symbol_config = chunk
+    config = ScreenerConfig(raw_config)
+    panel = _pool_outcomes(config, frames, symbol_config, 'panel')
+    assert screener_engine._compute_pool.executor._mp_context.get_start_method() == 'spawn'
+    assert panel == analyze_chunk_panel(frames, '5m', TIMEFRAMES, config, symbol_config)
+
+    batch = _pool_outcomes(config, frames, symbol_config, 'batch')
+    assert batch == {symbol: analyze_base_frame(frames[symbol], '5m', TIMEFRAMES, config, symbol, symbol_config[symbol])
+                     for symbol in frames}
+    assert any(result is not None for outcomes in batch.values() for _, result in outcomes)
+
+def test_shut_down_pool_is_recreated_on_next_use(raw_config, chunk):
+    frames, symbol_config = chunk
+    config = ScreenerConfig(raw_config)
+    first = get_compute_pool(config, max_workers=2)
+    assert get_compute_pool(config, max_workers=2) is first
+    shutdown_compute_pool()
+    assert screener_engine._compute_pool is None
+    outcomes = _pool_outcomes(config, {"S0": frames["S0"]}, symbol_config, 'batch')
+    assert screener_engine._compute_pool is not first and list(outcomes) == ["S0"]
@@ -0,0 +1,66 @@
+import os
+import pytest
+import yaml
+from your_logic import config_loader
+from your_logic.config_loader import ConfigError, ScreenerConfig, get_config, validate_config
+
+def test_shipped_config_is_valid(raw_config):
+    assert validate_config(raw_config) == []
+    config = ScreenerConfig(raw_config)
+    assert config.timeframes == tuple(raw_config['defaults']['timeframes_to_test'])
+
+def _first_strategy(config):
+    return next(iter(config['defaults']['strategies'].values()))
+
+MALFORMED = {
+    "stoch_check": (lambda c: _first_strategy(c).__setitem__('stoch_check', True), "stoch_check must be a mapping"),
+    "proximity_check": (lambda c: _first_strategy(c).__setitem__('proximity_check', [1]), "proximity_check must be a mapping"),
+    "null schedule": (lambda c: c['defaults']['scan'].__setitem__('schedule', None), "scan.schedule must be a mapping"),
+    "unknown schedule mode": (lambda c: c['defaults']['scan']['schedule'].__setitem__('mode', 'cron'),
+                              "scan.schedule.mode must be 'bar_close' or 'interval'"),
+    "holiday not a date": (lambda c: c['defaults']['scan']['schedule']['holidays'].append('Thanksgiving'),
+                           "'Thanksgiving' is not a YYYY-MM-DD date"),
+    "divergence types list": (lambda c: c['defaults']['divergence'].__setitem__('types', ['regular_bullish']),
+                              "divergence.types must be a mapping"),
+    "pattern set string": (lambda c: c['defaults']['pattern_sets'].__setitem__('bullish', 'Hammer'),
+                           "pattern_sets.bullish must be a list"),
+    "vwma periods scalar": (lambda c: c['defaults']['indicators']['vwma_period_by_tf'].__setitem__('4h', 'x'),
+                            "vwma_period_by_tf.4h must be a mapping"),
+    "null resample_from": (lambda c: c['defaults']['scan'].__setitem__('resample_from', None), "scan.resample_from must be a mapping"),
+    "bar_store list": (lambda c: c['defaults']['scan'].__setitem__('bar_store', [True]), "scan.bar_store must be a mapping"),
+    "null rate_limit": (lambda c: c['defaults']['scan'].__setitem__('rate_limit', None), "scan.rate_limit must be a mapping"),
+    "null history": (lambda c: c['defaults']['scan'].__setitem__('history', None), "scan.history must be a mapping"),
+    "universe symbols list": (lambda c: c['defaults']['scan'].setdefault('universe', {}).__setitem__('symbols', ['AAPL']),
+                              "universe.symbols must be a mapping"),
+    "backtest grids list": (lambda c: c['defaults']['backtest'].__setitem__('grids', ['momentum_trend_refined']),
+                            "backtest.grids must be a mapping"),
+    "unmapped timeframe": (lambda c: c['defaults']['timeframes_to_test'].append('1m'), "no asset profile has a strategy for '1m'"),
+    "unknown timeframe": (lambda c: c['defaults']['timeframes_to_test'].append('2h'), "unknown timeframe '2h'"),
+}
+
+@pytest.mark.parametrize("case", sorted(MALFORMED))
+def test_malformed_sections_are_rejected(raw_config, case):
+    corrupt, message = MALFORMED[case]
+    corrupt(raw_config)
+    with pytest.raises(ConfigError) as excinfo:
+        ScreenerConfig(raw_config)
+    assert any(message in error for error in excinfo.value.errors), excinfo.value.errors
+
+def test_get_config_keeps_the_last_good_config(tmp_path, raw_config):
+    path = tmp_path / "config.yml"
+    path.write_text(yaml.safe_dump(raw_config))
+    good = get_config(str(path))
+    assert good is not None
+
+    raw_config['defaults']['scan']['resample_from'] = None
+    path.write_text(yaml.safe_dump(raw_config))
+    os.utime(path, ns=(good.mtime + 1, good.mtime + 1))
+    assert get_config(str(path)) is good
+
+def test_get_config_rejects_errors_raised_while_resolving(tmp_path, raw_config, monkeypatch):
+    path = tmp_path / "config.yml"
+    path.write_text(yaml.safe_dump(raw_config))
+    good = get_config(str(path))
+    os.utime(path, ns=(good.mtime + 1, good.mtime + 1))
+    monkeypatch.setattr(config_loader, 'resolve_indicator_params', lambda config, timeframe: {}['missing'])
+    assert get_config(str(path)) is good
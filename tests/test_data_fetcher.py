@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from your_logic.bar_store import BarStore
+from your_logic.data_fetcher import fetch_data, fetch_data_batch, split_by_symbol
+
+class FakeAPI:
+    """Serves daily bars from {symbol: frame} and records the start of every request."""
+    def __init__(self, frames):
+        self.frames = frames
+        self.starts = []
+
+    def get_bars(self, symbols, timeframe, start, end, adjustment, feed):
+        self.starts.append(start)
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        start = start.tz_localize("UTC") if start.tzinfo is None else start
+        end = end.tz_localize("UTC") if end.tzinfo is None else end
+        if isinstance(symbols, str):
+            frame = self.frames[symbols]
+            return SimpleNamespace(df=frame[(frame.index >= start) & (frame.index <= end)].copy())
+        # Multi-symbol responses come as one frame with a symbol column.
+        parts = [frame[(frame.index >= start) & (frame.index <= end)].assign(symbol=symbol)
+                 for symbol, frame in self.frames.items() if symbol in symbols]
+        return SimpleNamespace(df=pd.concat(parts))
+
+def daily_bars(days, close=100.0):
+    today = pd.Timestamp.now(tz="UTC").normalize()
+    index = pd.bdate_range(today - pd.Timedelta(days=days), today - pd.Timedelta(days=1), tz="UTC", name="timestamp")
+    index = index + pd.Timedelta(hours=4)
+    values = close + np.arange(len(index), dtype=float)
+    return pd.DataFrame({'open': values, 'high': values + 1, 'low': values - 1, 'close': values, 'volume': 1000.0,
+                         'trade_count': np.full(len(index), 10, dtype='int64'), 'vwap': values}, index=index)
+
+def window(days):
+    now = pd.Timestamp.now(tz="UTC")
+    return (now - pd.Timedelta(days=days)).strftime('%Y-%m-%d'), now.strftime('%Y-%m-%d')
+
+def test_second_fetch_requests_only_from_the_newest_stored_bar(tmp_path):
+    frame = daily_bars(80)
+    api = FakeAPI({"AAPL": frame})
+    store = BarStore(str(tmp_path))
+    start, end = window(60)
+    first = asyncio.run(fetch_data(api, "AAPL", start, end, interval="1d", bar_store=store))
+    second = asyncio.run(fetch_data(api, "AAPL", start, end, interval="1d", bar_store=store))
+    assert api.starts == [start, frame.index[-1].isoformat()]
+    expected = frame[frame.index >= pd.Timestamp(start, tz="UTC")]
+    pd.testing.assert_frame_equal(first, expected, check_freq=False)
+    pd.testing.assert_frame_equal(second, expected, check_freq=False)
+
+def test_stored_history_shorter_than_the_window_is_refetched_from_its_start(tmp_path):
+    frame = daily_bars(80)
+    api = FakeAPI({"AAPL": frame})
+    store = BarStore(str(tmp_path))
+    store.append("AAPL", "1d", frame.iloc[-10:])
+    start, end = window(60)
+    result = asyncio.run(fetch_data(api, "AAPL", start, end, interval="1d", bar_store=store))
+    assert api.starts == [start]
+    expected = frame[frame.index >= pd.Timestamp(start, tz="UTC")]
+    pd.testing.assert_frame_equal(result, expected, check_freq=False)
+    pd.testing.assert_frame_equal(store.load("AAPL", "1d"), expected, check_freq=False)
+
+def test_batch_fetch_resumes_from_the_stalest_symbol_once_all_cover_the_window(tmp_path):
+    frames = {"AAPL": daily_bars(80), "MSFT": daily_bars(80, close=200.0)}
+    api = FakeAPI(frames)
+    store = BarStore(str(tmp_path))
+    start, end = window(60)
+    store.append("AAPL", "1d", frames["AAPL"])
+    # MSFT's stored bars stop two bars early, but they do not reach back to the window start.
+    store.append("MSFT", "1d", frames["MSFT"].iloc[-10:-2])
+    first = asyncio.run(fetch_data_batch(api, ["AAPL", "MSFT"], start, end, interval="1d", bar_store=store))
+    assert api.starts == [start]
+
+    store.append("MSFT", "1d", frames["MSFT"].iloc[:-2])
+    second = asyncio.run(fetch_data_batch(api, ["AAPL", "MSFT"], start, end, interval="1d", bar_store=store))
+    assert api.starts[1] == frames["MSFT"].index[-3].isoformat()
+    for result in (first, second):
+        for symbol, frame in frames.items():
+            expected = frame[frame.index >= pd.Timestamp(start, tz="UTC")]
+            pd.testing.assert_frame_equal(result[symbol], expected, check_freq=False)
+
+def test_batch_fetch_omits_symbols_missing_from_the_response():
+    api = FakeAPI({"AAPL": daily_bars(30)})
+    start, end = window(20)
+    result = asyncio.run(fetch_data_batch(api, ["AAPL", "NOPE"], start, end, interval="1d"))
+    assert list(result) == ["AAPL"]
+
+def test_split_by_symbol_sorts_deduplicates_and_converts_to_utc():
+    index = pd.DatetimeIndex(["2026-10-02 09:30", "2026-10-01 09:30", "2026-10-01 09:30", "2026-10-01 09:30"],
+                             name="timestamp").tz_localize("America/New_York")
+    bars = pd.DataFrame({"symbol": ["MSFT", "MSFT", "AAPL", "MSFT"], "close": [2.0, 1.0, 5.0, 1.5]}, index=index)
+    frames = split_by_symbol(bars)
+    # A symbol without bars in the response gets no frame.
+    assert sorted(frames) == ["AAPL", "MSFT"]
+    msft = frames["MSFT"]
+    assert str(msft.index.tz) == "UTC"
+    assert msft.index.is_monotonic_increasing and msft.index.is_unique
+    # Of duplicate timestamps, the first one received is kept.
+    assert msft['close'].tolist() == [1.0, 2.0]
+    assert frames["AAPL"]['close'].tolist() == [5.0]
+    assert "symbol" not in msft.columns
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.signal import find_peaks
+from your_logic.divergence_calculator import DIVERGENCE_TYPES, find_divergence
+
+PIVOTS = {'left': 3, 'right': 3}
+
+def _frame(seed, n):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    df = pd.DataFrame({'low': close - rng.random(n), 'high': close + rng.random(n)},
+                      index=pd.date_range("2026-01-01", periods=n, freq="h", tz="UTC"))
+    oscillator = 50 + 30 * np.sin(np.arange(n) / 7) + rng.normal(0, 5, n)
+    oscillator[:30] = np.nan
+    df['stoch_k'] = oscillator
+    return df
+
+def _reference(df, div_type):
+    """Pair-by-pair divergence check: each price pivot against the previous one, over the oscillator pivots between them."""
+    kind, price_sign, osc_sign = DIVERGENCE_TYPES[div_type]
+    flip = -1 if kind == 'low' else 1
+    distance = PIVOTS['left'] + PIVOTS['right']
+    price = df[kind].to_numpy()
+    price_pivots, _ = find_peaks(flip * price, prominence=0.1, distance=distance)
+    oscillator = df['stoch_k'].dropna()
+    osc_pivots, _ = find_peaks(flip * oscillator.to_numpy(), prominence=0.1, distance=distance)
+    osc_times, osc_values = oscillator.index[osc_pivots], oscillator.to_numpy()[osc_pivots]
+    flags = np.zeros(len(df), dtype=bool)
+    for previous, current in zip(price_pivots[:-1], price_pivots[1:]):
+        window = osc_values[(osc_times >= df.index[previous]) & (osc_times <= df.index[current])]
+        if (price_sign * (price[current] - price[previous]) > 0 and len(window) >= 2
+                and osc_sign * (window[-1] - window[0]) > 0):
+            flags[current] = True
+    return flags
+
+def _column(div_type):
+    return 'bullish_divergence' if 'bullish' in div_type else 'bearish_divergence'
+
+def _config(div_type, **options):
+    side = 'buy' if 'bullish' in div_type else 'sell'
+    return {'enabled': True, 'pivots': PIVOTS, 'types': {side: [div_type]}, **options}
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("div_type", sorted(DIVERGENCE_TYPES))
+def test_matches_pairwise_reference(seed, div_type):
+    df = _frame(seed, 1500)
+    flags = find_divergence(df.copy(), _config(div_type))[_column(div_type)].to_numpy()
+    assert (flags == _reference(df, div_type)).all()
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("div_type", sorted(DIVERGENCE_TYPES))
+def test_latest_only_checks_the_newest_pivot(seed, div_type):
+    df = _frame(seed, 400)
+    kind = DIVERGENCE_TYPES[div_type][0]
+    pivots, _ = find_peaks((-1 if kind == 'low' else 1) * df[kind].to_numpy(), prominence=0.1, distance=6)
+    reference = _reference(df, div_type)
+    expected = [pivots[-1]] if len(pivots) and reference[pivots[-1]] else []
+    flags = find_divergence(df.copy(), _config(div_type, latest_only=True, lookback=len(df)))[_column(div_type)]
+    assert list(np.flatnonzero(flags.to_numpy())) == expected
+
+def test_disabled_divergence_flags_nothing():
+    result = find_divergence(_frame(0, 200), {'enabled': False})
+    assert not result['bullish_divergence'].any() and not result['bearish_divergence'].any()
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from your_logic.incremental_indicators import INDICATOR_COLUMNS, IncrementalIndicatorEngine
+from your_logic.indicator_calculator import calculate_all_indicators
+from your_logic.panel_indicators import calculate_panel_indicators
+
+def assert_indicators_equal(expected, actual, label):
+    for column in INDICATOR_COLUMNS:
+        x, y = expected[column].to_numpy(dtype='f8'), actual[column].to_numpy(dtype='f8')
+        assert (np.isnan(x) == np.isnan(y)).all(), (label, column)
+        np.testing.assert_allclose(y[~np.isnan(y)], x[~np.isnan(x)], rtol=1e-8, atol=1e-9, err_msg=f"{label} {column}")
+
+@pytest.mark.parametrize("timeframe, freq, start", [("5m", "5min", "2026-08-01"), ("1h", "1h", "2026-01-01"),
+                                                    ("1d", "1D", "2025-06-01")])
+def test_incremental_matches_batch(raw_config, session_bars, timeframe, freq, start):
+    raw_config['defaults']['divergence']['enabled'] = False
+    df = session_bars(freq, start, "2026-10-01")
+    # A flat stretch, where StochRSI's range is zero.
+    df.iloc[60:80, df.columns.get_loc('close')] = df['close'].iloc[60]
+    batch = calculate_all_indicators(df.copy(), raw_config, timeframe, 'low_vol_profile')
+
+    engine = IncrementalIndicatorEngine()
+    key = ("AAPL", timeframe)
+    assert engine.supports(df, raw_config, timeframe)
+    seeded = engine.update(key, df.iloc[:-10], raw_config, timeframe)
+    assert_indicators_equal(batch.iloc[:-10], seeded, timeframe)
+    for end in range(len(df) - 10, len(df)):
+        # The newest bar may have been stored while still forming; its revision must not leak into the state.
+        revised = df.iloc[:end].copy()
+        revised.iloc[-1, revised.columns.get_loc('close')] *= 1.01
+        engine.update(key, revised, raw_config, timeframe)
+        latest = engine.update(key, df.iloc[:end + 1], raw_config, timeframe)
+        assert_indicators_equal(batch.iloc[end:end + 1], latest.iloc[-1:], f"{timeframe} bar {end}")
+
+def test_saved_state_resumes_where_it_left_off(tmp_path, raw_config, session_bars):
+    raw_config['defaults']['divergence']['enabled'] = False
+    df = session_bars("1h", "2026-06-01", "2026-10-01")
+    engine = IncrementalIndicatorEngine()
+    engine.update(("AAPL", "1h"), df.iloc[:-5], raw_config, "1h")
+    path = str(tmp_path / "state" / "indicator_state.pkl")
+    engine.save(path)
+    assert [p.name for p in (tmp_path / "state").iterdir()] == ["indicator_state.pkl"]
+
+    restored = IncrementalIndicatorEngine.load(path)
+    resumed = restored.update(("AAPL", "1h"), df, raw_config, "1h")
+    assert len(resumed) == 6
+    assert_indicators_equal(engine.update(("AAPL", "1h"), df, raw_config, "1h"), resumed, "restored")
+
+@pytest.mark.parametrize("timeframe, freq, start", [("5m", "5min", "2026-09-01"), ("1h", "1h", "2026-03-01"),
+                                                    ("1d", "1D", "2026-07-01")])
+def test_panel_matches_batch(raw_config, session_bars, timeframe, freq, start):
+    frames = {}
+    for i in range(12):
+        df = session_bars(freq, start, "2026-10-01", seed=i)
+        # Different history lengths, down to ones that shrink the indicator windows.
+        frames[f"S{i}"] = df.iloc[i * 3:]
+    frames["S5"].iloc[10:15, frames["S5"].columns.get_loc('volume')] = 0.0
+
+    panel = calculate_panel_indicators(frames, raw_config, timeframe)
+    for symbol, df in frames.items():
+        batch = calculate_all_indicators(df.copy(), raw_config, timeframe, 'low_vol_profile')
+        assert_indicators_equal(batch, panel[symbol], f"{timeframe} {symbol}")
+        for column in ('bullish_divergence', 'bearish_divergence', 'pattern_mask', 'bullish_pattern', 'bearish_pattern'):
+            assert (batch[column].to_numpy() == panel[symbol][column].to_numpy()).all(), (symbol, column)
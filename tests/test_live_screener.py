@@ -0,0 +1,65 @@
+import asyncio
+import pandas as pd
+from live_screener import LiveScreener
+from your_logic.bar_feeds import LiveBar
+from your_logic.config_loader import ScreenerConfig
+
+def ny(moment):
+    return pd.Timestamp(moment, tz="America/New_York").tz_convert("UTC")
+
+def minute_bar(moment, close=1.5):
+    return LiveBar("AAPL", ny(moment), 1.0, 2.0, 0.5, close, 100.0)
+
+def test_bars_close_on_their_deadline_when_their_last_minutes_have_no_trades(raw_config):
+    async def run():
+        closed = []
+
+        async def record(key, history):
+            closed.append((key[1], history.index[-1]))
+
+        screener = LiveScreener(ScreenerConfig(raw_config), {"AAPL": "low_vol_profile"}, None, grace_seconds=10)
+        screener._evaluate = record
+        # Friday's last trades come before the 20:00 close.
+        for moment in ("2026-10-16 19:52", "2026-10-16 19:57"):
+            screener.on_bar(minute_bar(moment))
+        await asyncio.sleep(0)
+        assert closed == [("5m", ny("2026-10-16 19:50"))]
+
+        screener.close_due(ny("2026-10-16 20:00:05"))
+        await asyncio.sleep(0)
+        assert len(closed) == 1
+
+        screener.close_due(ny("2026-10-16 20:00:10"))
+        await asyncio.sleep(0)
+        # The daily and weekly bars close with the session instead of at New York midnight.
+        assert sorted(closed) == sorted([
+            ("5m", ny("2026-10-16 19:50")), ("5m", ny("2026-10-16 19:55")), ("15m", ny("2026-10-16 19:45")),
+            ("1h", ny("2026-10-16 19:00")), ("4h", ny("2026-10-16 16:00")), ("1d", ny("2026-10-16 00:00")),
+            ("1w", ny("2026-10-12 00:00")),
+        ])
+
+        # A late minute of an already closed bar is dropped.
+        screener.on_bar(minute_bar("2026-10-16 19:58"))
+        await asyncio.sleep(0)
+        assert len(closed) == 7 and not screener.deadlines
+
+    asyncio.run(run())
+
+def test_final_minute_closes_the_bar_before_its_deadline(raw_config):
+    async def run():
+        closed = []
+
+        async def record(key, history):
+            closed.append((key[1], history['close'].iloc[-1]))
+
+        screener = LiveScreener(ScreenerConfig(raw_config), {"AAPL": "low_vol_profile"}, None)
+        screener._evaluate = record
+        screener.on_bar(minute_bar("2026-10-14 10:00", close=1.0))
+        screener.on_bar(minute_bar("2026-10-14 10:04", close=3.0))
+        await asyncio.sleep(0)
+        assert closed == [("5m", 3.0)]
+        screener.close_due(ny("2026-10-14 10:06"))
+        await asyncio.sleep(0)
+        assert closed == [("5m", 3.0)]
+
+    asyncio.run(run())
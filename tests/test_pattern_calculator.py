@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+from your_logic.pattern_calculator import PATTERN_BITS, PATTERNS, calculate_patterns, pattern_columns, pattern_names
+
+def trend(direction):
+    """Six (open, high, low, close) bars closing 20 -> 15 (down) or 10 -> 15 (up); the last one has a 0.5 body in a 0.9 range."""
+    closes = [20, 19, 18, 17, 16, 15] if direction == 'down' else [10, 11, 12, 13, 14, 15]
+    if direction == 'down':
+        return [(c + 0.5, c + 0.7, c - 0.2, c) for c in closes]
+    return [(c - 0.5, c + 0.2, c - 0.7, c) for c in closes]
+
+# Pattern -> bars that end in it, and the pattern its shape would be in the opposite trend.
+FIXTURES = {
+    "Doji": (trend('up') + [(10.0, 11.0, 9.0, 10.05)], None),
+    "Hammer": (trend('down') + [(14.8, 15.05, 13.8, 15.0)], "Hanging Man"),
+    "Hanging Man": (trend('up') + [(14.8, 15.05, 13.8, 15.0)], "Hammer"),
+    "Inverted Hammer": (trend('down') + [(15.0, 16.2, 14.95, 15.2)], "Shooting Star"),
+    "Shooting Star": (trend('up') + [(15.0, 16.2, 14.95, 15.2)], "Inverted Hammer"),
+    "Bullish Engulfing": (trend('down') + [(14.9, 15.8, 14.8, 15.7)], None),
+    "Bearish Engulfing": (trend('up') + [(15.1, 15.2, 14.2, 14.3)], None),
+    "Bullish Harami": (trend('down') + [(15.1, 15.35, 15.05, 15.3)], None),
+    "Bearish Harami": (trend('up') + [(14.9, 14.95, 14.65, 14.7)], None),
+    "Piercing Line": (trend('down') + [(14.9, 15.45, 14.85, 15.4)], None),
+    "Dark Cloud Cover": (trend('up') + [(15.1, 15.15, 14.55, 14.6)], None),
+    "Morning Star": (trend('down') + [(14.8, 14.9, 14.7, 14.85), (14.9, 15.5, 14.85, 15.4)], None),
+    "Evening Star": (trend('up') + [(15.2, 15.3, 15.1, 15.15), (15.1, 15.15, 14.55, 14.6)], None),
+}
+
+def frame(bars):
+    return pd.DataFrame(bars, columns=['open', 'high', 'low', 'close'],
+                        index=pd.date_range("2026-10-01", periods=len(bars), freq="D", tz="UTC"))
+
+def test_every_pattern_has_a_fixture():
+    assert sorted(FIXTURES) == sorted(PATTERNS)
+
+@pytest.mark.parametrize("name", list(PATTERNS))
+def test_pattern_is_detected_on_its_last_bar(name):
+    bars, opposite = FIXTURES[name]
+    df = calculate_patterns(frame(bars), {'bullish': [name], 'bearish': [other for other in PATTERNS if other != name]})
+    assert df['pattern_mask'].iloc[-1] & PATTERN_BITS[name]
+    assert df['bullish_pattern'].iloc[-1]
+    if opposite is not None:
+        assert opposite not in pattern_names(int(df['pattern_mask'].iloc[-1]))
+
+def test_only_configured_patterns_are_detected():
+    bars, _ = FIXTURES["Hammer"]
+    mask, bullish, bearish = pattern_columns(frame(bars), {'bullish': ["Doji"], 'bearish': ["Shooting Star"]})
+    assert not mask.any() and not bullish.any() and not bearish.any()
+
+@pytest.mark.parametrize("latest_n", [1, 2, 3, 8, 50, 299, 300, 400])
+def test_latest_bars_match_the_full_run(session_bars, latest_n):
+    df = session_bars("1D", "2025-08-01", "2026-10-01")
+    sets = {'bullish': [name for i, name in enumerate(PATTERNS) if i % 2], 'bearish': [name for i, name in enumerate(PATTERNS) if not i % 2]}
+    full = pattern_columns(df, sets, latest_n=0)
+    assert full[0][-50:].any()
+    latest = pattern_columns(df, sets, latest_n=latest_n)
+    for expected, actual in zip(full, latest):
+        assert (actual[-latest_n:] == expected[-latest_n:]).all()
+        assert not actual[:-latest_n].any()
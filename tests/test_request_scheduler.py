@@ -0,0 +1,172 @@
+import asyncio
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+from your_logic import request_scheduler
+from your_logic.data_fetcher import _retry_reason
+from your_logic.request_scheduler import RequestScheduler
+
+REAL_SLEEP = asyncio.sleep
+
+class Clock:
+    """Stands in for the scheduler's time, timers and sleeps: time only moves when a test advances it."""
+    def __init__(self):
+        self.now = 1000.0
+        self.timers = []
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+    perf_counter = time = monotonic
+
+    def create_future(self):
+        return asyncio.get_running_loop().create_future()
+
+    def call_later(self, delay, callback):
+        self.timers.append((self.now + delay, callback))
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+        woken = self.create_future()
+        self.call_later(delay, lambda: woken.done() or woken.set_result(None))
+        await woken
+
+    async def advance(self, seconds):
+        self.now += seconds
+        while due := sorted((timer for timer in self.timers if timer[0] <= self.now), key=lambda timer: timer[0]):
+            for timer in due:
+                self.timers.remove(timer)
+                timer[1]()
+            await settle()
+        await settle()
+
+async def settle():
+    """Lets admitted requests reach the fake API: their calls run in worker threads."""
+    for _ in range(20):
+        await REAL_SLEEP(0.005)
+
+class Throttled(Exception):
+    """What alpaca_trade_api raises for a 429: an HTTPError carrying the response."""
+    def __init__(self, retry_after):
+        super().__init__("429 Too Many Requests")
+        self.response = SimpleNamespace(status_code=429, headers={'Retry-After': str(retry_after)})
+
+class ServerError(Exception):
+    def __init__(self):
+        super().__init__("503 Service Unavailable")
+        self.response = SimpleNamespace(status_code=503, headers={})
+
+class FakeAPI:
+    """get_bars answers from a per-symbol script of frames and errors, recording the fake time of every call."""
+    def __init__(self, clock, script=None):
+        self.clock = clock
+        self.script = script or {}
+        self.calls = []
+
+    def get_bars(self, symbol):
+        self.calls.append((symbol, self.clock.now))
+        outcomes = self.script.get(symbol)
+        outcome = outcomes.pop(0) if outcomes else pd.DataFrame({'close': [1.0, 2.0]})
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def times(self, symbol):
+        return [when for called, when in self.calls if called == symbol]
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(request_scheduler, "time", clock)
+    monkeypatch.setattr(request_scheduler.asyncio, "sleep", clock.sleep)
+    return clock
+
+def make_scheduler(clock, **settings):
+    scheduler = RequestScheduler(**settings)
+    scheduler.loop = clock
+    return scheduler
+
+def fetch(scheduler, api, symbol, key=None):
+    return asyncio.ensure_future(scheduler.request(key or symbol, lambda: api.get_bars(symbol), _retry_reason, label=symbol))
+
+def test_token_bucket_spends_the_burst_then_the_refill_rate(clock):
+    async def scenario():
+        scheduler = make_scheduler(clock, requests_per_minute=60, burst=2, max_in_flight=10)
+        api = FakeAPI(clock)
+        tasks = [fetch(scheduler, api, symbol) for symbol in "ABCDE"]
+        await settle()
+        assert [symbol for symbol, _ in api.calls] == ["A", "B"]
+        await clock.advance(1)
+        assert api.times("C") == [1001.0]
+        await clock.advance(0.5)
+        assert len(api.calls) == 3
+        await clock.advance(0.5)
+        await clock.advance(1)
+        await asyncio.gather(*tasks)
+        return [when for _, when in api.calls]
+
+    assert asyncio.run(scenario()) == [1000.0, 1000.0, 1001.0, 1002.0, 1003.0]
+
+def test_rate_limited_response_pauses_every_request(clock):
+    async def scenario():
+        scheduler = make_scheduler(clock, requests_per_minute=0, max_in_flight=1)
+        api = FakeAPI(clock, {"A": [Throttled(30)]})
+        first, second = fetch(scheduler, api, "A"), fetch(scheduler, api, "B")
+        await settle()
+        assert api.calls == [("A", 1000.0)]
+        await clock.advance(29)
+        assert api.calls == [("A", 1000.0)]
+        await clock.advance(1)
+        results = await asyncio.gather(first, second)
+        return api, results
+
+    api, results = asyncio.run(scenario())
+    assert api.times("A") == [1000.0, 1030.0] and api.times("B") == [1030.0]
+    assert all(result is not None for result in results)
+    assert clock.sleeps == [30.0]
+
+def test_identical_requests_in_flight_are_made_once_and_each_caller_gets_its_own_copy(clock):
+    async def scenario():
+        scheduler = make_scheduler(clock, requests_per_minute=0)
+        api = FakeAPI(clock)
+        results = await asyncio.gather(*(fetch(scheduler, api, "A", key="same") for _ in range(3)))
+        alone = await fetch(scheduler, api, "A", key="same")
+        return api, results, alone
+
+    api, results, alone = asyncio.run(scenario())
+    assert len(api.calls) == 2
+    for result in results:
+        pd.testing.assert_frame_equal(result, alone)
+    results[0].loc[0, 'close'] = -1.0
+    assert results[1].loc[0, 'close'] == 1.0 and results[2].loc[0, 'close'] == 1.0
+    assert len({id(result) for result in results}) == 3
+
+def test_retryable_failures_are_retried_with_capped_jittered_backoff(clock, monkeypatch):
+    bounds = []
+    monkeypatch.setattr(request_scheduler.random, "uniform", lambda low, high: bounds.append((low, high)) or high)
+
+    async def scenario():
+        scheduler = make_scheduler(clock, requests_per_minute=0, retries=4, backoff_seconds=1.0, max_backoff_seconds=3.0)
+        api = FakeAPI(clock, {"A": [ServerError() for _ in range(4)]})
+        task = fetch(scheduler, api, "A")
+        await settle()
+        for delay in (1, 2, 3):
+            await clock.advance(delay)
+        return api, await task
+
+    api, result = asyncio.run(scenario())
+    assert result is None
+    assert api.times("A") == [1000.0, 1001.0, 1003.0, 1006.0]
+    assert clock.sleeps == [1.0, 2.0, 3.0]
+    assert bounds[:3] == [(0, 1.0), (0, 2.0), (0, 3.0)]
+
+def test_client_errors_are_not_retried(clock):
+    async def scenario():
+        scheduler = make_scheduler(clock, requests_per_minute=0)
+        error = Exception("422 Unprocessable Entity")
+        error.response = SimpleNamespace(status_code=422, headers={})
+        api = FakeAPI(clock, {"A": [error]})
+        return api, await fetch(scheduler, api, "A")
+
+    api, result = asyncio.run(scenario())
+    assert result is None and len(api.calls) == 1 and clock.sleeps == []
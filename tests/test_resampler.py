@@ -0,0 +1,33 @@
+import pandas as pd
+from your_logic.resampler import resample_ohlcv
+
+def test_weekly_bars_follow_the_new_york_week(session_bars):
+    # Spans the end of daylight saving time (Sunday 2026-11-01).
+    daily = session_bars("1D", "2026-10-19", "2026-11-14")
+    # A Monday without a session: its week is still labelled with the Monday.
+    daily = daily.drop(pd.Timestamp("2026-11-09", tz="America/New_York").tz_convert("UTC"))
+    weekly = resample_ohlcv(daily, "1w")
+
+    mondays = [pd.Timestamp(day, tz="America/New_York").tz_convert("UTC")
+               for day in ("2026-10-19", "2026-10-26", "2026-11-02", "2026-11-09")]
+    assert list(weekly.index) == mondays
+    assert weekly.index[2].hour == 5 and weekly.index[1].hour == 4
+    for start, row in weekly.iterrows():
+        days = daily[(daily.index >= start) & (daily.index < start + pd.Timedelta(days=7))]
+        assert row['open'] == days['open'].iloc[0]
+        assert row['high'] == days['high'].max()
+        assert row['low'] == days['low'].min()
+        assert row['close'] == days['close'].iloc[-1]
+        assert row['volume'] == days['volume'].sum()
+        assert row['trade_count'] == days['trade_count'].sum()
+        assert abs(row['vwap'] - (days['vwap'] * days['volume']).sum() / days['volume'].sum()) < 1e-9
+
+def test_intraday_buckets_drop_empty_periods(session_bars):
+    bars = session_bars("5min", "2026-10-14", "2026-10-16")
+    hourly = resample_ohlcv(bars, "1h")
+    # Only hours with bars: nothing overnight.
+    assert len(hourly) == len(bars.index.floor("1h").unique())
+    assert hourly['volume'].sum() == bars['volume'].sum()
+
+def test_unknown_timeframe_returns_none(session_bars):
+    assert resample_ohlcv(session_bars("5min", "2026-10-14", "2026-10-15"), "3h") is None
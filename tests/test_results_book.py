@@ -0,0 +1,45 @@
+from results_book import ResultBook
+
+def row(symbol, timeframe, signal="Buy (momentum_trend)", price=10.0, profile="low_vol_profile"):
+    return {'Symbol': symbol, 'TF': timeframe, 'Price': price, 'Volume': 1000.0, 'VWMA': 9.5, 'Stoch_k': 20.0,
+            'Stoch_d': 25.0, 'Signal': signal, 'Candle': '-', 'SL': 9.0, 'TP': 12.0, 'Profile': profile}
+
+def test_upsert_produces_sequenced_deltas():
+    book = ResultBook()
+    delta = book.upsert(row("AAPL", "1d"))
+    assert delta["seq"] == 1 and delta["data"]["added"] == [row("AAPL", "1d")]
+    assert book.upsert(row("AAPL", "1d")) is None
+    assert book.seq == 1
+
+    delta = book.upsert(row("AAPL", "1d", price=11.0))
+    assert delta["seq"] == 2 and delta["data"]["changed"] == [row("AAPL", "1d", price=11.0)]
+    assert book.snapshot() == [row("AAPL", "1d", price=11.0)]
+
+def test_replace_reports_every_difference_in_one_delta():
+    book = ResultBook()
+    book.upsert(row("AAPL", "1d"))
+    book.upsert(row("MSFT", "4h"))
+    delta = book.replace([row("AAPL", "1d", price=12.0), row("NVDA", "1h")])
+    assert delta["seq"] == 3
+    assert delta["data"] == {"added": [row("NVDA", "1h")], "changed": [row("AAPL", "1d", price=12.0)],
+                             "removed": [{"Symbol": "MSFT", "TF": "4h"}]}
+    assert book.replace([row("AAPL", "1d", price=12.0), row("NVDA", "1h")]) is None
+
+def test_query_filters_sorts_and_pages():
+    book = ResultBook()
+    book.replace([row("AAPL", "1d", price=3.0), row("MSFT", "4h", signal="Sell (x)", price=1.0),
+                  row("NVDA", "1d", price=2.0, profile="mid_vol_profile")])
+    total, page = book.query({'signal': 'Buy'}, sort='Price')
+    assert total == 2 and [r['Symbol'] for r in page] == ["NVDA", "AAPL"]
+    total, page = book.query({'tf': '1d', 'profile': 'mid_vol_profile'})
+    assert total == 1 and page[0]['Symbol'] == "NVDA"
+    total, page = book.query(sort='Price', descending=True, offset=1, limit=1)
+    assert total == 3 and [r['Symbol'] for r in page] == ["NVDA"]
+    assert book.facets()["timeframes"] == ["4h", "1d"]
+
+def test_query_cache_is_invalidated_by_changes():
+    book = ResultBook()
+    book.upsert(row("AAPL", "1d"))
+    assert book.query({'symbol': 'AAPL'})[0] == 1
+    book.replace([])
+    assert book.query({'symbol': 'AAPL'}) == (0, [])
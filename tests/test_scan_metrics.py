@@ -0,0 +1,29 @@
+from your_logic.scan_metrics import REGISTRY, Counter, Histogram, render_metrics
+
+def test_every_metric_has_help_and_type_lines():
+    text = render_metrics()
+    assert text.endswith("\n")
+    for metric in REGISTRY:
+        assert f"# HELP {metric.name} " in text
+        assert f"# TYPE {metric.name} {metric.kind}\n" in text
+
+def test_label_values_are_escaped():
+    counter = Counter("test_requests_total", "Requests.", ("path",))
+    counter.inc(path='a "quoted" \\ path\nnext')
+    counter.inc(2, path='a "quoted" \\ path\nnext')
+    assert counter.render()[2] == 'test_requests_total{path="a \\"quoted\\" \\\\ path\\nnext"} 3'
+
+def test_histogram_buckets_are_cumulative_and_end_with_inf():
+    histogram = Histogram("test_seconds", "Durations.", ("stage",), buckets=(0.1, 1.0, 10.0))
+    for value in (0.05, 0.1, 0.5, 5.0, 50.0):
+        histogram.observe(value, stage="fetch")
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP test_seconds Durations.", "# TYPE test_seconds histogram"]
+    assert lines[2:] == [
+        'test_seconds_bucket{stage="fetch",le="0.1"} 2',
+        'test_seconds_bucket{stage="fetch",le="1.0"} 3',
+        'test_seconds_bucket{stage="fetch",le="10.0"} 4',
+        'test_seconds_bucket{stage="fetch",le="+Inf"} 5',
+        'test_seconds_sum{stage="fetch"} 55.65',
+        'test_seconds_count{stage="fetch"} 5',
+    ]
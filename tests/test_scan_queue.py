@@ -0,0 +1,77 @@
+import pytest
+from your_logic import scan_queue as scan_queue_module
+from your_logic.scan_queue import ScanQueue
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scan_queue_module, 'time', clock)
+    return clock
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return ScanQueue(str(tmp_path / "scan_state.db"))
+
+SYMBOLS = {"AAPL": "low_vol_profile", "MSFT": "low_vol_profile", "NVDA": "mid_vol_profile"}
+
+def test_shards_are_claimed_in_order_and_completed(queue):
+    scan_id = queue.submit(SYMBOLS, shard_size=2)
+    assert queue.claim("w1", 60) == (scan_id, 0, {"AAPL": "low_vol_profile", "MSFT": "low_vol_profile"})
+    assert queue.claim("w2", 60) == (scan_id, 1, {"NVDA": "mid_vol_profile"})
+    assert queue.claim("w3", 60) is None
+
+    assert queue.complete(scan_id, 0, "w1", [{"Symbol": "AAPL"}])
+    progress = queue.scan_progress(scan_id)
+    assert (progress["done"], progress["leased"], progress["results"]) == (1, 1, {0: [{"Symbol": "AAPL"}]})
+    assert queue.scan_progress(scan_id, seen={0})["results"] == {}
+    assert queue.running_scan() == scan_id
+
+def test_expired_lease_is_claimed_again_and_the_stale_worker_is_ignored(queue, clock):
+    scan_id = queue.submit({"AAPL": "low_vol_profile"}, shard_size=10)
+    queue.claim("w1", 30)
+    clock.now += 10
+    assert queue.heartbeat(scan_id, 0, "w1", 30, 50.0)
+    clock.now += 35
+    assert queue.claim("w2", 30) is not None
+    assert not queue.heartbeat(scan_id, 0, "w1", 30, 60.0)
+    assert not queue.complete(scan_id, 0, "w1", [{"Symbol": "stale"}])
+    assert queue.complete(scan_id, 0, "w2", [{"Symbol": "AAPL"}])
+    assert not queue.complete(scan_id, 0, "w2", [{"Symbol": "again"}])
+    assert queue.scan_progress(scan_id)["results"] == {0: [{"Symbol": "AAPL"}]}
+
+def test_shard_fails_after_max_attempts(queue, clock):
+    scan_id = queue.submit({"AAPL": "low_vol_profile"}, shard_size=10)
+    for worker in ("w1", "w2"):
+        assert queue.claim(worker, 30, max_attempts=2) is not None
+        clock.now += 31
+    assert queue.claim("w3", 30, max_attempts=2) is None
+    progress = queue.scan_progress(scan_id)
+    assert (progress["failed"], progress["progress"]) == (1, 100)
+
+def test_released_shard_returns_to_the_queue(queue):
+    scan_id = queue.submit({"AAPL": "low_vol_profile"}, shard_size=10)
+    queue.claim("w1", 30)
+    queue.release(scan_id, 0, "w1", RuntimeError("boom"))
+    assert queue.claim("w2", 30) == (scan_id, 0, {"AAPL": "low_vol_profile"})
+
+def test_shared_state_and_leases(queue, clock):
+    versions = {}
+    queue.publish('schedule', {"frequency": 5})
+    assert queue.changes(versions) == {'schedule': {"frequency": 5}}
+    assert queue.changes(versions) == {}
+    queue.publish('schedule', {"frequency": 10})
+    assert queue.changes(versions) == {'schedule': {"frequency": 10}}
+
+    assert queue.acquire_lease('scheduler', 'web1', 30)
+    assert not queue.acquire_lease('scheduler', 'web2', 30)
+    clock.now += 31
+    assert queue.acquire_lease('scheduler', 'web2', 30)
+    queue.release_lease('scheduler', 'web2')
+    assert queue.acquire_lease('scheduler', 'web1', 30)
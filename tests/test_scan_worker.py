@@ -0,0 +1,45 @@
+import asyncio
+import scan_worker
+from scan_worker import scan_shard, worker_state_path
+
+class FakeQueue:
+    def __init__(self, keeps_lease):
+        self.keeps_lease = keeps_lease
+        self.completed = []
+
+    def heartbeat(self, scan_id, shard, worker, lease_seconds, progress):
+        return self.keeps_lease
+
+    def complete(self, scan_id, shard, worker, results):
+        self.completed.append((scan_id, shard, worker, results))
+        return True
+
+    def release(self, scan_id, shard, worker, error):
+        raise AssertionError("release() is only for failed scans")
+
+def run_shard(monkeypatch, keeps_lease, scan_seconds):
+    calls = []
+
+    async def scan(api, symbol_config, on_progress, state_path=None):
+        calls.append(state_path)
+        await asyncio.sleep(scan_seconds)
+        return [{"Symbol": symbol} for symbol in symbol_config]
+
+    monkeypatch.setattr(scan_worker, 'run_screener_instance', scan)
+    queue = FakeQueue(keeps_lease)
+    claim = (7, 0, {"AAPL": "low_vol_profile"})
+    asyncio.run(asyncio.wait_for(scan_shard(queue, None, "w1:1", claim, {'lease_seconds': 0.03}, "state.w1.pkl"), 1))
+    return queue, calls
+
+def test_results_are_stored_while_the_lease_is_held(monkeypatch):
+    queue, calls = run_shard(monkeypatch, keeps_lease=True, scan_seconds=0.05)
+    assert queue.completed == [(7, 0, "w1:1", [{"Symbol": "AAPL"}])]
+    assert calls == ["state.w1.pkl"]
+
+def test_shard_is_abandoned_when_its_lease_is_lost(monkeypatch):
+    queue, _ = run_shard(monkeypatch, keeps_lease=False, scan_seconds=10)
+    assert queue.completed == []
+
+def test_each_worker_name_has_its_own_state_file():
+    assert worker_state_path("data/indicator_state.pkl", "host-a") == "data/indicator_state.host-a.pkl"
+    assert worker_state_path("data/state", "w2") == "data/state.w2"
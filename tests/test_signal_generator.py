@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from your_logic.signal_generator import CompiledStrategy, generate_signals
+
+STRATEGIES = {
+    'uptrend_only': {'is_uptrend': True},
+    'near_fast': {'is_uptrend': True, 'fast_vwma_above_slow': True,
+                  'proximity_check': {'enabled': True, 'ma_column': 'vwma_fast', 'proximity_pct': 1.0},
+                  'stoch_check': {'enabled': True, 'k_min': 0, 'k_max': 20}},
+    'between_only': {'stoch_check': {'enabled': True, 'k_min': 25, 'k_max': 80}},
+    'defaults': {'proximity_check': {'enabled': True}, 'stoch_check': {'enabled': True}},
+    'no_checks': {'proximity_check': {'enabled': False}},
+}
+
+def indicator_frame(n=400, seed=0):
+    """Prices straddling both VWMAs and %K straddling the stochastic bounds, with NaNs and a zero VWMA mixed in."""
+    rng = np.random.default_rng(seed)
+    slow = 100 + rng.normal(0, 1, n)
+    df = pd.DataFrame({'close': slow * (1 + rng.normal(0, 0.01, n)), 'vwma_slow': slow,
+                       'vwma_fast': slow * (1 + rng.normal(0, 0.005, n)),
+                       'stoch_k': rng.choice([0.0, 20.0, 25.0, 80.0, 100.0], n) + rng.choice([0.0, 0.0, -0.5, 0.5], n)},
+                      index=pd.date_range("2026-01-01", periods=n, freq="h", tz="UTC"))
+    for column in df.columns:
+        df.loc[df.index[rng.choice(n, 20, replace=False)], column] = np.nan
+    df.loc[df.index[5], 'vwma_fast'] = 0.0
+    return df
+
+def reference(df, name):
+    config = {'asset_profiles': {'profile': {'1h': {'strategy': name}}}, 'defaults': {'strategies': STRATEGIES}}
+    return (generate_signals({'1h': df}, config, '1h', 'profile')['signal'] == f"Buy ({name})").to_numpy()
+
+@pytest.mark.parametrize("name", sorted(STRATEGIES))
+def test_compiled_strategy_matches_generate_signals(name):
+    df = indicator_frame()
+    expected = reference(df, name)
+    if name != 'no_checks':
+        assert expected.any() and not expected.all()
+    strategy = CompiledStrategy(name, STRATEGIES[name])
+    assert (strategy.evaluate(df) == expected).all()
+    assert (strategy.evaluate(df, window=7) == expected[-7:]).all()
+    assert [strategy.evaluate_latest(df.iloc[:end]) for end in range(1, len(df) + 1)] == expected.tolist()
+    columns = {column: df[column].to_numpy() for column in df.columns}
+    assert (strategy.evaluate_arrays(columns) == expected).all()
+
+def test_latest_of_an_empty_frame_is_no_signal():
+    assert not CompiledStrategy('uptrend_only', STRATEGIES['uptrend_only']).evaluate_latest(indicator_frame().iloc[:0])
+
+def test_missing_column_fails_like_generate_signals():
+    df = indicator_frame().drop(columns=['stoch_k'])
+    with pytest.raises(KeyError):
+        reference(df, 'near_fast')
+    with pytest.raises(KeyError):
+        CompiledStrategy('near_fast', STRATEGIES['near_fast']).evaluate_latest(df)
+    with pytest.raises(KeyError):
+        CompiledStrategy('near_fast', STRATEGIES['near_fast']).evaluate_arrays({column: df[column].to_numpy() for column in df.columns})
@@ -0,0 +1,68 @@
+import pytest
+from your_logic.signal_store import SignalStore
+
+def row(symbol, timeframe, signal="Buy (momentum_trend)", price=10.0):
+    return {'Symbol': symbol, 'TF': timeframe, 'Price': price, 'Volume': 1000.0, 'VWMA': 9.5, 'Stoch_k': 20.0,
+            'Stoch_d': 25.0, 'Signal': signal, 'Candle': '-', 'SL': 9.0, 'TP': 12.0, 'Profile': 'low_vol_profile'}
+
+@pytest.fixture
+def store(tmp_path):
+    return SignalStore(str(tmp_path / "history" / "signals.db"))
+
+def test_latest_scan_returns_the_newest_scan(store):
+    assert store.latest_scan() is None
+    store.record_scan([row("AAPL", "1d")], {"state": "done", "symbols": 1}, recorded=100.0)
+    rows = [row("MSFT", "1h", price=20.0), row("AAPL", "1d", signal="Sell (momentum_trend)")]
+    store.record_scan(rows, {"state": "done", "symbols": 2}, recorded=200.0)
+
+    assert store.latest_scan() == (200.0, {"state": "done", "symbols": 2}, rows)
+
+def test_live_signals_do_not_change_the_latest_scan(store):
+    store.record_scan([row("AAPL", "1d")], {"state": "done"}, recorded=100.0)
+    store.record_live([(150.0, row("MSFT", "1h"))])
+    store.record_live([])
+
+    assert store.latest_scan()[2] == [row("AAPL", "1d")]
+    assert [(entry['Symbol'], entry['source']) for entry in store.history()] == [("MSFT", "live"), ("AAPL", "scan")]
+
+def test_history_filters(store):
+    store.record_scan([row("AAPL", "1d"), row("MSFT", "1d", signal="Sell (momentum_trend)")], {}, recorded=100.0)
+    store.record_scan([row("AAPL", "1d"), row("AAPL", "1h", signal="Buy")], {}, recorded=200.0)
+    store.record_live([(300.0, row("AAPL", "1d", signal="Sell"))])
+
+    def times(**filters):
+        return [(entry['Symbol'], entry['TF'], entry['time']) for entry in store.history(**filters)]
+
+    assert times(symbol="AAPL", timeframe="1d") == [("AAPL", "1d", 300.0), ("AAPL", "1d", 200.0), ("AAPL", "1d", 100.0)]
+    assert times(signal="Buy") == [("AAPL", "1h", 200.0), ("AAPL", "1d", 200.0), ("AAPL", "1d", 100.0)]
+    assert times(signal="Sell") == [("AAPL", "1d", 300.0), ("MSFT", "1d", 100.0)]
+    assert times(since=150.0, until=300.0) == [("AAPL", "1h", 200.0), ("AAPL", "1d", 200.0)]
+    assert times(source="live") == [("AAPL", "1d", 300.0)]
+    assert times(limit=1) == [("AAPL", "1d", 300.0)]
+    assert store.history(symbol="AAPL", timeframe="1d", limit=1)[0]['Signal'] == "Sell"
+
+def test_first_fired_tracks_the_current_streak(store):
+    store.record_scan([row("AAPL", "1d")], {}, recorded=100.0)
+    store.record_scan([], {}, recorded=200.0)
+    store.record_scan([row("AAPL", "1d")], {}, recorded=300.0)
+    store.record_scan([row("AAPL", "1d")], {}, recorded=400.0)
+
+    assert store.first_fired("AAPL", "1d") == {"first": 100.0, "last": 400.0, "scans": 3,
+                                               "streak_start": 300.0, "streak_scans": 2}
+    assert store.first_fired("MSFT", "1d") is None
+
+    store.record_scan([], {}, recorded=500.0)
+    fired = store.first_fired("AAPL", "1d")
+    assert fired["streak_start"] is None and fired["streak_scans"] == 0
+
+def test_prune_drops_old_scans_and_signals(store, monkeypatch):
+    store.record_scan([row("AAPL", "1d")], {"state": "old"}, recorded=100.0)
+    store.record_live([(100.0, row("MSFT", "1h"))])
+    store.record_scan([row("AAPL", "1d")], {"state": "new"}, recorded=10 * 86400.0)
+    monkeypatch.setattr("your_logic.signal_store.time.time", lambda: 12 * 86400.0)
+
+    store.prune(keep_days=5)
+
+    assert [entry['time'] for entry in store.history()] == [10 * 86400.0]
+    assert store.latest_scan()[1] == {"state": "new"}
+    assert store.first_fired("AAPL", "1d")["first"] == 10 * 86400.0
@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+import screener_engine
+from your_logic.bar_schedule import EvaluationCache
+from your_logic.config_loader import ScreenerConfig
+from your_logic.universe import assign_profiles, daily_stats, load_universe, prefilter_symbols
+
+def stats_of(**rows):
+    """daily_stats-shaped frame from symbol=(close, dollar_volume, atr_pct, uptrend) keywords."""
+    return pd.DataFrame.from_dict(rows, orient='index', columns=["close", "dollar_volume", "atr_pct", "uptrend"])
+
+def test_static_universe_is_the_symbols_mapping():
+    assert load_universe({'symbols': {'AAPL': 'low_vol_profile', 'XYZ': None}}) == {'AAPL': 'low_vol_profile', 'XYZ': None}
+    assert load_universe({}) == {}
+
+def test_file_universe_skips_headers_comments_and_blank_lines(tmp_path):
+    path = tmp_path / "universe.csv"
+    path.write_text("symbol,profile\n# watch list\naapl, low_vol_profile\n\nxyz\nmsft,\n")
+    assert load_universe({'source': 'file', 'file': str(path)}) == {'AAPL': 'low_vol_profile', 'XYZ': None, 'MSFT': None}
+
+def test_asset_universe_keeps_tradable_symbols_on_the_configured_exchanges():
+    assets = [SimpleNamespace(symbol="AAPL", exchange="NASDAQ", tradable=True),
+              SimpleNamespace(symbol="IBM", exchange="NYSE", tradable=True),
+              SimpleNamespace(symbol="OTCX", exchange="OTC", tradable=True),
+              SimpleNamespace(symbol="HALT", exchange="NYSE", tradable=False),
+              SimpleNamespace(symbol="BRK/B", exchange="NYSE", tradable=True)]
+    api = SimpleNamespace(list_assets=lambda status, asset_class: assets)
+    universe_cfg = {'source': 'assets', 'exchanges': ["NASDAQ", "NYSE"], 'symbols': {'SPY': None}}
+    assert load_universe(universe_cfg, api) == {'AAPL': None, 'IBM': None}
+    # Without the API the static symbols are used.
+    assert load_universe(universe_cfg) == {'SPY': None}
+
+def test_profiles_come_from_the_first_matching_rule():
+    stats = stats_of(CHEAP=(8.0, 5e6, 6.0, True), WILD=(50.0, 5e6, 6.0, True), CALM=(50.0, 5e6, 1.0, True),
+                     NAN=(50.0, 5e6, np.nan, True), FIXED=(8.0, 5e6, 6.0, True))
+    rules = [{'profile': 'micro_cap_profile', 'max_price': 15}, {'profile': 'high_vol_profile', 'min_atr_pct': 5.0},
+             {'profile': 'low_vol_profile', 'max_atr_pct': 3.0}]
+    symbol_config = {'CHEAP': None, 'WILD': None, 'CALM': None, 'NAN': None, 'NODATA': None, 'FIXED': 'low_vol_profile'}
+    assert assign_profiles(symbol_config, stats, rules) == {
+        'CHEAP': 'micro_cap_profile', 'WILD': 'high_vol_profile', 'CALM': 'low_vol_profile', 'FIXED': 'low_vol_profile'}
+
+def test_prefilter_counts_each_rejection_under_its_first_failed_check():
+    stats = stats_of(OK=(50.0, 5e6, 2.0, True), PENNY=(0.5, 1e3, 2.0, False), THIN=(50.0, 1e3, 2.0, False),
+                     DOWN=(50.0, 5e6, 2.0, False))
+    cfg = {'min_price': 1.0, 'max_price': 1000, 'min_dollar_volume': 1e6}
+    assert prefilter_symbols(stats, cfg) == (['OK', 'DOWN'], {'price': 1, 'liquidity': 1})
+    assert prefilter_symbols(stats, {**cfg, 'daily_uptrend': True}) == (['OK'], {'price': 1, 'liquidity': 1, 'trend': 1})
+
+def test_daily_stats(session_bars):
+    df = session_bars("1D", "2026-01-01", "2026-10-01")
+    stats = daily_stats({'AAPL': df, 'EMPTY': df.iloc[:0]}, trend_period=50, liquidity_days=20)
+    assert list(stats.index) == ['AAPL']
+    assert stats.loc['AAPL', 'close'] == df['close'].iloc[-1]
+    assert stats.loc['AAPL', 'dollar_volume'] == pytest.approx((df['close'] * df['volume']).iloc[-20:].mean())
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_symbols_without_daily_bars_go_on_unfiltered(monkeypatch, raw_config, session_bars, enabled):
+    df = session_bars("1D", "2026-01-01", "2026-10-01")
+    frames = {'GOOD': df, 'PENNY': df / 1000}
+
+    async def fetch(ctx, symbols, base_tf):
+        return {symbol: frames[symbol] for symbol in symbols if symbol in frames}
+
+    monkeypatch.setattr(screener_engine, '_fetch_chunk_base', fetch)
+    raw_config['defaults']['scan']['prefilter'] = {'enabled': enabled, 'min_price': 1.0}
+    ctx = SimpleNamespace(config=ScreenerConfig(raw_config))
+    symbol_config = {'GOOD': 'low_vol_profile', 'PENNY': 'low_vol_profile', 'NODATA': 'low_vol_profile', 'NEW': None}
+    survivors, daily, missing = asyncio.run(screener_engine.prefilter_universe(ctx, symbol_config))
+    # NEW has neither bars nor a profile, so no rule can give it one.
+    expected = {'GOOD': 'low_vol_profile', 'NODATA': 'low_vol_profile'} if enabled else {
+        'GOOD': 'low_vol_profile', 'PENNY': 'low_vol_profile', 'NODATA': 'low_vol_profile'}
+    assert survivors == expected
+    assert set(daily) == set(expected) - {'NODATA'}
+    assert missing == ['NODATA', 'NEW']
+
+def test_bar_close_scans_reuse_the_prefilter_until_the_daily_bar_changes(monkeypatch, raw_config, session_bars):
+    df = session_bars("1D", "2026-01-01", "2026-10-01")
+    frames = {'GOOD': df, 'PENNY': df / 1000}
+    requested = []
+
+    async def fetch(ctx, symbols, base_tf):
+        requested.append(sorted(symbols))
+        return {symbol: frames[symbol] for symbol in symbols if symbol in frames}
+
+    monkeypatch.setattr(screener_engine, '_fetch_chunk_base', fetch)
+    raw_config['defaults']['scan']['prefilter'] = {'enabled': True, 'min_price': 1.0}
+    ctx = SimpleNamespace(config=ScreenerConfig(raw_config))
+    evaluations = EvaluationCache()
+    symbol_config = {'GOOD': 'low_vol_profile', 'PENNY': 'low_vol_profile', 'LATE': 'low_vol_profile'}
+
+    survivors, _ = asyncio.run(screener_engine._prefilter(ctx, symbol_config, evaluations, 'day 1'))
+    assert survivors == {'GOOD': 'low_vol_profile', 'LATE': 'low_vol_profile'}
+
+    # Only the symbol that had no daily bars is prefiltered again; now it has some, and fails.
+    frames['LATE'] = df / 1000
+    survivors, _ = asyncio.run(screener_engine._prefilter(ctx, symbol_config, evaluations, 'day 1'))
+    assert requested[1:] == [['LATE']]
+    assert survivors == {'GOOD': 'low_vol_profile'}
+
+    survivors, _ = asyncio.run(screener_engine._prefilter(ctx, symbol_config, evaluations, 'day 2'))
+    assert requested[2:] == [['GOOD', 'LATE', 'PENNY']]
+    assert survivors == {'GOOD': 'low_vol_profile'}
@@ -0,0 +1,72 @@
+import asyncio
+from ws_manager import SEND_QUEUE_SIZE, ConnectionManager
+
+class FakeWebSocket:
+    def __init__(self, fail=False, blocked=False):
+        self.fail = fail
+        self.unblocked = asyncio.Event()
+        if not blocked:
+            self.unblocked.set()
+        self.sent = []
+        self.close_codes = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        await self.unblocked.wait()
+        if self.fail:
+            raise ConnectionResetError("peer gone")
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.close_codes.append(code)
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_broadcast_reaches_every_client_after_its_snapshot():
+    async def scenario():
+        manager = ConnectionManager(lambda: "snapshot")
+        sockets = [FakeWebSocket(), FakeWebSocket()]
+        for websocket in sockets:
+            await manager.connect(websocket)
+        await manager.broadcast("delta 1")
+        await manager.broadcast("delta 2")
+        await settle()
+        return sockets
+    for websocket in asyncio.run(scenario()):
+        assert websocket.sent == ["snapshot", "delta 1", "delta 2"]
+
+def test_slow_consumer_is_evicted_without_delaying_others():
+    async def scenario():
+        manager = ConnectionManager(lambda: "snapshot")
+        slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+        await manager.connect(slow)
+        await manager.connect(fast)
+        await settle()
+        for i in range(SEND_QUEUE_SIZE + 1):
+            await manager.broadcast(f"delta {i}")
+            await asyncio.sleep(0)
+        await settle()
+        return manager, slow, fast
+    manager, slow, fast = asyncio.run(scenario())
+    assert slow not in manager.clients and fast in manager.clients
+    assert slow.close_codes == [1013]
+    assert len(fast.sent) == SEND_QUEUE_SIZE + 2
+
+def test_failed_send_drops_and_closes_the_client():
+    async def scenario():
+        manager = ConnectionManager(lambda: "snapshot")
+        broken, healthy = FakeWebSocket(fail=True), FakeWebSocket()
+        await manager.connect(broken)
+        await manager.connect(healthy)
+        await settle()
+        await manager.broadcast("delta")
+        await settle()
+        return manager, broken, healthy
+    manager, broken, healthy = asyncio.run(scenario())
+    assert broken not in manager.clients and healthy in manager.clients
+    assert broken.close_codes == [1013]
+    assert healthy.sent == ["snapshot", "delta"]
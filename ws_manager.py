@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from fastapi import WebSocket
+
+# Messages a client may have waiting before it is treated as a slow consumer and dropped.
+SEND_QUEUE_SIZE = 256
+
+class _Client:
+    __slots__ = ('websocket', 'queue', 'writer')
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.writer = None
+
+class ConnectionManager:
+    """
+    Fan-out to WebSocket clients through a bounded send queue per client, each drained by its own
+    writer task, so a slow or dead client never delays the others. Messages are serialized once by the
+    caller and shared by every queue; a client whose queue fills up is disconnected and reconnects
+    with a fresh snapshot.
+    """
+    def __init__(self, snapshot_message):
+        self.snapshot_message = snapshot_message
+        self.clients: dict[WebSocket, _Client] = {}
+
+    async def connect(self, websocket: WebSocket):
+        await websocket.accept()
+        client = _Client(websocket)
+        # Queued before the client is registered, so no delta can overtake its snapshot.
+        client.queue.put_nowait(self.snapshot_message())
+        self.clients[websocket] = client
+        client.writer = asyncio.create_task(self._write(client))
+
+    def disconnect(self, websocket: WebSocket):
+        client = self.clients.pop(websocket, None)
+        if client is not None and client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+
+    async def _write(self, client):
+        try:
+            while True:
+                message = await client.queue.get()
+                await client.websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.info(f"Dropping WebSocket client after failed send: {e}")
+            self.disconnect(client.websocket)
+            asyncio.create_task(self._close(client.websocket))
+
+    def send(self, websocket: WebSocket, message: str):
+        """Queues a message for one client, evicting it if it has fallen too far behind."""
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+        try:
+            client.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logging.warning(f"Evicting slow WebSocket client with {client.queue.qsize()} pending messages.")
+            self.disconnect(websocket)
+            asyncio.create_task(self._close(websocket))
+
+    async def _close(self, websocket):
+        try:
+            await websocket.close(code=1013)  # "Try again later": the client reconnects and resyncs
+        except Exception:
+            pass
+
+    async def send_snapshot(self, websocket: WebSocket):
+        self.send(websocket, self.snapshot_message())
+
+    async def broadcast(self, message: str):
+        for websocket in list(self.clients):
+            self.send(websocket, message)
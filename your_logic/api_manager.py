@@ -1,8 +1,10 @@
 # your_logic/api_manager.py
 import alpaca_trade_api as tradeapi
+from alpaca_trade_api.stream import Stream
 import logging
 import os
 from dotenv import load_dotenv
+from your_logic.bars_client import DATA_URL, AsyncBarsClient
 
 class AlpacaManager:
     """
@@ -14,9 +16,11 @@ class AlpacaManager:
         load_dotenv()
         
         self.api = None
+        self.bars_client = None
         self.api_key = os.getenv('APCA_API_KEY_ID')
         self.secret_key = os.getenv('APCA_API_SECRET_KEY')
         self.base_url = os.getenv('APCA_BASE_URL', 'https://paper-api.alpaca.markets') # Default to paper if not set
+        self.data_url = os.getenv('APCA_API_DATA_URL', DATA_URL) # Same variable the REST client reads
         logging.info("AlpacaManager initialized.")
 
     def initialize(self):
@@ -38,11 +42,38 @@ class AlpacaManager:
             except Exception as e:
                 logging.error(f"Failed to initialize Alpaca API: {e}")
                 self.api = None
+        self.bars_client = None
 
     def get_api(self):
         """Returns the active Alpaca API instance."""
         return self.api
 
+    def get_bars_client(self):
+        """Returns the shared async bars client (created on first use), or None if no credentials are configured."""
+        if not self.api_key or not self.secret_key:
+            return None
+        if not self.bars_client:
+            self.bars_client = AsyncBarsClient(self.api_key, self.secret_key, base_url=self.data_url)
+        return self.bars_client
+
+    def get_market_data_api(self, client='async'):
+        """The client bars are fetched with: the async bars client for 'async' (if available), else the REST API."""
+        if client == 'async' and self.api:
+            return self.get_bars_client() or self.api
+        return self.api
+
+    async def close_bars_client(self):
+        """Closes the bars client's connections opened on the running event loop."""
+        if self.bars_client:
+            await self.bars_client.close()
+
+    def create_stream(self, data_feed='iex'):
+        """Creates a market data stream client, or returns None if no credentials are configured."""
+        if not self.api_key or not self.secret_key:
+            logging.error("Cannot start the market data stream without Alpaca API credentials.")
+            return None
+        return Stream(self.api_key, self.secret_key, base_url=self.base_url, data_feed=data_feed)
+
     def close(self):
         """Placeholder for closing connections."""
         logging.info("Alpaca connection manager shutting down.")
@@ -0,0 +1,258 @@
+# your_logic/backtester.py
+import bisect
+import copy
+import itertools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from your_logic.panel_indicators import calculate_panel_indicators
+from your_logic.signal_generator import CompiledStrategy
+
+# Indicator columns kept for a backtest: what strategies read plus what the trade simulation needs.
+HISTORY_COLUMNS = ('open', 'high', 'low', 'close', 'vwma_slow', 'vwma_fast', 'stoch_k', 'atr', 'middle_bb')
+# Strategy settings that only move exits; sweep combinations sharing them share one exit computation.
+EXIT_KEYS = ('stop_loss_atr_multiple', 'take_profit_atr_multiple')
+
+class BacktestHistory:
+    """
+    Indicator history of many symbols on one timeframe, concatenated into flat float arrays so a strategy
+    is evaluated over every bar of every symbol in one pass. `segment_end[i]` is the end (exclusive) of the
+    symbol bar i belongs to, which keeps a trade from running into the next symbol's bars.
+    """
+    __slots__ = ('timeframe', 'symbols', 'offsets', 'timestamps', 'columns', 'segment_end', 'last_bar')
+
+    def __init__(self, timeframe, frames):
+        frames = {symbol: df for symbol, df in frames.items() if df is not None and not df.empty}
+        lengths = [len(df) for df in frames.values()]
+        self.timeframe = timeframe
+        self.symbols = list(frames)
+        self.offsets = np.concatenate(([0], np.cumsum(lengths))).astype('i8')
+        size = int(self.offsets[-1])
+        self.timestamps = np.concatenate([df.index.asi8 for df in frames.values()]) if frames else np.empty(0, dtype='i8')
+        self.columns = {
+            col: np.concatenate([df[col].to_numpy(dtype='f8') if col in df.columns else np.full(len(df), np.nan)
+                                 for df in frames.values()]) if frames else np.empty(0)
+            for col in HISTORY_COLUMNS
+        }
+        self.segment_end = np.repeat(self.offsets[1:], lengths)
+        self.last_bar = np.arange(size) == self.segment_end - 1
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def symbol_of(self, indices):
+        return np.asarray(self.symbols, dtype=object)[np.searchsorted(self.offsets, indices, side='right') - 1]
+
+def prepare_history(frames, config, timeframe, params=None):
+    """Computes indicators for every symbol's full history once; the result is shared by all backtest runs."""
+    with_indicators = calculate_panel_indicators(frames, config, timeframe, params)
+    history = BacktestHistory(timeframe, with_indicators)
+    logging.info(f"Prepared {len(history)} {timeframe} bars of {len(history.symbols)} symbols for backtesting.")
+    return history
+
+# --- Trade simulation ---
+
+def exit_levels(history, strategy_cfg, risk_cfg):
+    """
+    Stop and target for an entry at every bar's close, following screener_engine.calculate_sl_tp: ATR
+    multiples when the strategy defines them, else the timeframe's ATR stop and the middle Bollinger band.
+    Returns (stop, target, tradable); bars without a usable ATR or with a target at or below the close are not tradable.
+    """
+    close, atr = history.columns['close'], history.columns['atr']
+    with np.errstate(invalid='ignore'):
+        if 'stop_loss_atr_multiple' in strategy_cfg:
+            stop = close - atr * strategy_cfg.get('stop_loss_atr_multiple', 1.5)
+            target = close + atr * strategy_cfg.get('take_profit_atr_multiple', 3.0)
+        else:
+            multiple = risk_cfg.get('stop_loss', {}).get('atr_multiple_by_tf', {}).get(history.timeframe, 2.0)
+            stop = close - atr * multiple
+            target = history.columns['middle_bb']
+        tradable = (atr > 0) & (target > close)
+    return stop, target, tradable
+
+# Exits within this many bars of their entry are found for every bar at once; positions held longer
+# are searched one at a time, only when actually entered.
+VECTOR_EXIT_BARS = 64
+
+def _first_exit(open_, high, low, start, end, stop, target):
+    """First bar in [start, end) touching the stop or target, and its fill price; (None, None) if neither is hit."""
+    step = 16
+    while start < end:
+        block_end = min(end, start + step)
+        hits = np.flatnonzero((low[start:block_end] <= stop) | (high[start:block_end] >= target))
+        if len(hits):
+            i = start + hits[0]
+            if low[i] <= stop:
+                return i, min(open_[i], stop)
+            return i, max(open_[i], target)
+        start, step = block_end, step * 2
+    return None, None
+
+def exit_bars(history, stop, target):
+    """
+    Exit bar and fill price of a position entered at every bar's close, for the given stop and target
+    arrays; -1 where no exit falls within VECTOR_EXIT_BARS bars. A bar touching both levels counts as
+    stopped out, and a gap through a level fills at the open. Depends only on the exit settings, so a
+    sweep computes it once per exit setting and reuses it for every entry setting.
+    """
+    cols = history.columns
+    open_, high, low = cols['open'], cols['high'], cols['low']
+    size = len(history)
+    exit_at = np.full(size, -1, dtype='i8')
+    exit_price = np.full(size, np.nan)
+    # Bars are compared with the bar `offset` later through shifted contiguous slices, not gathers.
+    room = history.segment_end - np.arange(size)
+    with np.errstate(invalid='ignore'):
+        for offset in range(1, min(VECTOR_EXIT_BARS, size - 1) + 1):
+            entry = slice(0, size - offset)
+            stopped = low[offset:] <= stop[entry]
+            hit = (stopped | (high[offset:] >= target[entry])) & (exit_at[entry] < 0) & (room[entry] > offset)
+            i = np.flatnonzero(hit)
+            exit_at[i] = i + offset
+            exit_price[i] = np.where(stopped[i], np.minimum(open_[i + offset], stop[i]), np.maximum(open_[i + offset], target[i]))
+    return exit_at, exit_price
+
+def simulate_trades(history, entries, stop, target, cooldown=0, exits=None):
+    """
+    Walks the entry signals in bar order with at most one open position per symbol. A position is entered
+    at the signal bar's close and exits on the first later bar that reaches its stop or target; after an
+    exit, `cooldown` bars pass before the next entry. Positions still open at the end of a symbol's history
+    are closed at its last close. `exits` is exit_bars() for these levels, computed when not given.
+    Returns (entry index, exit index, entry price, exit price) arrays.
+    """
+    cols = history.columns
+    exit_at, exit_price = exits if exits is not None else exit_bars(history, stop, target)
+    candidates = np.flatnonzero(entries & ~history.last_bar)
+    # Only the walk from one taken entry to the next is sequential; it runs on plain ints.
+    candidate_list, ends = candidates.tolist(), history.segment_end[candidates].tolist()
+    exit_list, price_list = exit_at[candidates].tolist(), exit_price[candidates].tolist()
+    taken, taken_exit, taken_price = [], [], []
+    pos = 0
+    while pos < len(candidate_list):
+        entry, end, exit_bar, price = candidate_list[pos], ends[pos], exit_list[pos], price_list[pos]
+        if exit_bar < 0:
+            exit_bar, price = _first_exit(cols['open'], cols['high'], cols['low'], entry + VECTOR_EXIT_BARS + 1,
+                                          end, stop[entry], target[entry])
+            if exit_bar is None:
+                exit_bar, price = end - 1, cols['close'][end - 1]
+        taken.append(entry)
+        taken_exit.append(exit_bar)
+        taken_price.append(price)
+        # The next symbol's bars start at `end`, so its signals are never blocked by this symbol's cooldown.
+        pos = bisect.bisect_left(candidate_list, min(exit_bar + cooldown + 1, end), pos + 1)
+    entry_idx = np.asarray(taken, dtype='i8')
+    return entry_idx, np.asarray(taken_exit, dtype='i8'), cols['close'][entry_idx], np.asarray(taken_price, dtype='f8')
+
+def trade_metrics(history, trades):
+    """Summary statistics of simulated trades; returns are per trade in percent, drawdown on their running sum."""
+    entry_idx, exit_idx, entry_prices, exit_prices = trades
+    if not len(entry_idx):
+        return {"trades": 0, "win_rate": None, "avg_return_pct": None, "total_return_pct": 0.0,
+                "profit_factor": None, "max_drawdown_pct": 0.0, "avg_bars_held": None}
+    returns = (exit_prices / entry_prices - 1) * 100
+    gains, losses = returns[returns > 0].sum(), -returns[returns < 0].sum()
+    equity = np.concatenate(([0.0], np.cumsum(returns[np.argsort(history.timestamps[exit_idx], kind='stable')])))
+    return {
+        "trades": len(returns),
+        "win_rate": round(float((returns > 0).mean() * 100), 2),
+        "avg_return_pct": round(float(returns.mean()), 4),
+        "total_return_pct": round(float(returns.sum()), 4),
+        "profit_factor": round(float(gains / losses), 4) if losses > 0 else None,
+        "max_drawdown_pct": round(float((np.maximum.accumulate(equity) - equity).max()), 4),
+        "avg_bars_held": round(float((exit_idx - entry_idx).mean()), 2),
+    }
+
+def run_backtest(history, strategy_name, strategy_cfg, risk_cfg, cooldown=0):
+    """Backtests one strategy configuration; returns (trades DataFrame, metrics dict)."""
+    entries = CompiledStrategy(strategy_name, strategy_cfg).evaluate_arrays(history.columns)
+    stop, target, tradable = exit_levels(history, strategy_cfg, risk_cfg)
+    trades = simulate_trades(history, entries & tradable, stop, target, cooldown)
+    entry_idx, exit_idx, entry_prices, exit_prices = trades
+    trades_df = pd.DataFrame({
+        "symbol": history.symbol_of(entry_idx),
+        "entry_time": pd.to_datetime(history.timestamps[entry_idx], utc=True),
+        "exit_time": pd.to_datetime(history.timestamps[exit_idx], utc=True),
+        "entry_price": entry_prices, "exit_price": exit_prices,
+        "stop": stop[entry_idx], "target": target[entry_idx],
+        "return_pct": (exit_prices / entry_prices - 1) * 100, "bars_held": exit_idx - entry_idx,
+    })
+    return trades_df, trade_metrics(history, trades)
+
+# --- Parameter sweeps ---
+
+def expand_grid(grid):
+    """Every combination of a {dotted.key: [values]} grid, as a list of {dotted.key: value} overrides."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+def apply_overrides(strategy_cfg, overrides):
+    """Copy of `strategy_cfg` with dotted keys (e.g. 'stoch_check.k_min') set to the given values."""
+    cfg = copy.deepcopy(strategy_cfg)
+    for path, value in overrides.items():
+        *parents, leaf = path.split('.')
+        node = cfg
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = value
+    return cfg
+
+def _is_runnable(strategy_cfg):
+    stoch_cfg = strategy_cfg.get('stoch_check', {})
+    return not stoch_cfg.get('enabled', False) or stoch_cfg.get('k_min', 0) <= stoch_cfg.get('k_max', 100)
+
+_sweep_state = None
+
+def _init_sweep_worker(history, strategy_name, strategy_cfg, risk_cfg, cooldown):
+    global _sweep_state
+    _sweep_state = (history, strategy_name, strategy_cfg, risk_cfg, cooldown)
+
+def _run_exit_group(exit_overrides, entry_overrides_list):
+    """Worker entry point: one exit setting, simulated with each of its entry settings."""
+    history, strategy_name, strategy_cfg, risk_cfg, cooldown = _sweep_state
+    stop, target, tradable = exit_levels(history, apply_overrides(strategy_cfg, exit_overrides), risk_cfg)
+    exits = exit_bars(history, stop, target)
+    results = []
+    for entry_overrides in entry_overrides_list:
+        strategy = CompiledStrategy(strategy_name, apply_overrides(strategy_cfg, entry_overrides))
+        trades = simulate_trades(history, strategy.evaluate_arrays(history.columns) & tradable, stop, target, cooldown, exits)
+        results.append({**entry_overrides, **exit_overrides, **trade_metrics(history, trades)})
+    return results
+
+def run_sweep(history, strategy_name, strategy_cfg, risk_cfg, grid, cooldown=0, max_workers=None):
+    """
+    Backtests every combination of `grid` ({dotted.key: [values]} over the strategy's settings) and returns
+    one row of metrics per combination. Combinations are grouped by their exit settings so each group's
+    exits are computed once; groups run across `max_workers` processes (one per CPU by default), each of
+    which receives the precomputed history once, through the pool initializer.
+    """
+    groups = {}
+    skipped = 0
+    for overrides in expand_grid(grid):
+        if not _is_runnable(apply_overrides(strategy_cfg, overrides)):
+            skipped += 1
+            continue
+        exit_overrides = tuple((k, v) for k, v in overrides.items() if k in EXIT_KEYS)
+        groups.setdefault(exit_overrides, []).append({k: v for k, v in overrides.items() if k not in EXIT_KEYS})
+    if skipped:
+        logging.info(f"Skipping {skipped} grid combinations with k_min above k_max.")
+    combinations = sum(len(entries) for entries in groups.values())
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, combinations))
+    # Large groups are split so every worker gets a share even when few exit settings are swept.
+    chunk = max(1, -(-combinations // (max_workers * 4)))
+    tasks = [(dict(exit_overrides), entries[i:i + chunk])
+             for exit_overrides, entries in groups.items() for i in range(0, len(entries), chunk)]
+    logging.info(f"Sweeping {combinations} combinations of '{strategy_name}' over {len(history)} bars "
+                 f"with {max_workers} worker(s)...")
+
+    state = (history, strategy_name, strategy_cfg, risk_cfg, cooldown)
+    if max_workers == 1:
+        _init_sweep_worker(*state)
+        grouped = [_run_exit_group(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_sweep_worker, initargs=state) as executor:
+            grouped = list(executor.map(_run_exit_group, *zip(*tasks)))
+    return pd.DataFrame([row for rows in grouped for row in rows])
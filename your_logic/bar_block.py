@@ -0,0 +1,59 @@
+# your_logic/bar_block.py
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+
+class BarBlock:
+    """
+    Compact OHLCV bars of one symbol and timeframe: int64 UTC nanosecond timestamps, the four prices as one
+    contiguous (4 x bars) array of `dtype` and volume as int64. Columns the scan never reads (trade_count,
+    vwap) are not kept. Slicing and frame() share the arrays instead of copying them.
+    """
+    __slots__ = ('timestamps', 'prices', 'volume')
+
+    def __init__(self, timestamps, prices, volume):
+        self.timestamps = timestamps
+        self.prices = prices
+        self.volume = volume
+
+    @classmethod
+    def from_frame(cls, df, bars=None, dtype='float32'):
+        """Compact form of the last `bars` rows (all if None) of a UTC-indexed bar frame."""
+        if bars is not None and len(df) > bars:
+            df = df.iloc[-bars:]
+        prices = np.empty((len(PRICE_COLUMNS), len(df)), dtype=dtype)
+        for row, col in zip(prices, PRICE_COLUMNS):
+            row[:] = df[col].to_numpy()
+        volume = np.nan_to_num(df['volume'].to_numpy(dtype='f8')).round().astype('i8')
+        return cls(df.index.asi8, prices, volume)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.prices.nbytes + self.volume.nbytes
+
+    def tail(self, bars):
+        """The newest `bars` bars as a view (the whole block if it is not longer)."""
+        if bars is None or len(self) <= bars:
+            return self
+        return BarBlock(self.timestamps[-bars:], self.prices[:, -bars:], self.volume[-bars:])
+
+    def before(self, timestamp):
+        """The bars that start before `timestamp` (a UTC Timestamp) as a view."""
+        end = int(np.searchsorted(self.timestamps, timestamp.value))
+        if end == len(self):
+            return self
+        return BarBlock(self.timestamps[:end], self.prices[:, :end], self.volume[:end])
+
+    def frame(self):
+        """
+        A new DataFrame over the block's arrays, without copying them. Indicator columns can be added to it
+        freely: that never writes into the block, so other frames of the same block are unaffected.
+        """
+        df = pd.DataFrame(self.prices.T, columns=list(PRICE_COLUMNS), copy=False,
+                          index=pd.DatetimeIndex(self.timestamps, tz='UTC', name='timestamp'))
+        df['volume'] = self.volume
+        return df
@@ -0,0 +1,107 @@
+# your_logic/bar_feeds.py
+import asyncio
+import logging
+import threading
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# One closed minute bar; `timestamp` is the bar's start (UTC), as Alpaca stamps bars.
+LiveBar = namedtuple('LiveBar', ['symbol', 'timestamp', 'open', 'high', 'low', 'close', 'volume'])
+
+def _to_utc(timestamp):
+    if isinstance(timestamp, (int, np.integer)):
+        return pd.Timestamp(int(timestamp), unit='ns', tz='UTC')
+    timestamp = pd.Timestamp(timestamp)
+    return timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
+
+class AlpacaBarFeed:
+    """
+    Real-time minute bars from Alpaca's market data stream for the given symbols. The stream's public
+    run() blocks in an event loop of its own, so it runs on a dedicated thread and hands bars over to
+    the consumer's loop.
+    """
+    def __init__(self, stream, symbols, queue_size=10000):
+        self.stream = stream
+        self.symbols = list(symbols)
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.loop = None
+
+    def now(self):
+        """The feed's clock: wall-clock time."""
+        return pd.Timestamp.now(tz='UTC')
+
+    async def _on_bar(self, bar):
+        # Called on the stream thread's event loop.
+        live_bar = LiveBar(bar.symbol, _to_utc(bar.timestamp), float(bar.open), float(bar.high),
+                           float(bar.low), float(bar.close), float(bar.volume))
+        self.loop.call_soon_threadsafe(self._put, live_bar)
+
+    def _put(self, live_bar):
+        try:
+            self.queue.put_nowait(live_bar)
+        except asyncio.QueueFull:
+            logging.warning(f"Live bar queue full; dropping {live_bar.symbol} bar at {live_bar.timestamp}.")
+
+    async def bars(self):
+        self.loop = asyncio.get_running_loop()
+        self.stream.subscribe_bars(self._on_bar, *self.symbols)
+        runner = threading.Thread(target=self.stream.run, name="bar-stream", daemon=True)
+        runner.start()
+        logging.info(f"Subscribed to minute bars for {len(self.symbols)} symbols.")
+        try:
+            while True:
+                yield await self.queue.get()
+        finally:
+            try:
+                await asyncio.to_thread(self.stream.stop)
+            except Exception as e:
+                logging.warning(f"Error stopping the bar stream: {e}")
+
+class ReplayBarFeed:
+    """
+    Replays stored minute bars in timestamp order, as a stand-in for the live stream in tests and demos.
+    `speed` is the speed-up over real time (60 = one minute per second); 0 replays as fast as possible.
+    """
+    def __init__(self, frames, speed=0):
+        self.frames = frames
+        self.speed = speed
+        # Start of the minute bar replayed last, and the loop time it was replayed at.
+        self.position = None
+        self.replayed_at = None
+
+    @property
+    def start(self):
+        """Timestamp of the first replayed bar; history used alongside the replay should end here."""
+        starts = [df.index[0] for df in self.frames.values() if df is not None and not df.empty]
+        return min(starts) if starts else None
+
+    def now(self):
+        """
+        The feed's clock in replayed time: a minute bar is published when its minute ends, and time then
+        moves on at `speed` times real time until the next one.
+        """
+        if self.position is None:
+            return self.start or pd.Timestamp.now(tz='UTC')
+        elapsed = (asyncio.get_running_loop().time() - self.replayed_at) * self.speed
+        return self.position + pd.Timedelta(minutes=1) + pd.Timedelta(seconds=elapsed)
+
+    async def bars(self):
+        parts = [df[['open', 'high', 'low', 'close', 'volume']].assign(symbol=symbol)
+                 for symbol, df in self.frames.items() if df is not None and not df.empty]
+        if not parts:
+            return
+        merged = pd.concat(parts)
+        order = np.argsort(merged.index.asi8, kind='stable')
+        timestamps = merged.index[order]
+        values = merged[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype='f8')[order]
+        symbols = merged['symbol'].to_numpy()[order]
+        logging.info(f"Replaying {len(merged)} minute bars for {len(parts)} symbols.")
+
+        previous = None
+        for timestamp, symbol, (o, h, l, c, v) in zip(timestamps, symbols, values):
+            if previous is not None and timestamp != previous:
+                await asyncio.sleep((timestamp - previous).total_seconds() / self.speed if self.speed else 0)
+            previous = timestamp
+            self.position, self.replayed_at = timestamp, asyncio.get_running_loop().time()
+            yield LiveBar(symbol, timestamp, o, h, l, c, v)
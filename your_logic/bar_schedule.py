@@ -0,0 +1,143 @@
+# your_logic/bar_schedule.py
+from datetime import date, datetime, time, timedelta
+import pandas as pd
+from apscheduler.triggers.base import BaseTrigger
+
+# --- Bar buckets ---
+# Intraday bars are anchored to UTC midnight like the resampler and Alpaca's aggregated bars; daily and
+# weekly bars follow the New York calendar, which is how the API stamps them.
+INTRADAY_FREQ = {"1m": "1min", "5m": "5min", "15m": "15min", "1h": "1h", "4h": "4h"}
+SESSION_TZ = "America/New_York"
+# Longest run of days without a session the calendar looks across (weekends plus the longest closures).
+MAX_CLOSED_DAYS = 10
+
+def bucket_bounds(timestamp, timeframe):
+    """(start, end) in UTC of the `timeframe` bar that contains `timestamp`."""
+    freq = INTRADAY_FREQ.get(timeframe)
+    if freq:
+        start = timestamp.floor(freq)
+        return start, start + pd.Timedelta(freq)
+    local = timestamp.tz_convert(SESSION_TZ).normalize()
+    if timeframe == '1w':
+        local -= pd.DateOffset(days=local.weekday())
+    end = local + pd.DateOffset(days=7 if timeframe == '1w' else 1)
+    return local.tz_convert('UTC'), end.tz_convert('UTC')
+
+# --- Market sessions ---
+
+class MarketCalendar:
+    """
+    Trading sessions: weekdays other than `holidays`, from `open` to `close` New York time. Bars only
+    change during a session, so a bar is closed once its bucket has ended or no session time is left in it.
+    """
+    def __init__(self, open="04:00", close="20:00", holidays=()):
+        self.open = time.fromisoformat(open)
+        self.close = time.fromisoformat(close)
+        # YAML reads unquoted dates as date objects, quoted ones as strings.
+        self.holidays = {date.fromisoformat(str(day)) for day in holidays}
+
+    @classmethod
+    def from_config(cls, schedule_cfg):
+        return cls(schedule_cfg.get('session_open', "04:00"), schedule_cfg.get('session_close', "20:00"),
+                   schedule_cfg.get('holidays') or ())
+
+    def session(self, day):
+        """(open, close) of `day` as UTC Timestamps, or None when there is no session that day."""
+        if day.weekday() >= 5 or day in self.holidays:
+            return None
+        return tuple(pd.Timestamp(datetime.combine(day, moment)).tz_localize(SESSION_TZ).tz_convert('UTC')
+                     for moment in (self.open, self.close))
+
+    def last_trading_time(self, t):
+        """`t` if a session is open then, else the close of the latest session before it."""
+        day = t.tz_convert(SESSION_TZ).date()
+        for _ in range(MAX_CLOSED_DAYS):
+            session = self.session(day)
+            if session is not None and session[0] < t:
+                return min(t, session[1])
+            day -= timedelta(days=1)
+        return t
+
+    def next_trading_time(self, t):
+        """`t` if a session is open then, else the open of the next session."""
+        day = t.tz_convert(SESSION_TZ).date()
+        for _ in range(MAX_CLOSED_DAYS):
+            session = self.session(day)
+            if session is not None and t < session[1]:
+                return max(t, session[0])
+            day += timedelta(days=1)
+        return t
+
+    def closed_bar(self, timeframe, now):
+        """
+        (key, cutoff) of `timeframe` at `now`: bars starting before `cutoff` are closed, and `key` is when
+        the newest of them stopped changing, so it moves on only when another bar closes.
+        """
+        start, end = bucket_bounds(now, timeframe)
+        cutoff = start if self.next_trading_time(now) < end else end
+        return self.last_trading_time(cutoff), cutoff
+
+    def next_bar_close(self, timeframe, now):
+        """When the next `timeframe` bar closes: at its bucket's end, or at the last session close before that."""
+        resumes = self.next_trading_time(now)
+        return self.last_trading_time(bucket_bounds(resumes, timeframe)[1])
+
+class BarCloseTrigger(BaseTrigger):
+    """
+    APScheduler trigger that fires `settle_seconds` after the next bar of any of `timeframes` closes, and
+    no sooner than `min_interval` seconds after the previous run. Nights, weekends and holidays stay idle.
+    """
+    def __init__(self, calendar, timeframes, settle_seconds=10, min_interval=0):
+        self.calendar = calendar
+        self.timeframes = list(timeframes)
+        self.settle = pd.Timedelta(seconds=settle_seconds)
+        self.min_interval = pd.Timedelta(seconds=min_interval)
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        moment = pd.Timestamp(now).tz_convert('UTC') - self.settle
+        fire = min(self.calendar.next_bar_close(tf, moment) for tf in self.timeframes) + self.settle
+        if previous_fire_time is not None:
+            fire = max(fire, pd.Timestamp(previous_fire_time).tz_convert('UTC') + self.min_interval)
+        return fire.to_pydatetime()
+
+    def __str__(self):
+        return f"bar close of {', '.join(self.timeframes)}"
+
+# --- Results of the pairs whose bars have not changed ---
+
+class EvaluationCache:
+    """
+    The closed bar each (symbol, timeframe) was last evaluated on, with its profile and result row (or
+    None), so a bar-close scan only re-evaluates pairs that have a newer closed bar. Also keeps the
+    prefilter's outcome until the daily bar it was based on changes. Cleared when the config is reloaded.
+    """
+    def __init__(self):
+        self.config = None
+        self.evaluated = {}
+        # (daily bar key, universe, survivors, symbols that had no daily bars)
+        self.prefilter = None
+
+    def bind(self, config):
+        if config is not self.config:
+            self.config = config
+            self.evaluated.clear()
+            self.prefilter = None
+
+    def plan(self, symbol_config, timeframes, keys):
+        """
+        Returns ({symbol: {timeframe, ...}} of the pairs to evaluate, [result rows of the other pairs]).
+        Pairs of symbols no longer scanned are forgotten.
+        """
+        self.evaluated = {pair: entry for pair, entry in self.evaluated.items() if pair[0] in symbol_config}
+        due, kept = {}, []
+        for symbol, profile in symbol_config.items():
+            for timeframe in timeframes:
+                entry = self.evaluated.get((symbol, timeframe))
+                if entry is None or entry[0] != keys[timeframe] or entry[1] != profile:
+                    due.setdefault(symbol, set()).add(timeframe)
+                elif entry[2] is not None:
+                    kept.append(entry[2])
+        return due, kept
+
+    def record(self, symbol, timeframe, profile, key, result):
+        self.evaluated[(symbol, timeframe)] = (key, profile, result)
@@ -0,0 +1,95 @@
+# your_logic/bar_store.py
+import os
+import threading
+import logging
+import numpy as np
+import pandas as pd
+
+# One fixed-width record per bar; files are plain arrays of these records so they can be
+# appended to in place and memory-mapped for reads.
+BAR_DTYPE = np.dtype([
+    ('timestamp', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+    ('close', '<f8'), ('volume', '<f8'), ('trade_count', '<f8'), ('vwap', '<f8'),
+])
+BAR_COLUMNS = [name for name in BAR_DTYPE.names if name != 'timestamp']
+
+class BarStore:
+    """
+    On-disk OHLCV store with one append-only, memory-mapped record file per symbol and timeframe.
+    Bars older than `retention_days` are dropped when the expired share of a file exceeds
+    `compact_ratio`, so files stay small without being rewritten on every append.
+    """
+    def __init__(self, path="data/bars", retention_days=120, compact_ratio=0.25):
+        self.path = path
+        self.retention = pd.Timedelta(days=retention_days)
+        self.compact_ratio = compact_ratio
+        self._lock = threading.Lock()
+
+    def _file(self, symbol, timeframe):
+        return os.path.join(self.path, timeframe, f"{symbol}.bars")
+
+    def _read(self, filepath):
+        count = os.path.getsize(filepath) // BAR_DTYPE.itemsize if os.path.exists(filepath) else 0
+        if not count:
+            return np.empty(0, dtype=BAR_DTYPE)
+        # A torn trailing record from an interrupted write is ignored and later overwritten.
+        return np.memmap(filepath, dtype=BAR_DTYPE, mode='r', shape=(count,))
+
+    def load(self, symbol, timeframe, start=None):
+        """Returns stored bars (optionally from `start` onwards) as a UTC-indexed DataFrame, or None."""
+        with self._lock:
+            records = self._read(self._file(symbol, timeframe))
+            if start is not None and len(records):
+                start_ts = pd.Timestamp(start)
+                start_ts = start_ts.tz_localize('UTC') if start_ts.tzinfo is None else start_ts
+                records = records[np.searchsorted(records['timestamp'], start_ts.value, side='left'):]
+            if not len(records):
+                return None
+            df = pd.DataFrame({col: np.array(records[col]) for col in BAR_COLUMNS},
+                              index=pd.DatetimeIndex(np.array(records['timestamp']), tz='UTC', name='timestamp'))
+        df['trade_count'] = df['trade_count'].astype('int64')
+        return df
+
+    def last_timestamp(self, symbol, timeframe):
+        """Returns the timestamp of the newest stored bar, or None."""
+        with self._lock:
+            records = self._read(self._file(symbol, timeframe))
+            if not len(records):
+                return None
+            return pd.Timestamp(int(records['timestamp'][-1]), tz='UTC')
+
+    def append(self, symbol, timeframe, df):
+        """
+        Appends bars to the store. Stored bars at or after the first new timestamp are replaced,
+        since the previous newest bar may have been fetched while it was still forming.
+        """
+        if df is None or df.empty:
+            return
+        new_records = np.zeros(len(df), dtype=BAR_DTYPE)
+        new_records['timestamp'] = df.index.tz_convert('UTC').asi8
+        for col in BAR_COLUMNS:
+            if col in df.columns:
+                new_records[col] = df[col].to_numpy(dtype='f8')
+
+        filepath = self._file(symbol, timeframe)
+        with self._lock:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            records = self._read(filepath)
+            keep = int(np.searchsorted(records['timestamp'], new_records['timestamp'][0], side='left'))
+            cutoff = (pd.Timestamp.now(tz='UTC') - self.retention).value
+            expired = int(np.searchsorted(records['timestamp'][:keep], cutoff, side='left'))
+
+            if keep and expired / keep >= self.compact_ratio:
+                # --- Compaction: rewrite the file without the expired bars ---
+                merged = np.concatenate([np.array(records[expired:keep]), new_records])
+                del records
+                tmp_path = filepath + '.tmp'
+                merged.tofile(tmp_path)
+                os.replace(tmp_path, filepath)
+                logging.info(f"Compacted bar store for {symbol} on {timeframe}: dropped {expired} expired bars.")
+                return
+            del records
+            # --- Fast path: truncate any overlap and append the new records in place ---
+            with open(filepath, 'ab') as f:
+                f.truncate(keep * BAR_DTYPE.itemsize)
+                f.write(new_records.tobytes())
@@ -0,0 +1,133 @@
+# your_logic/bars_client.py
+import asyncio
+import json
+import logging
+from operator import itemgetter
+import aiohttp
+import numpy as np
+import pandas as pd
+from your_logic.request_scheduler import record_rate_headers
+
+try:
+    import orjson  # Optional: decodes large pages several times faster than json
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+DATA_URL = "https://data.alpaca.markets"
+# Response field -> (column, dtype), in the column order of alpaca_trade_api's bars DataFrames.
+BAR_FIELDS = {"o": ("open", "f8"), "h": ("high", "f8"), "l": ("low", "f8"), "c": ("close", "f8"),
+              "v": ("volume", "i8"), "n": ("trade_count", "i8"), "vw": ("vwap", "f8")}
+# Fields a bar may come without (e.g. bars of feeds that do not report them), and the value used instead.
+BAR_DEFAULTS = {"n": 0, "vw": float('nan')}
+
+class BarsAPIError(Exception):
+    """A non-2xx answer of the bars endpoint; `response` carries its headers (e.g. rate-limit reset)."""
+    def __init__(self, status_code, message, response):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+        self.response = response
+
+class _SymbolColumns:
+    """A symbol's bars as they arrive page by page: one preallocated array per field and page."""
+    __slots__ = ('times', 'columns')
+
+    def __init__(self):
+        self.times = []
+        self.columns = {field: [] for field in BAR_FIELDS}
+
+    def add(self, bars):
+        n = len(bars)
+        self.times.append(np.fromiter(map(itemgetter('t'), bars), dtype=object, count=n))
+        for field, (_, dtype) in BAR_FIELDS.items():
+            if field in BAR_DEFAULTS:
+                default = BAR_DEFAULTS[field]
+                values = (bar.get(field, default) for bar in bars)
+            else:
+                values = map(itemgetter(field), bars)
+            self.columns[field].append(np.fromiter(values, dtype=dtype, count=n))
+
+    def frame(self):
+        times = self.times[0] if len(self.times) == 1 else np.concatenate(self.times)
+        index = pd.DatetimeIndex(pd.to_datetime(times, utc=True, format='ISO8601'), name='timestamp')
+        data = {column: (self.columns[field][0] if len(self.columns[field]) == 1 else np.concatenate(self.columns[field]))
+                for field, (column, _) in BAR_FIELDS.items()}
+        return pd.DataFrame(data, index=index, copy=False)
+
+class AsyncBarsClient:
+    """
+    Async client for Alpaca's multi-symbol stock bars endpoint, on one pooled keep-alive HTTP session per
+    event loop. Each page is decoded straight into per-symbol NumPy columns while the next page is already
+    being requested, and the result is one UTC-indexed frame per symbol, like the REST client's after
+    data_fetcher.split_by_symbol. `base_url` can point at a local stand-in (benchmarks/fake_server.py).
+    """
+    def __init__(self, key_id, secret_key, base_url=DATA_URL, max_connections=16, timeout=30, page_limit=10000):
+        self.base_url = base_url.rstrip('/')
+        self.headers = {"APCA-API-KEY-ID": key_id or "", "APCA-API-SECRET-KEY": secret_key or ""}
+        self.max_connections = max_connections
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.page_limit = page_limit
+        self._sessions = {}
+
+    def _session(self):
+        # aiohttp sessions belong to the loop that created them; each asyncio.run gets its own.
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            self._sessions = {l: s for l, s in self._sessions.items() if not l.is_closed()}
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            session = self._sessions[loop] = aiohttp.ClientSession(
+                connector=connector, headers=self.headers, timeout=self.timeout, raise_for_status=False)
+        return session
+
+    async def _page(self, session, params):
+        try:
+            async with session.get(f"{self.base_url}/v2/stocks/bars", params=params) as response:
+                record_rate_headers(response)
+                body = await response.read()
+                if response.status >= 400:
+                    try:
+                        message = _loads(body).get('message', '')
+                    except ValueError:
+                        message = body[:200].decode(errors='replace')
+                    raise BarsAPIError(response.status, message, response)
+        except aiohttp.ClientError as e:
+            # Connection and payload errors alike surface as the builtin ConnectionError, which data_fetcher
+            # retries like any network error.
+            raise ConnectionError(f"bars request failed: {e}") from e
+        return _loads(body)
+
+    async def get_bar_frames(self, symbols, timeframe, start, end, adjustment='raw', feed='iex'):
+        """{symbol: DataFrame} of the bars of `symbols`, following every page; symbols without bars are omitted."""
+        session = self._session()
+        params = {"symbols": ",".join(symbols), "timeframe": timeframe, "start": start, "end": end,
+                  "adjustment": adjustment, "feed": feed, "limit": self.page_limit}
+        params = {key: value for key, value in params.items() if value is not None}
+        by_symbol = {}
+        page = await self._page(session, params)
+        while True:
+            token = page.get('next_page_token')
+            # The next page is in flight while this one is decoded.
+            upcoming = None
+            if token:
+                upcoming = asyncio.ensure_future(self._page(session, {**params, "page_token": token}))
+                await asyncio.sleep(0)  # Lets it send the request before decoding starts
+            try:
+                for symbol, bars in (page.get('bars') or {}).items():
+                    if bars:
+                        by_symbol.setdefault(symbol, _SymbolColumns()).add(bars)
+            except BaseException:
+                if upcoming is not None:
+                    upcoming.cancel()
+                raise
+            if upcoming is None:
+                break
+            page = await upcoming
+        return {symbol: columns.frame() for symbol, columns in by_symbol.items()}
+
+    async def close(self):
+        for loop, session in list(self._sessions.items()):
+            if loop is asyncio.get_running_loop():
+                await session.close()
+        self._sessions.clear()
+        logging.info("Market data client closed.")
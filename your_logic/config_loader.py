@@ -1,8 +1,20 @@
 # your_logic/config_loader.py
+import os
+import threading
+from datetime import date, time
 import yaml
 import logging
+from dataclasses import dataclass
+from your_logic.divergence_calculator import DIVERGENCE_TYPES
+from your_logic.pattern_calculator import PATTERNS
+from your_logic.resampler import RESAMPLE_RULES
+from your_logic.signal_generator import CompiledStrategy
+from your_logic.universe import RULE_KEYS
 
-def load_config(filepath="your_logic/stock_signals_v1.yml"):
+DEFAULT_CONFIG_PATH = "your_logic/stock_signals_v1.yml"
+KNOWN_TIMEFRAMES = ("1m", "5m", "15m", "1h", "4h", "1d", "1w")
+
+def load_config(filepath=DEFAULT_CONFIG_PATH):
     """
     Loads the trading strategy configuration from a YAML file.
     """
@@ -17,3 +29,428 @@ def load_config(filepath="your_logic/stock_signals_v1.yml"):
     except Exception as e:
         logging.error(f"An error occurred while reading the config file: {e}")
         return None
+
+class ConfigError(ValueError):
+    """Raised when a configuration fails validation; carries every problem found."""
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+# --- Resolved parameter objects ---
+
+@dataclass(frozen=True, slots=True)
+class IndicatorParams:
+    """Indicator periods for one timeframe, with per-timeframe overrides and inheritance applied."""
+    slow_vwma: int
+    fast_vwma: int
+    volume_lookback: int
+    stoch_rsi: int
+    stoch_length: int
+    stoch_k: int
+    stoch_d: int
+    buy_bb_std: float
+    sell_bb_std: float
+    atr_period: int
+
+    def stoch_kwargs(self):
+        """The StochRSI parameters in the form the config (and pandas_ta call) uses."""
+        return {'rsi': self.stoch_rsi, 'stoch': self.stoch_length, 'k': self.stoch_k, 'd': self.stoch_d}
+
+    def lookback_bars(self, warmup=0):
+        """
+        Bars needed for every indicator on the newest bar to be fully formed. The Bollinger Bands run over
+        slow_vwma values of the slow VWMA; the recursive (RMA) smoothing in StochRSI and ATR also gets
+        `warmup` bars for its seed value to fade out.
+        """
+        windowed = max(2 * self.slow_vwma - 1, self.fast_vwma, self.volume_lookback)
+        recursive = max(self.stoch_rsi + self.stoch_length + self.stoch_k + self.stoch_d, self.atr_period + 1) + warmup
+        return max(windowed, recursive)
+
+@dataclass(frozen=True, slots=True)
+class ResolvedParams:
+    """Everything the scan needs for one (profile, timeframe), resolved once per config load."""
+    profile: str
+    timeframe: str
+    strategy_name: str
+    strategy: CompiledStrategy
+    indicators: IndicatorParams
+
+def resolve_indicator_params(config, timeframe):
+    """Resolves the configured indicator periods for a timeframe, applying per-timeframe overrides and inheritance."""
+    default_cfg = config['defaults']
+    indicators_cfg = default_cfg['indicators']
+    vwma_periods = indicators_cfg['vwma_period_by_tf'].get(timeframe, {})
+    stoch_params_base = default_cfg['stoch_rsi_params']
+    stoch_params_tf = stoch_params_base.get(timeframe, stoch_params_base['1d'])
+    stoch = stoch_params_base.get(stoch_params_tf.get('inherit'), stoch_params_tf)
+    return IndicatorParams(
+        slow_vwma=vwma_periods.get('slow', indicators_cfg['vwma_slow_period_default']),
+        fast_vwma=vwma_periods.get('fast', indicators_cfg['vwma_fast_period_default']),
+        volume_lookback=indicators_cfg.get('volume_lookback_period', 20),
+        stoch_rsi=stoch.get('rsi', 14),
+        stoch_length=stoch.get('stoch', 14),
+        stoch_k=stoch.get('k', 3),
+        stoch_d=stoch.get('d', 3),
+        buy_bb_std=indicators_cfg.get('buy_bb_stddev', 2.0),
+        sell_bb_std=indicators_cfg.get('sell_bb_stddev', 2.0),
+        atr_period=default_cfg['risk_management']['atr_period'],
+    )
+
+def resolve_lookback(config, params):
+    """
+    Bars kept per timeframe for a scan: the indicators' lookback plus the divergence search window.
+    None when divergence runs over the full history, which trimming would change.
+    """
+    default_cfg = config['defaults']
+    div_cfg = default_cfg.get('divergence', {})
+    bars = params.lookback_bars(default_cfg.get('scan', {}).get('warmup_bars', 200))
+    if div_cfg.get('enabled', False):
+        if not div_cfg.get('latest_only', False):
+            return None
+        bars += div_cfg.get('lookback', 100)
+    return bars
+
+# --- Validation ---
+
+def _is_positive_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+def _is_positive_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
+def _section(parent, key, where, errors, kind=dict):
+    """
+    parent[key] when it is a `kind`, or an empty one when absent. Anything else (null included, since
+    the callers read it with .get(key, {})) is reported and replaced by an empty one.
+    """
+    if key not in parent:
+        return kind()
+    value = parent[key]
+    if not isinstance(value, kind):
+        errors.append(f"{where} must be a {'mapping' if kind is dict else 'list'}")
+        return kind()
+    return value
+
+def validate_config(config):
+    """Returns a list of human-readable problems with the configuration (empty if it is valid)."""
+    if not isinstance(config, dict):
+        return ["configuration must be a mapping"]
+    errors = []
+    defaults = config.get('defaults')
+    profiles = config.get('asset_profiles')
+    if not isinstance(defaults, dict):
+        return ["'defaults' section is missing"]
+    if not isinstance(profiles, dict) or not profiles:
+        errors.append("'asset_profiles' must define at least one profile")
+        profiles = {}
+
+    timeframes = defaults.get('timeframes_to_test')
+    if not isinstance(timeframes, list) or not timeframes:
+        errors.append("defaults.timeframes_to_test must be a non-empty list")
+        timeframes = []
+    errors += [f"defaults.timeframes_to_test: unknown timeframe '{tf}'" for tf in timeframes if tf not in KNOWN_TIMEFRAMES]
+
+    # --- Strategies ---
+    strategies = defaults.get('strategies')
+    if not isinstance(strategies, dict) or not strategies:
+        errors.append("defaults.strategies must define at least one strategy")
+        strategies = {}
+    for name, strategy_cfg in strategies.items():
+        where = f"defaults.strategies.{name}"
+        if not isinstance(strategy_cfg, dict):
+            errors.append(f"{where} must be a mapping")
+            continue
+        prox_cfg = _section(strategy_cfg, 'proximity_check', f"{where}.proximity_check", errors)
+        if prox_cfg.get('enabled', False):
+            if prox_cfg.get('ma_column', 'vwma_slow') not in ('vwma_slow', 'vwma_fast'):
+                errors.append(f"{where}.proximity_check.ma_column must be 'vwma_slow' or 'vwma_fast'")
+            if not _is_positive_number(prox_cfg.get('proximity_pct', 1.0)):
+                errors.append(f"{where}.proximity_check.proximity_pct must be a positive number")
+        stoch_cfg = _section(strategy_cfg, 'stoch_check', f"{where}.stoch_check", errors)
+        if stoch_cfg.get('enabled', False):
+            k_min, k_max = stoch_cfg.get('k_min', 0), stoch_cfg.get('k_max', 100)
+            if not (isinstance(k_min, (int, float)) and isinstance(k_max, (int, float)) and 0 <= k_min <= k_max <= 100):
+                errors.append(f"{where}.stoch_check needs 0 <= k_min <= k_max <= 100")
+        for key in ('stop_loss_atr_multiple', 'take_profit_atr_multiple'):
+            if key in strategy_cfg and not _is_positive_number(strategy_cfg[key]):
+                errors.append(f"{where}.{key} must be a positive number")
+
+    # --- Profiles ---
+    for profile, tf_cfgs in profiles.items():
+        if not isinstance(tf_cfgs, dict):
+            errors.append(f"asset_profiles.{profile} must be a mapping of timeframe to strategy")
+            continue
+        for tf, profile_cfg in tf_cfgs.items():
+            where = f"asset_profiles.{profile}.{tf}"
+            if tf not in KNOWN_TIMEFRAMES:
+                errors.append(f"{where}: unknown timeframe")
+            strategy_name = profile_cfg.get('strategy') if isinstance(profile_cfg, dict) else None
+            if strategy_name not in strategies:
+                errors.append(f"{where}: unknown strategy '{strategy_name}'")
+
+    # A timeframe no profile assigns a strategy to would be fetched every scan and never evaluated.
+    mapped = {tf for tf_cfgs in profiles.values() if isinstance(tf_cfgs, dict) for tf in tf_cfgs}
+    errors += [f"defaults.timeframes_to_test: no asset profile has a strategy for '{tf}'"
+               for tf in timeframes if tf in KNOWN_TIMEFRAMES and tf not in mapped]
+
+    # --- Indicators ---
+    indicators_cfg = defaults.get('indicators')
+    if not isinstance(indicators_cfg, dict):
+        errors.append("defaults.indicators section is missing")
+    else:
+        for key in ('vwma_slow_period_default', 'vwma_fast_period_default'):
+            if not _is_positive_int(indicators_cfg.get(key)):
+                errors.append(f"defaults.indicators.{key} must be a positive integer")
+        if not _is_positive_int(indicators_cfg.get('volume_lookback_period', 20)):
+            errors.append("defaults.indicators.volume_lookback_period must be a positive integer")
+        for key in ('buy_bb_stddev', 'sell_bb_stddev'):
+            if not _is_positive_number(indicators_cfg.get(key, 2.0)):
+                errors.append(f"defaults.indicators.{key} must be a positive number")
+        by_tf = indicators_cfg.get('vwma_period_by_tf')
+        if not isinstance(by_tf, dict):
+            errors.append("defaults.indicators.vwma_period_by_tf must be a mapping")
+        else:
+            for tf, periods in by_tf.items():
+                if not isinstance(periods, dict):
+                    errors.append(f"defaults.indicators.vwma_period_by_tf.{tf} must be a mapping")
+                    continue
+                for key, value in periods.items():
+                    if not _is_positive_int(value):
+                        errors.append(f"defaults.indicators.vwma_period_by_tf.{tf}.{key} must be a positive integer")
+
+    stoch_params = defaults.get('stoch_rsi_params')
+    if not isinstance(stoch_params, dict) or '1d' not in stoch_params:
+        errors.append("defaults.stoch_rsi_params must define at least '1d' (the fallback)")
+    else:
+        for tf, params in stoch_params.items():
+            where = f"defaults.stoch_rsi_params.{tf}"
+            if not isinstance(params, dict):
+                errors.append(f"{where} must be a mapping")
+            elif 'inherit' in params:
+                target = stoch_params.get(params['inherit'])
+                if not isinstance(target, dict) or 'inherit' in target:
+                    errors.append(f"{where}.inherit must name a timeframe with its own parameters")
+            else:
+                errors += [f"{where}.{key} must be a positive integer" for key in ('rsi', 'stoch', 'k', 'd')
+                           if key in params and not _is_positive_int(params[key])]
+
+    risk_cfg = defaults.get('risk_management')
+    if not isinstance(risk_cfg, dict) or not _is_positive_int(risk_cfg.get('atr_period')):
+        errors.append("defaults.risk_management.atr_period must be a positive integer")
+
+    pattern_sets = defaults.get('pattern_sets')
+    if not isinstance(pattern_sets, dict):
+        errors.append("defaults.pattern_sets section is missing")
+    else:
+        for side in ('bullish', 'bearish'):
+            errors += [f"defaults.pattern_sets.{side}: unknown pattern '{name}'"
+                       for name in _section(pattern_sets, side, f"defaults.pattern_sets.{side}", errors, list)
+                       if name not in PATTERNS]
+        latest_bars = pattern_sets.get('latest_bars', 0)
+        if not (latest_bars == 0 or _is_positive_int(latest_bars)):
+            errors.append("defaults.pattern_sets.latest_bars must be a non-negative integer")
+
+    div_cfg = defaults.get('divergence', {})
+    if not isinstance(div_cfg, dict):
+        errors.append("defaults.divergence must be a mapping")
+    else:
+        types_cfg = _section(div_cfg, 'types', "defaults.divergence.types", errors)
+        for side in ('buy', 'sell'):
+            errors += [f"defaults.divergence.types.{side}: unknown divergence type '{t}'"
+                       for t in _section(types_cfg, side, f"defaults.divergence.types.{side}", errors, list)
+                       if t not in DIVERGENCE_TYPES]
+        _section(div_cfg, 'pivots', "defaults.divergence.pivots", errors)
+        if not _is_positive_int(div_cfg.get('lookback', 100)):
+            errors.append("defaults.divergence.lookback must be a positive integer")
+
+    # --- Scan settings ---
+    scan_cfg = defaults.get('scan', {})
+    if not isinstance(scan_cfg, dict):
+        errors.append("defaults.scan must be a mapping")
+    else:
+        for key in ('max_concurrent_requests', 'batch_size', 'compute_chunk_size'):
+            if key in scan_cfg and not _is_positive_int(scan_cfg[key]):
+                errors.append(f"defaults.scan.{key} must be a positive integer")
+        if scan_cfg.get('market_data_client', 'async') not in ('async', 'rest'):
+            errors.append("defaults.scan.market_data_client must be 'async' or 'rest'")
+        rate_cfg = _section(scan_cfg, 'rate_limit', "defaults.scan.rate_limit", errors)
+        for key in ('burst', 'retries'):
+            if key in rate_cfg and not _is_positive_int(rate_cfg[key]):
+                errors.append(f"defaults.scan.rate_limit.{key} must be a positive integer")
+        for key in ('backoff_seconds', 'max_backoff_seconds'):
+            if key in rate_cfg and not _is_positive_number(rate_cfg[key]):
+                errors.append(f"defaults.scan.rate_limit.{key} must be a positive number")
+        if 'requests_per_minute' in rate_cfg and not (_is_positive_number(rate_cfg['requests_per_minute']) or rate_cfg['requests_per_minute'] == 0):
+            errors.append("defaults.scan.rate_limit.requests_per_minute must be a positive number, or 0 for no limit")
+        if scan_cfg.get('indicator_mode', 'batch') not in ('batch', 'incremental', 'panel'):
+            errors.append("defaults.scan.indicator_mode must be 'batch', 'incremental' or 'panel'")
+        if scan_cfg.get('compute_executor', 'thread') not in ('thread', 'process'):
+            errors.append("defaults.scan.compute_executor must be 'thread' or 'process'")
+        if not _is_positive_int(scan_cfg.get('history_days', 90)):
+            errors.append("defaults.scan.history_days must be a positive integer")
+        warmup = scan_cfg.get('warmup_bars', 200)
+        if not (isinstance(warmup, int) and not isinstance(warmup, bool) and warmup >= 0):
+            errors.append("defaults.scan.warmup_bars must be a non-negative integer")
+        if scan_cfg.get('bar_dtype', 'float32') not in ('float32', 'float64'):
+            errors.append("defaults.scan.bar_dtype must be 'float32' or 'float64'")
+        live_cfg = _section(scan_cfg, 'live', "defaults.scan.live", errors)
+        if live_cfg.get('feed', 'alpaca') not in ('alpaca', 'replay'):
+            errors.append("defaults.scan.live.feed must be 'alpaca' or 'replay'")
+        if not _is_positive_int(live_cfg.get('max_bars', 2000)):
+            errors.append("defaults.scan.live.max_bars must be a positive integer")
+        grace = live_cfg.get('close_grace_seconds', 10)
+        if not (isinstance(grace, (int, float)) and not isinstance(grace, bool) and grace >= 0):
+            errors.append("defaults.scan.live.close_grace_seconds must be a non-negative number")
+        schedule_cfg = _section(scan_cfg, 'schedule', "defaults.scan.schedule", errors)
+        if schedule_cfg.get('mode', 'interval') not in ('bar_close', 'interval'):
+            errors.append("defaults.scan.schedule.mode must be 'bar_close' or 'interval'")
+        try:
+            if time.fromisoformat(schedule_cfg.get('session_open', "04:00")) >= time.fromisoformat(schedule_cfg.get('session_close', "20:00")):
+                errors.append("defaults.scan.schedule.session_open must be before session_close")
+        except (TypeError, ValueError):
+            errors.append("defaults.scan.schedule.session_open and session_close must be HH:MM times")
+        settle = schedule_cfg.get('settle_seconds', 10)
+        if not (isinstance(settle, (int, float)) and not isinstance(settle, bool) and settle >= 0):
+            errors.append("defaults.scan.schedule.settle_seconds must be a non-negative number")
+        holidays = schedule_cfg.get('holidays') or []
+        if not isinstance(holidays, list):
+            errors.append("defaults.scan.schedule.holidays must be a list")
+            holidays = []
+        for day in holidays:
+            try:
+                date.fromisoformat(str(day))
+            except ValueError:
+                errors.append(f"defaults.scan.schedule.holidays: '{day}' is not a YYYY-MM-DD date")
+        for derived, base in _section(scan_cfg, 'resample_from', "defaults.scan.resample_from", errors).items():
+            if derived not in RESAMPLE_RULES:
+                errors.append(f"defaults.scan.resample_from.{derived}: no resampling rule for this timeframe")
+            elif base not in KNOWN_TIMEFRAMES:
+                errors.append(f"defaults.scan.resample_from.{derived}: unknown base timeframe '{base}'")
+        cluster_cfg = _section(scan_cfg, 'cluster', "defaults.scan.cluster", errors)
+        for key in ('shard_size', 'lease_seconds', 'max_attempts', 'scheduler_lease_seconds'):
+            if key in cluster_cfg and not _is_positive_int(cluster_cfg[key]):
+                errors.append(f"defaults.scan.cluster.{key} must be a positive integer")
+        if 'poll_seconds' in cluster_cfg and not _is_positive_number(cluster_cfg['poll_seconds']):
+            errors.append("defaults.scan.cluster.poll_seconds must be a positive number")
+        history_cfg = _section(scan_cfg, 'history', "defaults.scan.history", errors)
+        if 'keep_days' in history_cfg and not _is_positive_int(history_cfg['keep_days']):
+            errors.append("defaults.scan.history.keep_days must be a positive integer")
+        if 'flush_seconds' in history_cfg and not _is_positive_number(history_cfg['flush_seconds']):
+            errors.append("defaults.scan.history.flush_seconds must be a positive number")
+        universe_cfg = _section(scan_cfg, 'universe', "defaults.scan.universe", errors)
+        if universe_cfg.get('source', 'static') not in ('static', 'file', 'assets'):
+            errors.append("defaults.scan.universe.source must be 'static', 'file' or 'assets'")
+        symbols = universe_cfg.get('symbols') or {}
+        if not isinstance(symbols, dict):
+            errors.append("defaults.scan.universe.symbols must be a mapping of symbol to profile")
+            symbols = {}
+        for symbol, profile in symbols.items():
+            if profile is not None and profile not in profiles:
+                errors.append(f"defaults.scan.universe.symbols.{symbol}: unknown profile '{profile}'")
+        for i, rule in enumerate(_section(universe_cfg, 'profile_rules', "defaults.scan.universe.profile_rules", errors, list)):
+            where = f"defaults.scan.universe.profile_rules[{i}]"
+            if not isinstance(rule, dict) or rule.get('profile') not in profiles:
+                errors.append(f"{where} must name a known profile")
+                continue
+            for key, value in rule.items():
+                if key != 'profile' and (key not in RULE_KEYS or not isinstance(value, (int, float))):
+                    errors.append(f"{where}.{key}: expected one of {', '.join(sorted(RULE_KEYS))} with a number")
+        prefilter_cfg = _section(scan_cfg, 'prefilter', "defaults.scan.prefilter", errors)
+        for key in ('min_price', 'max_price', 'min_dollar_volume'):
+            if key in prefilter_cfg and not (isinstance(prefilter_cfg[key], (int, float)) and not isinstance(prefilter_cfg[key], bool)
+                                             and prefilter_cfg[key] >= 0):
+                errors.append(f"defaults.scan.prefilter.{key} must be a non-negative number")
+        if not _is_positive_int(prefilter_cfg.get('liquidity_days', 20)):
+            errors.append("defaults.scan.prefilter.liquidity_days must be a positive integer")
+        _section(scan_cfg, 'bar_store', "defaults.scan.bar_store", errors)
+
+    # --- Backtest settings ---
+    backtest_cfg = defaults.get('backtest', {})
+    if not isinstance(backtest_cfg, dict):
+        errors.append("defaults.backtest must be a mapping")
+    else:
+        if not _is_positive_int(backtest_cfg.get('history_days', 730)):
+            errors.append("defaults.backtest.history_days must be a positive integer")
+        max_workers = backtest_cfg.get('max_workers', 0)
+        if not (max_workers == 0 or _is_positive_int(max_workers)):
+            errors.append("defaults.backtest.max_workers must be a non-negative integer")
+        _section(backtest_cfg, 'symbols', "defaults.backtest.symbols", errors, list)
+        for strategy_name, grid in _section(backtest_cfg, 'grids', "defaults.backtest.grids", errors).items():
+            where = f"defaults.backtest.grids.{strategy_name}"
+            if strategy_name not in strategies:
+                errors.append(f"{where}: unknown strategy")
+            elif not isinstance(grid, dict):
+                errors.append(f"{where} must be a mapping of setting to a list of values")
+            else:
+                errors += [f"{where}.{key} must be a non-empty list" for key, values in grid.items()
+                           if not isinstance(values, list) or not values]
+    return errors
+
+class ScreenerConfig:
+    """
+    A validated configuration with every (profile, timeframe) resolved up-front.
+    `raw` is the parsed YAML and must be treated as read-only; hot paths use `resolve()`.
+    """
+    __slots__ = ('raw', 'path', 'mtime', 'timeframes', 'scan', 'indicators', 'lookbacks', 'resolved')
+
+    def __init__(self, raw, path=None, mtime=None):
+        errors = validate_config(raw)
+        if errors:
+            raise ConfigError(errors)
+        self.raw = raw
+        self.path = path
+        self.mtime = mtime
+        defaults = raw['defaults']
+        self.timeframes = tuple(defaults['timeframes_to_test'])
+        self.scan = defaults.get('scan', {})
+
+        all_timeframes = set(self.timeframes)
+        for tf_cfgs in raw['asset_profiles'].values():
+            all_timeframes.update(tf_cfgs)
+        self.indicators = {tf: resolve_indicator_params(raw, tf) for tf in all_timeframes}
+        self.lookbacks = {tf: resolve_lookback(raw, params) for tf, params in self.indicators.items()}
+
+        strategies = {}
+        self.resolved = {}
+        for profile, tf_cfgs in raw['asset_profiles'].items():
+            for tf, profile_cfg in tf_cfgs.items():
+                name = profile_cfg['strategy']
+                if name not in strategies:
+                    strategies[name] = CompiledStrategy(name, defaults['strategies'][name])
+                self.resolved[(profile, tf)] = ResolvedParams(profile, tf, name, strategies[name], self.indicators[tf])
+
+    def resolve(self, profile, timeframe):
+        """Resolved parameters for (profile, timeframe), or None if the profile has no strategy there."""
+        return self.resolved.get((profile, timeframe))
+
+_config_cache = {}
+_config_lock = threading.Lock()
+
+def get_config(filepath=DEFAULT_CONFIG_PATH):
+    """
+    Returns the ScreenerConfig for `filepath`, parsing the file only when its mtime changes.
+    An edit that fails to parse or validate is rejected: the previous good config stays active.
+    Returns None only if no valid config has been loaded yet.
+    """
+    with _config_lock:
+        cached, rejected_mtime = _config_cache.get(filepath, (None, None))
+        try:
+            mtime = os.stat(filepath).st_mtime_ns
+        except OSError as e:
+            logging.error(f"Cannot read configuration file {filepath}: {e}")
+            return cached
+        if (cached is not None and cached.mtime == mtime) or mtime == rejected_mtime:
+            return cached
+
+        raw = load_config(filepath)
+        try:
+            config = ScreenerConfig(raw, filepath, mtime)
+        except Exception as e:
+            # Anything a malformed file trips over while being resolved counts as a rejection too.
+            logging.error(f"Rejected configuration in {filepath}: {e}" + ("; keeping the previous configuration." if cached else ""))
+            _config_cache[filepath] = (cached, mtime)
+            return cached
+        if cached is not None:
+            logging.info(f"Reloaded configuration from {filepath}")
+        _config_cache[filepath] = (config, None)
+        return config
@@ -1,62 +1,221 @@
 # your_logic/data_fetcher.py
 import pandas as pd
+import numpy as np
 import asyncio
-from alpaca_trade_api.rest import APIError, TimeFrame
+import math
+from alpaca_trade_api.rest import APIError
 import logging
+from your_logic.bars_client import AsyncBarsClient
+from your_logic.request_scheduler import get_request_scheduler, retry_after_seconds, watch
+from your_logic.scan_metrics import CACHE_LOOKUPS, FETCH_BYTES, FETCH_ROWS, count
 
-async def fetch_data(api, symbol, start_date, end_date, interval="1d"):
-    """
-    Fetches historical OHLCV data from Alpaca with robust retry logic and 
-    corrected timeframe handling to match API expectations using string representation.
-    """
-    retries = 5
-    delay = 2
+# --- Use string-based timeframe mapping for robustness ---
+TIMEFRAME_STR_MAP = {
+    "1m": "1Min", "5m": "5Min", "15m": "15Min",
+    "1h": "1Hour", "4h": "4Hour",
+    "1d": "1Day",
+    "1w": "1Week"
+}
 
-    # --- Use string-based timeframe mapping for robustness ---
-    timeframe_str_map = {
-        "1m": "1Min", "5m": "5Min", "15m": "15Min",
-        "1h": "1Hour", "4h": "4Hour",
-        "1d": "1Day",
-        "1w": "1Week"
-    }
+# Bar length in minutes, and the fewest bars a regular session (or week) holds; extended hours only add bars.
+TIMEFRAME_MINUTES = {"1m": 1, "5m": 5, "15m": 15, "1h": 60, "4h": 240, "1d": 1440, "1w": 10080}
+BARS_PER_SESSION = {"1m": 390, "5m": 78, "15m": 26, "1h": 7, "4h": 2, "1d": 1, "1w": 0.2}
+# Longest stretch without bars (a weekend next to a holiday); the first bar of a window can come that late.
+MAX_MARKET_GAP = pd.Timedelta(days=4)
+
+def lookback_days(timeframe, bars):
+    """Calendar days to request so that at least `bars` bars of `timeframe` come back, allowing for weekends and holidays."""
+    sessions = math.ceil(bars / BARS_PER_SESSION[timeframe])
+    return math.ceil(sessions * 7 / 5 * 1.05) + 4
+
+def _covers_start(cached_df, start_date, interval):
+    """True when stored bars reach back to `start_date`: their first bar is no later than the window's first bar can be."""
+    start = pd.Timestamp(start_date)
+    start = start.tz_localize('UTC') if start.tzinfo is None else start
+    return cached_df.index[0] <= start + pd.Timedelta(minutes=TIMEFRAME_MINUTES[interval]) + MAX_MARKET_GAP
 
-    timeframe_for_api = timeframe_str_map.get(interval)
+# Symbols per multi-symbol bars request; keeps the query string well under URL length limits.
+DEFAULT_BATCH_SIZE = 50
+
+def _get_bar_frames(api, symbols, request_args):
+    """Blocking REST client request, split into per-symbol frames; always run off the event loop via asyncio.to_thread."""
+    bars_df = api.get_bars(symbols, **request_args).df
+    return split_by_symbol(bars_df) if not bars_df.empty else {}
+
+def _build_request_args(interval, start_date, end_date):
+    timeframe_for_api = TIMEFRAME_STR_MAP.get(interval)
     if not timeframe_for_api:
         logging.error(f"Unsupported interval provided: {interval}")
         return None
-
-    request_args = {
+    return {
         "timeframe": timeframe_for_api,
         "start": start_date,
         "end": end_date,
         "adjustment": "raw",
         "feed": "iex"
     }
-    
-    logging.info(f"Fetching {interval} data for {symbol} from {start_date} to {end_date}...")
-
-    for i in range(retries):
-        try:
-            bars_df = api.get_bars(symbol, **request_args).df
-            if bars_df.empty:
-                logging.warning(f"No data returned for {symbol} on {interval}.")
-                break
-            
-            bars_df.index = bars_df.index.tz_convert('UTC')
-            bars_df = bars_df[~bars_df.index.duplicated(keep='first')]
-            bars_df.sort_index(inplace=True)
-            
-            logging.info(f"Successfully fetched {len(bars_df)} data points for {symbol} on {interval}.")
-            return bars_df
-
-        except APIError as e:
-            logging.warning(f"Alpaca API error for {symbol} on {interval}: {e}. Retrying... ({i+1}/{retries})")
-            await asyncio.sleep(delay)
-            delay *= 2
-        except Exception as e:
-            logging.warning(f"Network error for {symbol} on {interval}: {e}. Retrying... ({i+1}/{retries})")
-            await asyncio.sleep(delay)
-            delay *= 2
-
-    logging.error(f"Failed to fetch data for {symbol} on {interval} after {retries} retries.")
-    return None
+
+def _retry_reason(error):
+    """
+    (reason, seconds to wait or None) for a retryable request failure, (None, None) for one that would only
+    fail again: throttling, server errors and network errors are retried, other client errors are not.
+    """
+    response = getattr(error, 'response', None)
+    status = getattr(error, 'status_code', None) or getattr(response, 'status_code', None)
+    if status == 429:
+        return 'rate_limited', retry_after_seconds(response)
+    if status is not None:
+        return ('server_error', None) if status >= 500 else (None, None)
+    if isinstance(error, APIError):
+        # An API error without an HTTP response to tell what went wrong.
+        return 'api_error', None
+    if isinstance(error, OSError):
+        # requests' ConnectionError and Timeout are OSErrors too.
+        return 'network', None
+    return None, None
+
+async def _request_frames(api, symbols, request_args, label, interval):
+    """
+    Requests bars through the shared request scheduler: within the account's rate limit, shorter timeframes
+    (whose bars close soonest) first, retrying only retryable failures. Identical requests in flight are
+    made once. `api` is the REST client or an AsyncBarsClient, whose requests need no worker thread.
+    Returns {symbol: DataFrame} (symbols without bars omitted), or None if the request failed.
+    """
+    key = (id(api), tuple(symbols), tuple(sorted(request_args.items())))
+    if isinstance(api, AsyncBarsClient):
+        call, blocking = lambda: api.get_bar_frames(symbols, **request_args), False
+    else:
+        watch(api)
+        call, blocking = lambda: _get_bar_frames(api, symbols, request_args), True
+    return await get_request_scheduler().request(key, call, _retry_reason, priority=TIMEFRAME_MINUTES.get(interval, 0),
+                                                 label=label, timeframe=interval, blocking=blocking)
+
+def _record_fetch(interval, frames):
+    """Counts the rows and in-memory bytes of a response; the HTTP payload itself is not visible here."""
+    if frames:
+        count(FETCH_ROWS, 'fetch_rows', sum(len(df) for df in frames.values()), timeframe=interval)
+        count(FETCH_BYTES, 'fetch_bytes', sum(int(df.memory_usage().sum()) for df in frames.values()), timeframe=interval)
+
+def _merge_with_store(bar_store, symbol, interval, cached_df, bars_df):
+    """Persists freshly fetched bars and splices them onto the stored history."""
+    try:
+        bar_store.append(symbol, interval, bars_df)
+    except OSError as e:
+        logging.warning(f"Could not persist {interval} bars for {symbol}: {e}")
+    if cached_df is None:
+        return bars_df
+    return pd.concat([cached_df[cached_df.index < bars_df.index[0]], bars_df])
+
+async def fetch_data(api, symbol, start_date, end_date, interval="1d", bar_store=None):
+    """
+    Fetches historical OHLCV data from Alpaca with robust retry logic and
+    corrected timeframe handling to match API expectations using string representation.
+    The request never blocks the event loop (see _request_frames).
+    When a `bar_store` is given, only bars from the newest stored bar onwards are requested
+    and merged with the stored history.
+    """
+    request_args = _build_request_args(interval, start_date, end_date)
+    if request_args is None:
+        return None
+
+    # --- Delta fetch: resume from the newest stored bar (refetched in case it was still forming) ---
+    # Stored bars that start later than the window are refetched from its start and replaced.
+    cached_df = bar_store.load(symbol, interval, start=start_date) if bar_store else None
+    covered = cached_df is not None and _covers_start(cached_df, start_date, interval)
+    if bar_store:
+        count(CACHE_LOOKUPS, 'bar_store_hits' if covered else 'bar_store_misses',
+              cache='bar_store', result='hit' if covered else 'miss')
+    if covered:
+        request_args["start"] = cached_df.index[-1].isoformat()
+
+    logging.info(f"Fetching {interval} data for {symbol} from {request_args['start']} to {end_date}...")
+    frames = await _request_frames(api, [symbol], request_args, f"{symbol} on {interval}", interval)
+    _record_fetch(interval, frames)
+
+    bars_df = frames.get(symbol) if frames else None
+    if bars_df is None:
+        if cached_df is not None:
+            logging.info(f"No new bars for {symbol} on {interval}; using {len(cached_df)} stored bars.")
+            return cached_df
+        if frames is not None:
+            logging.warning(f"No data returned for {symbol} on {interval}.")
+        return None
+
+    logging.info(f"Successfully fetched {len(bars_df)} data points for {symbol} on {interval}.")
+    if bar_store:
+        bars_df = _merge_with_store(bar_store, symbol, interval, cached_df, bars_df)
+    return bars_df
+
+def split_by_symbol(bars_df):
+    """
+    Splits a multi-symbol bars frame (timestamp index plus a 'symbol' column) into per-symbol frames.
+    UTC conversion, de-duplication and sorting are applied once to the whole batch; each symbol's
+    frame is then a contiguous slice of the sorted result.
+    """
+    symbols = bars_df.pop('symbol').to_numpy()
+    timestamps = bars_df.index.tz_convert('UTC')
+
+    # Sort by (symbol, timestamp) in one pass; lexsort uses the last key as primary.
+    order = np.lexsort((timestamps.asi8, symbols))
+    bars_df = bars_df.iloc[order]
+    bars_df.index = timestamps[order]
+    symbols = symbols[order]
+
+    keep = np.ones(len(bars_df), dtype=bool)
+    keep[1:] = (symbols[1:] != symbols[:-1]) | (bars_df.index.asi8[1:] != bars_df.index.asi8[:-1])
+    if not keep.all():
+        bars_df = bars_df[keep]
+        symbols = symbols[keep]
+
+    boundaries = np.flatnonzero(symbols[1:] != symbols[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(symbols)]))
+    return {symbols[s]: bars_df.iloc[s:e] for s, e in zip(starts, ends) if e > s}
+
+async def _fetch_chunk(api, symbols, start_date, end_date, interval, bar_store):
+    request_args = _build_request_args(interval, start_date, end_date)
+    if request_args is None:
+        return {}
+
+    cached = {}
+    if bar_store:
+        for symbol in symbols:
+            cached_df = bar_store.load(symbol, interval, start=start_date)
+            if cached_df is not None and _covers_start(cached_df, start_date, interval):
+                cached[symbol] = cached_df
+        count(CACHE_LOOKUPS, 'bar_store_hits', len(cached), cache='bar_store', result='hit')
+        count(CACHE_LOOKUPS, 'bar_store_misses', len(symbols) - len(cached), cache='bar_store', result='miss')
+        # One request per chunk, so resume from the stalest symbol; fully cached chunks fetch only the delta.
+        # Symbols whose stored bars do not reach back to the window start count as uncached.
+        if len(cached) == len(symbols):
+            request_args["start"] = min(df.index[-1] for df in cached.values()).isoformat()
+
+    label = f"{len(symbols)} symbols on {interval}"
+    logging.info(f"Fetching {interval} data for {label} from {request_args['start']} to {end_date}...")
+    frames = await _request_frames(api, list(symbols), request_args, label, interval)
+    _record_fetch(interval, frames)
+
+    frames = frames or {}
+    logging.info(f"Fetched {sum(len(df) for df in frames.values())} data points for {label}.")
+
+    results = {}
+    for symbol in symbols:
+        fresh_df, cached_df = frames.get(symbol), cached.get(symbol)
+        if fresh_df is None:
+            if cached_df is not None:
+                results[symbol] = cached_df
+            continue
+        results[symbol] = _merge_with_store(bar_store, symbol, interval, cached_df, fresh_df) if bar_store else fresh_df
+    return results
+
+async def fetch_data_batch(api, symbols, start_date, end_date, interval="1d", bar_store=None, chunk_size=DEFAULT_BATCH_SIZE):
+    """
+    Fetches bars for many symbols with one paginated multi-symbol request per chunk of `chunk_size`
+    symbols. Returns {symbol: DataFrame}; symbols without data are omitted.
+    """
+    symbols = list(symbols)
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), max(1, chunk_size))]
+    results = {}
+    for chunk_result in await asyncio.gather(*(_fetch_chunk(api, chunk, start_date, end_date, interval, bar_store) for chunk in chunks)):
+        results.update(chunk_result)
+    return results
@@ -4,59 +4,88 @@ import numpy as np
 from scipy.signal import find_peaks
 import logging
 
+# --- Divergence types ---
+# (pivot kind, required sign of the price move, required sign of the oscillator move) between
+# consecutive price pivots; the oscillator move is measured across its own pivots in that window.
+DIVERGENCE_TYPES = {
+    'regular_bullish': ('low', -1, 1),   # Lower low in price, higher low in the oscillator
+    'hidden_bullish': ('low', 1, -1),    # Higher low in price, lower low in the oscillator
+    'regular_bearish': ('high', 1, -1),  # Higher high in price, lower high in the oscillator
+    'hidden_bearish': ('high', -1, 1),   # Lower high in price, higher high in the oscillator
+}
+
+def _no_divergence(df):
+    df['bullish_divergence'] = False
+    df['bearish_divergence'] = False
+    return df
+
+def _pivots(values, kind, prominence, distance):
+    """Positions of the pivot lows or highs of `values`."""
+    peaks, _ = find_peaks(-values if kind == 'low' else values, prominence=prominence, distance=distance)
+    return peaks
+
+def _diverging_pivots(price, price_pivots, osc, osc_pivots, price_sign, osc_sign):
+    """
+    Positions of the price pivots that diverge from the oscillator. Each price pivot is compared with
+    the previous one; the oscillator pivots between them (inclusive) are located with searchsorted.
+    """
+    if len(price_pivots) < 2 or len(osc_pivots) < 2:
+        return price_pivots[:0]
+    prev, cur = price_pivots[:-1], price_pivots[1:]
+    first = np.searchsorted(osc_pivots, prev, side='left')
+    last = np.searchsorted(osc_pivots, cur, side='right') - 1
+    has_pair = last > first
+    first, last = np.minimum(first, len(osc_pivots) - 1), np.maximum(last, 0)
+    price_move = price[cur] - price[prev]
+    osc_move = osc[osc_pivots[last]] - osc[osc_pivots[first]]
+    return cur[has_pair & (price_sign * price_move > 0) & (osc_sign * osc_move > 0)]
+
 def find_divergence(df, div_cfg):
     """
-    Finds bullish and bearish divergences between price and an oscillator.
+    Finds regular and hidden, bullish and bearish divergences between price and an oscillator.
+    With `latest_only`, pivots are searched only in the trailing `lookback` bars and only the most
+    recent pivot pair of each kind is checked, which is all a latest-bar scan needs.
     """
     if not div_cfg or not div_cfg.get('enabled', False):
-        df['bullish_divergence'] = False
-        df['bearish_divergence'] = False
-        return df
+        return _no_divergence(df)
 
     oscillator = div_cfg.get('oscillator', 'stoch_k')
     pivots_cfg = div_cfg.get('pivots', {'left': 3, 'right': 3})
     prominence = div_cfg.get('prominence', 0.1)
+    types_cfg = div_cfg.get('types', {})
+    latest_only = div_cfg.get('latest_only', False)
 
     if oscillator not in df.columns or not pd.api.types.is_numeric_dtype(df[oscillator]):
         logging.warning(f"Oscillator '{oscillator}' not found or not numeric. Skipping divergence calculation.")
-        df['bullish_divergence'] = False
-        df['bearish_divergence'] = False
-        return df
-
-    osc_data = df[oscillator].dropna()
-    if osc_data.empty:
-        df['bullish_divergence'] = False
-        df['bearish_divergence'] = False
-        return df
+        return _no_divergence(df)
 
     # Using distance for separation between peaks
     peak_distance = pivots_cfg.get('left', 5) + pivots_cfg.get('right', 5)
+    offset = max(0, len(df) - div_cfg.get('lookback', 100)) if latest_only else 0
+    osc_values = df[oscillator].to_numpy(dtype='f8')[offset:]
+    osc_positions = np.flatnonzero(~np.isnan(osc_values))
+    if not len(osc_positions):
+        return _no_divergence(df)
 
-    low_peaks, _ = find_peaks(-df['low'], prominence=prominence, distance=peak_distance)
-    osc_low_peaks, _ = find_peaks(-osc_data, prominence=prominence, distance=peak_distance)
-    
-    df['bullish_divergence'] = False
-    df['bearish_divergence'] = False # Placeholder for future use
-
-    # Create a series for easier mapping
-    price_lows = pd.Series(df['low'].iloc[low_peaks].values, index=df.index[low_peaks])
-    osc_lows = pd.Series(osc_data.iloc[osc_low_peaks].values, index=osc_data.index[osc_low_peaks])
-
-    if 'regular_bullish' in div_cfg.get('types', {}).get('buy', []):
-        for i in range(1, len(price_lows)):
-            current_price_low_val = price_lows.iloc[i]
-            prev_price_low_val = price_lows.iloc[i-1]
-            current_price_low_idx = price_lows.index[i]
-            prev_price_low_idx = price_lows.index[i-1]
-
-            # Condition: Lower low in price
-            if current_price_low_val < prev_price_low_val:
-                # Find corresponding oscillator lows in the same time window
-                osc_window = osc_lows[(osc_lows.index >= prev_price_low_idx) & (osc_lows.index <= current_price_low_idx)]
-                
-                if len(osc_window) >= 2:
-                    # Condition: Higher low in oscillator
-                    if osc_window.iloc[-1] > osc_window.iloc[0]:
-                        df.loc[current_price_low_idx, 'bullish_divergence'] = True
-    
+    flags = {'bullish_divergence': np.zeros(len(df), dtype=bool), 'bearish_divergence': np.zeros(len(df), dtype=bool)}
+    pivots = {}
+    for side, column in (('buy', 'bullish_divergence'), ('sell', 'bearish_divergence')):
+        for div_type in types_cfg.get(side, []):
+            if div_type not in DIVERGENCE_TYPES:
+                logging.warning(f"Unknown divergence type '{div_type}'. Skipping.")
+                continue
+            kind, price_sign, osc_sign = DIVERGENCE_TYPES[div_type]
+            if kind not in pivots:
+                price = df[kind].to_numpy(dtype='f8')[offset:]
+                # Oscillator pivots are found on its non-NaN values, then mapped back to bar positions.
+                osc_pivots = osc_positions[_pivots(osc_values[osc_positions], kind, prominence, peak_distance)]
+                pivots[kind] = (price, _pivots(price, kind, prominence, peak_distance), osc_pivots)
+            price, price_pivots, osc_pivots = pivots[kind]
+            if latest_only:
+                price_pivots = price_pivots[-2:]
+            hits = _diverging_pivots(price, price_pivots, osc_values, osc_pivots, price_sign, osc_sign)
+            flags[column][hits + offset] = True
+
+    for column, values in flags.items():
+        df[column] = values
     return df
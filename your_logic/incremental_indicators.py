@@ -0,0 +1,318 @@
+# your_logic/incremental_indicators.py
+import os
+import sys
+import math
+import pickle
+import logging
+from collections import deque
+import numpy as np
+import pandas as pd
+from your_logic.config_loader import resolve_indicator_params
+from your_logic.pattern_calculator import pattern_columns
+
+NAN = float('nan')
+INDICATOR_COLUMNS = ['vwma_slow', 'vwma_fast', 'avg_volume', 'stoch_k', 'stoch_d',
+                     'lower_bb', 'middle_bb', 'upper_bb', 'atr']
+
+# --- Streaming building blocks ---
+# Each mirrors the pandas / pandas_ta definition used by the batch path: rolling windows need
+# `length` valid values, `rma` is pandas' adjusted EWM with alpha=1/length and min_periods=length.
+
+class _Window:
+    """Fixed-length ring buffer with O(1) mean/sum/population std; a NaN anywhere in the window yields NaN."""
+    __slots__ = ('length', 'values', 'pos', 'count', 'nan_count', 'shift', 'total', 'total_sq')
+
+    def __init__(self, length):
+        self.length = length
+        self.values = [NAN] * length
+        self.pos = 0
+        self.count = 0
+        self.nan_count = 0
+        self.shift = 0.0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, x):
+        old = self.values[self.pos]
+        self.values[self.pos] = x
+        self.pos = (self.pos + 1) % self.length
+        if self.count < self.length:
+            if self.count == 0 and x == x:
+                self.shift = x
+            self.count += 1
+            self.nan_count += x != x
+        else:
+            self.nan_count += int(x != x) - int(old != old)
+
+        if self.pos == 0:
+            self._resum()
+        else:
+            # Sums are kept relative to `shift` to avoid cancellation in the variance.
+            if old == old:
+                d = old - self.shift
+                self.total -= d
+                self.total_sq -= d * d
+            if x == x:
+                d = x - self.shift
+                self.total += d
+                self.total_sq += d * d
+
+    def clone(self):
+        other = _Window.__new__(_Window)
+        other.length, other.pos, other.count, other.nan_count = self.length, self.pos, self.count, self.nan_count
+        other.shift, other.total, other.total_sq = self.shift, self.total, self.total_sq
+        other.values = self.values.copy()
+        return other
+
+    def _resum(self):
+        # Re-summing once per wrap keeps accumulated rounding bounded; amortized O(1).
+        valid = [v for v in self.values[:self.count] if v == v]
+        self.shift = valid[0] if valid else 0.0
+        self.total = math.fsum(v - self.shift for v in valid)
+        self.total_sq = math.fsum((v - self.shift) ** 2 for v in valid)
+
+    @property
+    def ready(self):
+        return self.count == self.length and not self.nan_count
+
+    def sum(self):
+        return self.total + self.shift * self.length if self.ready else NAN
+
+    def mean(self):
+        return self.total / self.length + self.shift if self.ready else NAN
+
+    def std(self):
+        if not self.ready:
+            return NAN
+        mean = self.total / self.length
+        return math.sqrt(max(self.total_sq / self.length - mean * mean, 0.0))
+
+class _MinMax:
+    """Rolling min and max over `length` values using monotonic deques (amortized O(1))."""
+    __slots__ = ('length', 'index', 'last_nan', 'mins', 'maxs')
+
+    def __init__(self, length):
+        self.length = length
+        self.index = -1
+        self.last_nan = -1
+        self.mins = deque()
+        self.maxs = deque()
+
+    def clone(self):
+        other = _MinMax.__new__(_MinMax)
+        other.length, other.index, other.last_nan = self.length, self.index, self.last_nan
+        other.mins, other.maxs = self.mins.copy(), self.maxs.copy()
+        return other
+
+    def push(self, x):
+        self.index += 1
+        if x != x:
+            self.last_nan = self.index
+            self.mins.clear()
+            self.maxs.clear()
+            return NAN, NAN
+        while self.mins and self.mins[-1][1] >= x:
+            self.mins.pop()
+        while self.maxs and self.maxs[-1][1] <= x:
+            self.maxs.pop()
+        self.mins.append((self.index, x))
+        self.maxs.append((self.index, x))
+        start = self.index - self.length + 1
+        while self.mins[0][0] < start:
+            self.mins.popleft()
+        while self.maxs[0][0] < start:
+            self.maxs.popleft()
+        if start < 0 or self.last_nan >= start:
+            return NAN, NAN
+        return self.mins[0][1], self.maxs[0][1]
+
+class _Rma:
+    """pandas `ewm(alpha=1/length, min_periods=length).mean()` evaluated one value at a time."""
+    __slots__ = ('length', 'decay', 'weighted', 'old_wt', 'nobs')
+
+    def __init__(self, length):
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def clone(self):
+        other = _Rma.__new__(_Rma)
+        other.length, other.decay, other.weighted, other.old_wt, other.nobs = self.length, self.decay, self.weighted, self.old_wt, self.nobs
+        return other
+
+    def push(self, x):
+        is_obs = x == x
+        self.nobs += is_obs
+        if self.weighted == self.weighted:
+            self.old_wt *= self.decay
+            if is_obs:
+                if self.weighted != x:
+                    self.weighted = (self.old_wt * self.weighted + x) / (self.old_wt + 1.0)
+                self.old_wt += 1.0
+        elif is_obs:
+            self.weighted = x
+        return self.weighted if self.nobs >= self.length else NAN
+
+class SeriesState:
+    """All rolling state for one (symbol, timeframe) series; `step` consumes one bar in O(1)."""
+    __slots__ = ('params', 'last_timestamp', 'prev_close', 'pv', 'vol', 'pv_fast', 'vol_fast', 'avg_vol',
+                 'gain', 'loss', 'rsi_range', 'stoch_k', 'stoch_d', 'bb', 'tr')
+
+    def __init__(self, params):
+        self.params = params
+        self.last_timestamp = None
+        self.prev_close = NAN
+        self.pv = _Window(params.slow_vwma)
+        self.vol = _Window(params.slow_vwma)
+        self.pv_fast = _Window(params.fast_vwma)
+        self.vol_fast = _Window(params.fast_vwma)
+        self.avg_vol = _Window(params.volume_lookback)
+        self.gain = _Rma(params.stoch_rsi)
+        self.loss = _Rma(params.stoch_rsi)
+        self.rsi_range = _MinMax(params.stoch_length)
+        self.stoch_k = _Window(params.stoch_k)
+        self.stoch_d = _Window(params.stoch_d)
+        self.bb = _Window(params.slow_vwma)
+        self.tr = _Rma(params.atr_period)
+
+    def clone(self):
+        """Independent copy (a checkpoint); much cheaper than copy.deepcopy on the nested slots objects."""
+        other = SeriesState.__new__(SeriesState)
+        for name in self.__slots__:
+            value = getattr(self, name)
+            setattr(other, name, value.clone() if hasattr(value, 'clone') else value)
+        return other
+
+    def step(self, high, low, close, volume):
+        params = self.params
+        pv = (high + low + close) / 3 * volume
+        self.pv.push(pv)
+        self.vol.push(volume)
+        self.pv_fast.push(pv)
+        self.vol_fast.push(volume)
+        self.avg_vol.push(volume)
+        vwma_slow = self.pv.sum() / self.vol.sum() if self.vol.ready and self.vol.sum() != 0 else NAN
+        vwma_fast = self.pv_fast.sum() / self.vol_fast.sum() if self.vol_fast.ready and self.vol_fast.sum() != 0 else NAN
+
+        # --- StochRSI: rma-smoothed RSI, stochastic over its range, SMA %K and %D ---
+        change = close - self.prev_close
+        avg_gain = self.gain.push(max(change, 0.0) if change == change else NAN)
+        avg_loss = self.loss.push(min(change, 0.0) if change == change else NAN)
+        denominator = avg_gain + abs(avg_loss)
+        rsi = 100 * avg_gain / denominator if denominator == denominator and denominator != 0 else NAN
+        lowest, highest = self.rsi_range.push(rsi)
+        stoch = NAN
+        if lowest == lowest:
+            stoch = 100 * (rsi - lowest) / ((highest - lowest) or sys.float_info.epsilon)
+        self.stoch_k.push(stoch)
+        k = self.stoch_k.mean()
+        self.stoch_d.push(k)
+        d = self.stoch_d.mean()
+
+        # --- Bollinger Bands on the slow VWMA (NaN VWMA values are skipped, as with dropna) ---
+        lower_bb = middle_bb = upper_bb = NAN
+        if vwma_slow == vwma_slow:
+            self.bb.push(vwma_slow)
+            if self.bb.ready:
+                middle_bb = self.bb.mean()
+                std = self.bb.std()
+                lower_bb = middle_bb - params.buy_bb_std * std
+                upper_bb = middle_bb + params.sell_bb_std * std
+
+        # --- ATR: rma of true range; the first bar has no previous close ---
+        true_range = NAN
+        if self.prev_close == self.prev_close:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        atr = self.tr.push(true_range)
+
+        self.prev_close = close
+        return (vwma_slow, vwma_fast, self.avg_vol.mean(), k, d, lower_bb, middle_bb, upper_bb, atr)
+
+class IncrementalIndicatorEngine:
+    """
+    Keeps a SeriesState per (symbol, timeframe) so each scan only processes bars that arrived since the
+    previous one. The newest bar is always re-applied from a checkpoint, because it may have been
+    stored while still forming. Values match the batch path for the same input series.
+    """
+    def __init__(self):
+        self.states = {}
+
+    @staticmethod
+    def supports(df, config, timeframe, params=None):
+        """The batch path shrinks windows to fit short histories and runs divergence over the full frame; both stay in batch."""
+        if config['defaults'].get('divergence', {}).get('enabled', False):
+            return False
+        params = params or resolve_indicator_params(config, timeframe)
+        longest = max(params.slow_vwma, params.fast_vwma, params.volume_lookback)
+        return len(df) >= longest and len(df) > params.stoch_rsi + params.stoch_length and len(df) > params.atr_period
+
+    def update(self, key, df, config, timeframe, params=None):
+        """
+        Advances the state for `key` with the bars in `df` it has not seen yet.
+        Returns a frame of the new bars with indicator columns appended (at least the newest bar).
+        """
+        params = params or resolve_indicator_params(config, timeframe)
+        entry = self.states.get(key)
+        start = 0
+        if entry is not None and entry[0].params == params:
+            checkpoint, state = entry
+            # Resume from the checkpoint taken before the last processed bar, if that bar is still present.
+            position = df.index.searchsorted(state.last_timestamp)
+            if position < len(df) and df.index[position] == state.last_timestamp:
+                state = checkpoint.clone() if checkpoint is not None else SeriesState(params)
+                start = position
+            else:
+                state, start = SeriesState(params), 0
+        else:
+            state = SeriesState(params)
+
+        # Plain Python floats: scalar arithmetic on them is much cheaper than on NumPy scalars.
+        highs = df['high'].to_numpy(dtype='f8')[start:].tolist()
+        lows = df['low'].to_numpy(dtype='f8')[start:].tolist()
+        closes = df['close'].to_numpy(dtype='f8')[start:].tolist()
+        volumes = df['volume'].to_numpy(dtype='f8')[start:].tolist()
+        count = len(df) - start
+        rows = np.empty((count, len(INDICATOR_COLUMNS)))
+        checkpoint = state
+        for i in range(count):
+            if i == count - 1:
+                checkpoint = state.clone()
+            rows[i] = state.step(highs[i], lows[i], closes[i], volumes[i])
+        state.last_timestamp = df.index[-1]
+        self.states[key] = (checkpoint, state)
+
+        # Patterns look back a few bars, so they are detected on the full frame, limited to the new bars.
+        pattern_mask, bullish_pattern, bearish_pattern = pattern_columns(df, config['defaults']['pattern_sets'], latest_n=count)
+        # Built in one go: inserting columns one at a time into a copy costs more than the indicators themselves.
+        columns = {col: df[col].to_numpy()[start:] for col in df.columns}
+        columns.update(zip(INDICATOR_COLUMNS, rows.T))
+        columns.update(pattern_mask=pattern_mask[start:], bullish_pattern=bullish_pattern[start:],
+                       bearish_pattern=bearish_pattern[start:],
+                       bullish_divergence=np.zeros(count, dtype=bool), bearish_divergence=np.zeros(count, dtype=bool))
+        return pd.DataFrame(columns, index=df.index[start:])
+
+    def save(self, filepath):
+        """Persists all series states so a restarted process resumes without replaying history."""
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        # Written to a per-process temporary file and renamed into place, so a reader or a concurrent
+        # writer never sees a partial file.
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self.states, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, filepath)
+
+    @classmethod
+    def load(cls, filepath):
+        """Restores an engine saved with `save`; starts empty if the file is missing or unreadable."""
+        engine = cls()
+        try:
+            with open(filepath, 'rb') as f:
+                engine.states = pickle.load(f)
+            logging.info(f"Restored incremental indicator state for {len(engine.states)} series from {filepath}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Could not restore incremental indicator state from {filepath}: {e}")
+        return engine
@@ -5,6 +5,7 @@ import numpy as np
 import logging
 from your_logic.pattern_calculator import calculate_patterns
 from your_logic.divergence_calculator import find_divergence
+from your_logic.config_loader import resolve_indicator_params
 
 def calculate_vwma(high, low, close, volume, length):
     """Calculates Volume Weighted Moving Average robustly."""
@@ -15,17 +16,20 @@ def calculate_vwma(high, low, close, volume, length):
     vwma = pv.rolling(window=length).sum() / volume.rolling(window=length).sum()
     return vwma
 
-def calculate_all_indicators(df, config, timeframe, profile):
-    """Calculates all indicators based on the provided configuration."""
+def calculate_all_indicators(df, config, timeframe, profile, params=None):
+    """
+    Calculates all indicators based on the provided configuration.
+    `params` is the timeframe's resolved IndicatorParams; it is resolved from `config` when omitted.
+    """
     logging.info(f"Calculating indicators for {timeframe}...")
     default_cfg = config['defaults']
     available_data = len(df)
     
     # --- Get Timeframe-Specific Indicator Periods ---
-    vwma_periods = default_cfg['indicators']['vwma_period_by_tf'].get(timeframe, {})
-    slow_vwma_period = vwma_periods.get('slow', default_cfg['indicators']['vwma_slow_period_default'])
-    fast_vwma_period = vwma_periods.get('fast', default_cfg['indicators']['vwma_fast_period_default'])
-    volume_lookback = default_cfg['indicators'].get('volume_lookback_period', 20)
+    params = params or resolve_indicator_params(config, timeframe)
+    slow_vwma_period = params.slow_vwma
+    fast_vwma_period = params.fast_vwma
+    volume_lookback = params.volume_lookback
 
     # --- Dynamically Adjust Periods Based on Available Data ---
     adjusted_slow_vwma = min(slow_vwma_period, available_data)
@@ -37,16 +41,12 @@ def calculate_all_indicators(df, config, timeframe, profile):
     df['vwma_fast'] = calculate_vwma(df['high'], df['low'], df['close'], df['volume'], adjusted_fast_vwma)
     df['avg_volume'] = df['volume'].rolling(window=adjusted_volume_lookback).mean()
     
-    stoch_params_base = default_cfg['stoch_rsi_params']
-    stoch_params_tf = stoch_params_base.get(timeframe, stoch_params_base['1d'])
-    stoch_params = stoch_params_base.get(stoch_params_tf.get('inherit'), stoch_params_tf)
-    
-    required_stoch_len = stoch_params.get('rsi', 14) + stoch_params.get('stoch', 14)
+    required_stoch_len = params.stoch_rsi + params.stoch_length
     if available_data > required_stoch_len:
-        df.ta.stochrsi(append=True, **stoch_params)
+        df.ta.stochrsi(append=True, **params.stoch_kwargs())
 
-    bbl_std = default_cfg['indicators'].get('buy_bb_stddev', 2.0)
-    bbu_std = default_cfg['indicators'].get('sell_bb_stddev', 2.0)
+    bbl_std = params.buy_bb_std
+    bbu_std = params.sell_bb_std
     
     if 'vwma_slow' in df.columns and not df['vwma_slow'].dropna().empty:
         bbands_buy = ta.bbands(close=df['vwma_slow'].dropna(), length=adjusted_slow_vwma, std=bbl_std)
@@ -57,7 +57,7 @@ def calculate_all_indicators(df, config, timeframe, profile):
         if bbands_sell is not None and not bbands_sell.empty:
             df['upper_bb'] = bbands_sell.iloc[:, 2]
 
-    atr_period = default_cfg['risk_management']['atr_period']
+    atr_period = params.atr_period
     if available_data > atr_period:
         df.ta.atr(length=min(atr_period, available_data - 1), append=True)
 
@@ -70,6 +70,12 @@ def calculate_all_indicators(df, config, timeframe, profile):
     df.rename(columns={k: v for k, v in rename_map.items() if k}, inplace=True)
     df.drop(columns=[c for c in df.columns if c.startswith(('BBM_', 'BBB_', 'BBP_'))], inplace=True, errors='ignore')
 
+    df = finalize_indicators(df, default_cfg)
+    logging.info(f"Indicators calculated for {timeframe}.")
+    return df
+
+def finalize_indicators(df, default_cfg):
+    """Adds patterns and divergence, fills any missing indicator columns and drops incomplete bars."""
     # --- Calculate Patterns & Divergence ---
     df = calculate_patterns(df, default_cfg['pattern_sets'])
     div_cfg = default_cfg.get('divergence', {})
@@ -82,6 +88,4 @@ def calculate_all_indicators(df, config, timeframe, profile):
             df[col] = np.nan
             
     df.dropna(subset=['close', 'open', 'high', 'low', 'volume'], inplace=True)
-    
-    logging.info(f"Indicators calculated for {timeframe}.")
     return df
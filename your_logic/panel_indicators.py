@@ -0,0 +1,187 @@
+# your_logic/panel_indicators.py
+import sys
+import logging
+import warnings
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+from your_logic.config_loader import resolve_indicator_params
+from your_logic.indicator_calculator import finalize_indicators
+
+# --- Panel kernels ---
+# Every kernel works on a (time x symbol) float64 array along axis 0. Series are right-aligned
+# (each column ends on its own latest bar) and NaN-padded at the top, so a column's result is the
+# same as running the per-symbol pandas / pandas_ta computation on that symbol alone.
+
+def _shift_down(x, periods=1):
+    out = np.full_like(x, np.nan)
+    out[periods:] = x[:-periods]
+    return out
+
+def rolling_sum(x, length):
+    """Rolling sum that is NaN unless all `length` values in the window are present (pandas semantics)."""
+    valid = ~np.isnan(x)
+    zero_filled = np.where(valid, x, 0.0)
+    cumsum = np.vstack([np.zeros((1, x.shape[1])), np.cumsum(zero_filled, axis=0)])
+    valid_count = np.vstack([np.zeros((1, x.shape[1])), np.cumsum(valid, axis=0)])
+    out = np.full_like(x, np.nan)
+    if length <= x.shape[0]:
+        window_sum = cumsum[length:] - cumsum[:-length]
+        complete = (valid_count[length:] - valid_count[:-length]) == length
+        out[length - 1:] = np.where(complete, window_sum, np.nan)
+    return out
+
+def rolling_mean(x, length):
+    return rolling_sum(x, length) / length
+
+def rolling_std(x, length):
+    """Population standard deviation over complete windows (pandas_ta bbands uses ddof=0)."""
+    # Variance from sums of squares cancels badly when the level is large relative to the spread,
+    # so windows are processed in row blocks, each centred on its own local mean.
+    out = np.full_like(x, np.nan)
+    block = max(length, 256)
+    for start in range(length - 1, x.shape[0], block):
+        end = min(start + block, x.shape[0])
+        segment = x[start - length + 1:end]
+        with np.errstate(invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            centered = segment - np.nan_to_num(np.nanmean(segment, axis=0))
+        mean = rolling_mean(centered, length)[length - 1:]
+        variance = rolling_mean(centered * centered, length)[length - 1:] - mean * mean
+        out[start:end] = np.sqrt(np.maximum(variance, 0.0))
+    return out
+
+def rolling_min_max(x, length):
+    """Rolling min and max over complete windows; a NaN in the window propagates."""
+    lowest = np.full_like(x, np.nan)
+    highest = np.full_like(x, np.nan)
+    if length <= x.shape[0]:
+        windows = sliding_window_view(x, length, axis=0)
+        lowest[length - 1:] = windows.min(axis=-1)
+        highest[length - 1:] = windows.max(axis=-1)
+    return lowest, highest
+
+def rma(x, length):
+    """pandas `ewm(alpha=1/length, min_periods=length).mean()` per column, as two linear recurrences."""
+    decay = 1.0 - 1.0 / length
+    valid = ~np.isnan(x)
+    numerator = lfilter([1.0], [1.0, -decay], np.where(valid, x, 0.0), axis=0)
+    denominator = lfilter([1.0], [1.0, -decay], valid.astype(float), axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = numerator / denominator
+    out[np.cumsum(valid, axis=0) < length] = np.nan
+    return out
+
+def vwma(high, low, close, volume, length):
+    pv = (high + low + close) / 3 * volume
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return rolling_sum(pv, length) / rolling_sum(volume, length)
+
+def stoch_rsi(close, rsi_length, stoch_length, k, d):
+    change = close - _shift_down(close)
+    avg_gain = rma(np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)), rsi_length)
+    avg_loss = rma(np.where(change < 0, change, np.where(np.isnan(change), np.nan, 0.0)), rsi_length)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi = 100 * avg_gain / (avg_gain + np.abs(avg_loss))
+    lowest, highest = rolling_min_max(rsi, stoch_length)
+    span = highest - lowest
+    stoch = 100 * (rsi - lowest) / np.where(span == 0, sys.float_info.epsilon, span)
+    stoch_k = rolling_mean(stoch, k)
+    return stoch_k, rolling_mean(stoch_k, d)
+
+def atr(high, low, close, length):
+    prev_close = _shift_down(close)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    true_range[np.isnan(prev_close)] = np.nan
+    return rma(true_range, length)
+
+# --- Panel assembly ---
+
+def build_panel(frames, symbols, columns=('high', 'low', 'close', 'volume')):
+    """Stacks the given symbols' columns into right-aligned (time x symbol) arrays."""
+    depth = max(len(frames[s]) for s in symbols)
+    panel = {col: np.full((depth, len(symbols)), np.nan) for col in columns}
+    for j, symbol in enumerate(symbols):
+        df = frames[symbol]
+        for col in columns:
+            panel[col][depth - len(df):, j] = df[col].to_numpy(dtype='f8')
+    return panel
+
+def _effective_params(params, available_data):
+    """The window lengths the batch path would use for a series of `available_data` bars."""
+    return (
+        min(params.slow_vwma, available_data),
+        min(params.fast_vwma, available_data),
+        min(params.volume_lookback, available_data),
+        (params.stoch_rsi, params.stoch_length, params.stoch_k, params.stoch_d)
+        if available_data > params.stoch_rsi + params.stoch_length else None,
+        min(params.atr_period, available_data - 1) if available_data > params.atr_period else None,
+    )
+
+def _compute_group(panel, effective, params):
+    slow, fast, volume_lookback, stoch, atr_length = effective
+    high, low, close, volume = panel['high'], panel['low'], panel['close'], panel['volume']
+    nan_panel = np.full_like(close, np.nan)
+    out = {
+        'vwma_slow': vwma(high, low, close, volume, slow),
+        'vwma_fast': vwma(high, low, close, volume, fast),
+        'avg_volume': rolling_mean(volume, volume_lookback),
+    }
+    out['stoch_k'], out['stoch_d'] = stoch_rsi(close, *stoch) if stoch else (nan_panel, nan_panel)
+    out['atr'] = atr(high, low, close, atr_length) if atr_length else nan_panel
+
+    middle = rolling_mean(out['vwma_slow'], slow)
+    std = rolling_std(out['vwma_slow'], slow)
+    out['middle_bb'] = middle
+    out['lower_bb'] = middle - params.buy_bb_std * std
+    out['upper_bb'] = middle + params.sell_bb_std * std
+    return out
+
+def _has_interior_gap(column):
+    valid = ~np.isnan(column)
+    if not valid.any():
+        return False
+    return not valid[valid.argmax():].all()
+
+def calculate_panel_indicators(frames, config, timeframe, params=None):
+    """
+    Computes the batch indicator set for many symbols of one timeframe in vectorized passes.
+    Symbols are grouped by the window lengths the batch path would pick for them (short histories
+    shrink windows), and each group is computed as one (time x symbol) panel.
+    Returns {symbol: DataFrame} matching `calculate_all_indicators` per symbol.
+    `params` is the timeframe's resolved IndicatorParams; it is resolved from `config` when omitted.
+    """
+    logging.info(f"Calculating panel indicators for {len(frames)} symbols on {timeframe}...")
+    params = params or resolve_indicator_params(config, timeframe)
+    default_cfg = config['defaults']
+
+    groups = {}
+    for symbol, df in frames.items():
+        if df is not None and not df.empty:
+            groups.setdefault(_effective_params(params, len(df)), []).append(symbol)
+
+    results = {}
+    for effective, symbols in groups.items():
+        panel = build_panel(frames, symbols)
+        indicators = _compute_group(panel, effective, params)
+        depth = panel['close'].shape[0]
+        for j, symbol in enumerate(symbols):
+            df = frames[symbol].copy()
+            rows = slice(depth - len(df), depth)
+            for col, values in indicators.items():
+                df[col] = values[rows, j]
+            if _has_interior_gap(df['vwma_slow'].to_numpy()):
+                # pandas_ta runs the bands on vwma_slow.dropna(); only a zero-volume gap needs that path.
+                _bbands_on_valid(df, effective[0], params)
+            results[symbol] = finalize_indicators(df, default_cfg)
+    return results
+
+def _bbands_on_valid(df, length, params):
+    valid = df['vwma_slow'].dropna()
+    values = valid.to_numpy()[:, None]
+    middle = rolling_mean(values, length)[:, 0]
+    std = rolling_std(values, length)[:, 0]
+    df['middle_bb'] = pd.Series(middle, index=valid.index)
+    df['lower_bb'] = pd.Series(middle - params.buy_bb_std * std, index=valid.index)
+    df['upper_bb'] = pd.Series(middle + params.sell_bb_std * std, index=valid.index)
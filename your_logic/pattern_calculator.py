@@ -1,62 +1,166 @@
-# your_logic/divergence_calculator.py
-import pandas as pd
+# your_logic/pattern_calculator.py
 import numpy as np
-from scipy.signal import find_peaks
 import logging
 
-def find_divergence(df, div_cfg):
+# --- Candle geometry thresholds ---
+DOJI_BODY_RATIO = 0.1       # Body at most this fraction of the bar's range
+SMALL_BODY_RATIO = 0.35     # Hammer-family bodies
+LONG_SHADOW_MULTIPLE = 2.0  # Long shadow at least this many bodies
+SHORT_SHADOW_RATIO = 0.1    # Opposite shadow at most this fraction of the range
+LONG_BODY_RATIO = 0.5       # "Long" candle: body at least half the range
+TREND_LOOKBACK = 5          # Bars used to judge the trend a reversal pattern appears in
+
+# Bars before a pattern's own bars that its definition looks at (star patterns span 3 bars, trend adds more).
+CONTEXT_BARS = 2 + TREND_LOOKBACK
+
+class _Bars:
+    """OHLC arrays plus the derived candle geometry every detector shares; shifted views are cached."""
+    def __init__(self, open_, high, low, close):
+        self.open, self.high, self.low, self.close = open_, high, low, close
+        self.range = high - low
+        self.body = np.abs(close - open_)
+        self.top = np.maximum(open_, close)
+        self.bottom = np.minimum(open_, close)
+        self.upper_shadow = high - self.top
+        self.lower_shadow = self.bottom - low
+        self.bullish = close > open_
+        self.bearish = close < open_
+        self._shifted = {}
+
+    def prev(self, name, periods=1):
+        """`name` as of `periods` bars earlier (NaN, so every comparison is False, before the first bar)."""
+        key = (name, periods)
+        if key not in self._shifted:
+            values = getattr(self, name)
+            shifted = np.full(len(values), np.nan if values.dtype.kind == 'f' else False, dtype=values.dtype)
+            shifted[periods:] = values[:-periods]
+            self._shifted[key] = shifted
+        return self._shifted[key]
+
+    def downtrend(self):
+        return self.prev('close') < self.prev('close', TREND_LOOKBACK + 1)
+
+    def uptrend(self):
+        return self.prev('close') > self.prev('close', TREND_LOOKBACK + 1)
+
+# --- Detectors: each returns a boolean array over all bars ---
+
+def _doji(b):
+    return (b.range > 0) & (b.body <= DOJI_BODY_RATIO * b.range)
+
+def _hammer_shape(b):
+    return ((b.range > 0) & (b.body <= SMALL_BODY_RATIO * b.range)
+            & (b.lower_shadow >= LONG_SHADOW_MULTIPLE * b.body) & (b.upper_shadow <= SHORT_SHADOW_RATIO * b.range))
+
+def _inverted_hammer_shape(b):
+    return ((b.range > 0) & (b.body <= SMALL_BODY_RATIO * b.range)
+            & (b.upper_shadow >= LONG_SHADOW_MULTIPLE * b.body) & (b.lower_shadow <= SHORT_SHADOW_RATIO * b.range))
+
+def _hammer(b):
+    return _hammer_shape(b) & b.downtrend()
+
+def _hanging_man(b):
+    return _hammer_shape(b) & b.uptrend()
+
+def _inverted_hammer(b):
+    return _inverted_hammer_shape(b) & b.downtrend()
+
+def _shooting_star(b):
+    return _inverted_hammer_shape(b) & b.uptrend()
+
+def _bullish_engulfing(b):
+    return (b.prev('bearish') & b.bullish & (b.open <= b.prev('close')) & (b.close >= b.prev('open'))
+            & (b.body > b.prev('body')))
+
+def _bearish_engulfing(b):
+    return (b.prev('bullish') & b.bearish & (b.open >= b.prev('close')) & (b.close <= b.prev('open'))
+            & (b.body > b.prev('body')))
+
+def _bullish_harami(b):
+    return (b.prev('bearish') & b.bullish & (b.prev('body') >= LONG_BODY_RATIO * b.prev('range'))
+            & (b.open >= b.prev('close')) & (b.close <= b.prev('open')) & (b.body < b.prev('body')))
+
+def _bearish_harami(b):
+    return (b.prev('bullish') & b.bearish & (b.prev('body') >= LONG_BODY_RATIO * b.prev('range'))
+            & (b.open <= b.prev('close')) & (b.close >= b.prev('open')) & (b.body < b.prev('body')))
+
+def _piercing_line(b):
+    midpoint = (b.prev('open') + b.prev('close')) / 2
+    return (b.prev('bearish') & b.bullish & (b.open <= b.prev('close'))
+            & (b.close > midpoint) & (b.close < b.prev('open')))
+
+def _dark_cloud_cover(b):
+    midpoint = (b.prev('open') + b.prev('close')) / 2
+    return (b.prev('bullish') & b.bearish & (b.open >= b.prev('close'))
+            & (b.close < midpoint) & (b.close > b.prev('open')))
+
+def _morning_star(b):
+    first_midpoint = (b.prev('open', 2) + b.prev('close', 2)) / 2
+    return (b.prev('bearish', 2) & (b.prev('body', 2) >= LONG_BODY_RATIO * b.prev('range', 2))
+            & (b.prev('body') <= SMALL_BODY_RATIO * b.prev('body', 2)) & (b.prev('top') <= b.prev('close', 2))
+            & b.bullish & (b.close > first_midpoint))
+
+def _evening_star(b):
+    first_midpoint = (b.prev('open', 2) + b.prev('close', 2)) / 2
+    return (b.prev('bullish', 2) & (b.prev('body', 2) >= LONG_BODY_RATIO * b.prev('range', 2))
+            & (b.prev('body') <= SMALL_BODY_RATIO * b.prev('body', 2)) & (b.prev('bottom') >= b.prev('close', 2))
+            & b.bearish & (b.close < first_midpoint))
+
+# Name -> detector. A pattern's bit in `pattern_mask` is its position here, so only append new patterns.
+PATTERNS = {
+    "Doji": _doji,
+    "Hammer": _hammer,
+    "Hanging Man": _hanging_man,
+    "Inverted Hammer": _inverted_hammer,
+    "Shooting Star": _shooting_star,
+    "Bullish Engulfing": _bullish_engulfing,
+    "Bearish Engulfing": _bearish_engulfing,
+    "Bullish Harami": _bullish_harami,
+    "Bearish Harami": _bearish_harami,
+    "Piercing Line": _piercing_line,
+    "Dark Cloud Cover": _dark_cloud_cover,
+    "Morning Star": _morning_star,
+    "Evening Star": _evening_star,
+}
+PATTERN_BITS = {name: 1 << i for i, name in enumerate(PATTERNS)}
+
+def pattern_bits(names):
+    """Combined bitmask of the given pattern names; unknown names are logged and ignored."""
+    mask = 0
+    for name in names:
+        if name in PATTERN_BITS:
+            mask |= PATTERN_BITS[name]
+        else:
+            logging.warning(f"Unknown candlestick pattern '{name}'. Skipping.")
+    return mask
+
+def pattern_names(mask):
+    """Names of the patterns set in a `pattern_mask` value."""
+    return [name for name, bit in PATTERN_BITS.items() if mask & bit]
+
+def pattern_columns(df, pattern_sets, latest_n=None):
     """
-    Finds bullish and bearish divergences between price and an oscillator.
+    Detects the patterns named in `pattern_sets` and returns (pattern_mask, bullish_pattern, bearish_pattern)
+    arrays aligned with `df`. With `latest_n`, only the last `latest_n` bars are checked (earlier bars get 0),
+    and only those bars plus the context they need are read.
     """
-    if not div_cfg or not div_cfg.get('enabled', False):
-        df['bullish_divergence'] = False
-        df['bearish_divergence'] = False
-        return df
-
-    oscillator = div_cfg.get('oscillator', 'stoch_k')
-    pivots_cfg = div_cfg.get('pivots', {'left': 3, 'right': 3})
-    prominence = div_cfg.get('prominence', 0.1)
-
-    if oscillator not in df.columns or not pd.api.types.is_numeric_dtype(df[oscillator]):
-        logging.warning(f"Oscillator '{oscillator}' not found or not numeric. Skipping divergence calculation.")
-        df['bullish_divergence'] = False
-        df['bearish_divergence'] = False
-        return df
-
-    osc_data = df[oscillator].dropna()
-    if osc_data.empty:
-        df['bullish_divergence'] = False
-        df['bearish_divergence'] = False
-        return df
-
-    # Using distance for separation between peaks
-    peak_distance = pivots_cfg.get('left', 5) + pivots_cfg.get('right', 5)
-
-    low_peaks, _ = find_peaks(-df['low'], prominence=prominence, distance=peak_distance)
-    osc_low_peaks, _ = find_peaks(-osc_data, prominence=prominence, distance=peak_distance)
-    
-    df['bullish_divergence'] = False
-    df['bearish_divergence'] = False # Placeholder for future use
-
-    # Create a series for easier mapping
-    price_lows = pd.Series(df['low'].iloc[low_peaks].values, index=df.index[low_peaks])
-    osc_lows = pd.Series(osc_data.iloc[osc_low_peaks].values, index=osc_data.index[osc_low_peaks])
-
-    if 'regular_bullish' in div_cfg.get('types', {}).get('buy', []):
-        for i in range(1, len(price_lows)):
-            current_price_low_val = price_lows.iloc[i]
-            prev_price_low_val = price_lows.iloc[i-1]
-            current_price_low_idx = price_lows.index[i]
-            prev_price_low_idx = price_lows.index[i-1]
-
-            # Condition: Lower low in price
-            if current_price_low_val < prev_price_low_val:
-                # Find corresponding oscillator lows in the same time window
-                osc_window = osc_lows[(osc_lows.index >= prev_price_low_idx) & (osc_lows.index <= current_price_low_idx)]
-                
-                if len(osc_window) >= 2:
-                    # Condition: Higher low in oscillator
-                    if osc_window.iloc[-1] > osc_window.iloc[0]:
-                        df.loc[current_price_low_idx, 'bullish_divergence'] = True
-    
+    bullish_bits = pattern_bits(pattern_sets.get('bullish', []))
+    bearish_bits = pattern_bits(pattern_sets.get('bearish', []))
+    latest_n = pattern_sets.get('latest_bars', 0) if latest_n is None else latest_n
+
+    mask = np.zeros(len(df), dtype=np.uint16)
+    first = max(0, len(df) - latest_n) if latest_n else 0
+    if len(df) > first and (bullish_bits | bearish_bits):
+        start = max(0, first - CONTEXT_BARS)
+        bars = _Bars(*(df[col].to_numpy(dtype='f8')[start:] for col in ('open', 'high', 'low', 'close')))
+        window = np.zeros(len(df) - start, dtype=np.uint16)
+        for name, bit in PATTERN_BITS.items():
+            if (bullish_bits | bearish_bits) & bit:
+                window[PATTERNS[name](bars)] |= bit
+        mask[first:] = window[first - start:]
+    return mask, (mask & bullish_bits) != 0, (mask & bearish_bits) != 0
+
+def calculate_patterns(df, pattern_sets, latest_n=None):
+    """Adds `pattern_mask` (bitmask of detected patterns) and `bullish_pattern` / `bearish_pattern` columns."""
+    df['pattern_mask'], df['bullish_pattern'], df['bearish_pattern'] = pattern_columns(df, pattern_sets, latest_n)
     return df
@@ -0,0 +1,228 @@
+# your_logic/request_scheduler.py
+import asyncio
+import copy
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from your_logic.scan_metrics import API_COALESCED, API_FAILURES, API_RETRIES, count, observe, timed
+
+DEFAULT_SETTINGS = {
+    "requests_per_minute": 190,  # Alpaca's free market data plan allows 200
+    "burst": 10,
+    "max_in_flight": 8,
+    "retries": 5,
+    "backoff_seconds": 1.0,
+    "max_backoff_seconds": 60.0,
+}
+
+# --- Rate-limit headers, recorded from every response of the APIs being watched ---
+_headers_lock = threading.Lock()
+_observed = {"version": 0, "limit": None, "remaining": None, "reset": None}
+
+def _header_number(headers, name):
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def record_rate_headers(response, *args, **kwargs):
+    """Keeps the newest X-RateLimit-* values of a response: a requests hook, also called by the async bars client."""
+    limit = _header_number(response.headers, 'X-RateLimit-Limit')
+    remaining = _header_number(response.headers, 'X-RateLimit-Remaining')
+    if limit is None and remaining is None:
+        return
+    with _headers_lock:
+        _observed.update(version=_observed["version"] + 1, limit=limit, remaining=remaining,
+                         reset=_header_number(response.headers, 'X-RateLimit-Reset'))
+
+def retry_after_seconds(response):
+    """Seconds a throttled response asks us to wait (Retry-After, else X-RateLimit-Reset), or None."""
+    headers = getattr(response, 'headers', None) or {}
+    retry_after = _header_number(headers, 'Retry-After')
+    if retry_after is not None:
+        return max(0.0, retry_after)
+    reset = _header_number(headers, 'X-RateLimit-Reset')
+    return max(0.0, reset - time.time()) if reset is not None else None
+
+def watch(api):
+    """
+    Makes the scheduler see the rate-limit headers of `api`'s responses, and turns off the client's own
+    blocking 429 retries (alpaca_trade_api sleeps in the request thread) so throttling is handled here.
+    APIs without a requests session, such as test doubles, are left alone.
+    """
+    session = getattr(api, '_session', None)
+    hooks = getattr(session, 'hooks', None)
+    if hooks is None or record_rate_headers in hooks.get('response', []):
+        return
+    hooks.setdefault('response', []).append(record_rate_headers)
+    if hasattr(api, '_retry'):
+        # alpaca_trade_api.REST retries a 429 `_retry` times itself, sleeping `_retry_wait` seconds in the
+        # request thread each time; with 0 the 429 reaches RequestScheduler, which pauses every request.
+        api._retry = 0
+
+class RequestScheduler:
+    """
+    Admits the process's market data requests under one token bucket (requests_per_minute, refilled
+    continuously up to `burst`) and at most `max_in_flight` at a time, lowest priority value first.
+    Rate-limit headers shrink the bucket to what the server reports is left, and a 429 pauses every
+    request until the server's reset time. Identical requests in flight are made once and shared.
+    Failures are retried with jittered exponential backoff only when `classify` calls them retryable.
+    """
+    def __init__(self, **settings):
+        self.loop = asyncio.get_running_loop()
+        self.configure(**settings)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.timer = None
+        self.pending = {}
+        self.headers_version = 0
+
+    def configure(self, **settings):
+        settings = {**DEFAULT_SETTINGS, **settings}
+        # 0 requests per minute means no rate limit (e.g. for a local test API).
+        self.rate = settings["requests_per_minute"] / 60 or float('inf')
+        self.burst = max(1, int(settings["burst"]))
+        self.max_in_flight = max(1, int(settings["max_in_flight"]))
+        self.retries = max(1, int(settings["retries"]))
+        self.backoff_seconds = settings["backoff_seconds"]
+        self.max_backoff_seconds = settings["max_backoff_seconds"]
+
+    # --- Admission ---
+
+    def _refill(self, now):
+        if self.rate == float('inf'):
+            self.tokens = float(self.burst)
+        else:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        with _headers_lock:
+            if _observed["version"] == self.headers_version:
+                return
+            self.headers_version = _observed["version"]
+            limit, remaining, reset = _observed["limit"], _observed["remaining"], _observed["reset"]
+        if limit:
+            self.rate = min(self.rate, limit / 60)
+        if remaining is not None:
+            # Requests already in flight will spend part of what the server has left.
+            self.tokens = min(self.tokens, max(0.0, remaining - self.in_flight))
+            if remaining < 1 and reset is not None:
+                self.pause(reset - time.time())
+
+    def pause(self, seconds):
+        """Holds every request for `seconds` (e.g. until the server's rate-limit window resets)."""
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + max(0.0, seconds))
+        self.tokens = 0.0
+        self.updated = max(self.updated, now)
+
+    def _dispatch(self):
+        self.timer = None
+        now = time.monotonic()
+        self._refill(now)
+        while self.waiters and self.in_flight < self.max_in_flight and now >= self.paused_until and self.tokens >= 1:
+            _, _, waiter = heapq.heappop(self.waiters)
+            if waiter.done():
+                continue
+            self.tokens -= 1
+            self.in_flight += 1
+            waiter.set_result(None)
+        if self.waiters and self.in_flight < self.max_in_flight:
+            delay = max(self.paused_until - now, (1 - self.tokens) / self.rate, 0.001)
+            self.timer = self.loop.call_later(delay, self._dispatch)
+
+    def _release(self):
+        self.in_flight -= 1
+        if self.timer is None:
+            self._dispatch()
+
+    async def _acquire(self, priority):
+        waiter = self.loop.create_future()
+        heapq.heappush(self.waiters, (priority, next(self.sequence), waiter))
+        if self.timer is None:
+            self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    # --- Requests ---
+
+    async def request(self, key, call, classify, priority=0, label="", timeframe="", blocking=True):
+        """
+        Runs `call()` once admitted, in a worker thread if `blocking`, else awaiting the coroutine it returns,
+        and returns its result, or None when it fails for good. `classify(error)` returns (retry reason or
+        None, seconds the server asked to wait or None). Callers with the same `key` while a request is in flight share its result; when shared, each
+        gets its own copy, so callers may modify what they receive.
+        """
+        entry = self.pending.get(key)
+        if entry is None:
+            entry = self.pending[key] = {"task": asyncio.ensure_future(self._run(call, classify, priority, label, timeframe, blocking)),
+                                         "callers": 1}
+            entry["task"].add_done_callback(lambda _: self.pending.pop(key, None))
+        else:
+            entry["callers"] += 1
+            count(API_COALESCED, 'api_coalesced')
+        result = await asyncio.shield(entry["task"])
+        return copy.deepcopy(result) if entry["callers"] > 1 else result
+
+    async def _run(self, call, classify, priority, label, timeframe, blocking):
+        for attempt in range(self.retries):
+            wait_started = time.perf_counter()
+            await self._acquire(priority)
+            observe('fetch_wait', time.perf_counter() - wait_started, timeframe)
+            try:
+                with timed('fetch', timeframe):
+                    return await asyncio.to_thread(call) if blocking else await call()
+            except Exception as e:
+                error = e
+                reason, wait = classify(e)
+                delay = wait if wait is not None or reason is None else self._backoff(attempt)
+                if reason == 'rate_limited':
+                    # Everyone waits: the budget is shared, so retrying only this request would just be throttled
+                    # again. Paused before this slot is released, so no queued request goes out into the same 429.
+                    self.pause(delay)
+            finally:
+                self._release()
+            if reason is None:
+                logging.error(f"Request for {label} failed and is not retried: {error}")
+                count(API_FAILURES, 'api_failures')
+                return None
+            if attempt + 1 == self.retries:
+                break
+            count(API_RETRIES, 'api_retries', reason=reason)
+            logging.warning(f"Request for {label} failed ({reason}: {error}); retrying in {delay:.1f}s ({attempt + 1}/{self.retries})")
+            await asyncio.sleep(delay)
+        logging.error(f"Failed to fetch data for {label} after {self.retries} attempts.")
+        count(API_FAILURES, 'api_failures')
+        return None
+
+    def _backoff(self, attempt):
+        """Full jitter: uniform up to the exponential delay, so retries of a burst of failures spread out."""
+        return random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt))
+
+_scheduler = None
+_settings = {}
+
+def configure_requests(**settings):
+    """Sets the request budget (see DEFAULT_SETTINGS) for this process, applied to the running scheduler too."""
+    _settings.clear()
+    _settings.update({key: value for key, value in settings.items() if value is not None})
+    if _scheduler is not None:
+        _scheduler.configure(**_settings)
+
+def get_request_scheduler():
+    """The process's scheduler for the running event loop (a new loop, e.g. each asyncio.run, gets a new one)."""
+    global _scheduler
+    loop = asyncio.get_running_loop()
+    if _scheduler is None or _scheduler.loop is not loop:
+        _scheduler = RequestScheduler(**_settings)
+    return _scheduler
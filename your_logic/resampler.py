@@ -0,0 +1,42 @@
+# your_logic/resampler.py
+import logging
+
+# --- Bucket rules per derived timeframe ---
+# Intraday buckets are anchored to UTC midnight like Alpaca's own aggregated bars; weekly
+# buckets follow the exchange week (Monday 00:00 New York time), which is how daily bars are stamped.
+RESAMPLE_RULES = {
+    "15m": ("15min", "UTC"),
+    "1h": ("1h", "UTC"),
+    "4h": ("4h", "UTC"),
+    "1w": ("W-MON", "America/New_York"),
+}
+
+def resample_ohlcv(df, timeframe):
+    """
+    Builds `timeframe` OHLCV bars from a finer-grained, UTC-indexed bar frame.
+    Buckets without any base bars are dropped, matching the API, which never returns empty bars.
+    """
+    rule = RESAMPLE_RULES.get(timeframe)
+    if rule is None:
+        logging.error(f"No resampling rule for timeframe: {timeframe}")
+        return None
+    freq, tz = rule
+
+    local = df.tz_convert(tz) if tz != "UTC" else df
+    agg = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    if 'trade_count' in df.columns:
+        agg['trade_count'] = 'sum'
+    if 'vwap' in df.columns:
+        # Volume-weighted average of the base bars' vwap, computed from summed notional.
+        local = local.assign(_notional=local['vwap'] * local['volume'])
+        agg['_notional'] = 'sum'
+
+    resampled = local.resample(freq, label='left', closed='left').agg(agg)
+    resampled = resampled[resampled['open'].notna()]
+    if 'vwap' in df.columns:
+        resampled['vwap'] = resampled.pop('_notional') / resampled['volume'].where(resampled['volume'] > 0)
+
+    if tz != "UTC":
+        resampled.index = resampled.index.tz_convert('UTC')
+    resampled.index.name = df.index.name
+    return resampled
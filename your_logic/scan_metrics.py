@@ -0,0 +1,218 @@
+# your_logic/scan_metrics.py
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Metric types (Prometheus text exposition format, no client library needed) ---
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _le(bound):
+    return 'le="' + bound + '"'
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines += self._render_value(key, value)
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_label_text(self.labels, key)} {value}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=None):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets or DEFAULT_BUCKETS)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[0][i] += 1
+            counts[1] += value
+            counts[2] += 1
+
+    def _render_value(self, key, value):
+        bucket_counts, total, count = value
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        lines = [f"{self.name}_bucket{_label_text(self.labels, key, [_le(bound)])} {n}"
+                 for bound, n in zip(bounds, bucket_counts + [count])]
+        lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {total}")
+        lines.append(f"{self.name}_count{_label_text(self.labels, key)} {count}")
+        return lines
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SCAN_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# --- The screener's metrics ---
+
+STAGE_SECONDS = Histogram("screener_stage_seconds", "Time spent per scan stage and timeframe.", ("stage", "timeframe"))
+FETCH_ROWS = Counter("screener_fetch_rows_total", "Bars received from the market data API.", ("timeframe",))
+FETCH_BYTES = Counter("screener_fetch_bytes_total", "In-memory size of the bars received from the market data API.", ("timeframe",))
+API_RETRIES = Counter("screener_api_retries_total", "Market data requests retried, by error kind.", ("reason",))
+API_FAILURES = Counter("screener_api_failures_total", "Market data requests that failed after every retry.")
+API_COALESCED = Counter("screener_api_coalesced_total", "Market data requests served by an identical request already in flight.")
+CACHE_LOOKUPS = Counter("screener_cache_lookups_total", "Cache lookups by cache and result.", ("cache", "result"))
+ANALYSIS_ERRORS = Counter("screener_analysis_errors_total", "Symbol/timeframe analyses that raised.", ("timeframe",))
+LOOP_LAG = Histogram("screener_event_loop_lag_seconds", "Delay of the event loop in waking a sleeping task.",
+                     buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+PREFILTER_SYMBOLS = Counter("screener_prefilter_symbols_total", "Symbols through the scan prefilter, by result.", ("result",))
+SCANS = Counter("screener_scans_total", "Completed scans by outcome.", ("outcome",))
+SCAN_SECONDS = Histogram("screener_scan_seconds", "Duration of complete scans.", buckets=SCAN_BUCKETS)
+SCAN_SIGNALS = Gauge("screener_last_scan_signals", "Signals found by the most recent scan.")
+WEBSOCKET_CLIENTS = Gauge("screener_websocket_clients", "Connected dashboard clients.")
+
+REGISTRY = (STAGE_SECONDS, FETCH_ROWS, FETCH_BYTES, API_RETRIES, API_FAILURES, API_COALESCED, CACHE_LOOKUPS, ANALYSIS_ERRORS,
+            LOOP_LAG, PREFILTER_SYMBOLS, SCANS, SCAN_SECONDS, SCAN_SIGNALS, WEBSOCKET_CLIENTS)
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+# --- Per-scan traces ---
+
+class ScanTrace:
+    """
+    Stage timings and counters of one scan, summarized into scan_status when it ends. The active trace
+    lives in a context variable, so it follows the scan into its tasks and asyncio.to_thread workers.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.pairs = {}
+        self.counters = {}
+
+    def record(self, stage, seconds, symbol=None, timeframe=""):
+        with self.lock:
+            count, total, longest = self.stages.get(stage, (0, 0.0, 0.0))
+            self.stages[stage] = (count + 1, total + seconds, max(longest, seconds))
+            if symbol is not None:
+                self.pairs[(symbol, timeframe)] = self.pairs.get((symbol, timeframe), 0.0) + seconds
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self, slowest=5):
+        with self.lock:
+            stages = {stage: {"count": count, "total_s": round(total, 3), "max_s": round(longest, 3)}
+                      for stage, (count, total, longest) in sorted(self.stages.items(), key=lambda s: -s[1][1])}
+            pairs = sorted(self.pairs.items(), key=lambda item: -item[1])[:slowest]
+            return {
+                "duration_s": round(time.perf_counter() - self.started, 3),
+                "stages": stages,
+                "slowest": [{"Symbol": symbol, "TF": tf, "seconds": round(seconds, 3)} for (symbol, tf), seconds in pairs],
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+_current_trace = contextvars.ContextVar("scan_trace", default=None)
+# Set in worker processes, whose own registry the /metrics endpoint never sees: metrics recorded there
+# are collected and replayed by the parent.
+_recording = contextvars.ContextVar("metric_recording", default=None)
+
+def start_trace():
+    """Starts a trace for the scan running in the current context and returns it."""
+    trace = ScanTrace()
+    _current_trace.set(trace)
+    return trace
+
+def observe(stage, seconds, timeframe="", symbol=None):
+    """Records one stage timing in the histograms and in the active scan trace, if any."""
+    records = _recording.get()
+    if records is not None:
+        records.append(("stage", stage, seconds, timeframe, symbol))
+        return
+    STAGE_SECONDS.observe(seconds, stage=stage, timeframe=timeframe)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(stage, seconds, symbol, timeframe)
+
+@contextmanager
+def timed(stage, timeframe="", symbol=None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start, timeframe, symbol)
+
+def count(counter, trace_name, amount=1, **labels):
+    """Increments `counter` and the active scan trace's `trace_name` counter."""
+    records = _recording.get()
+    if records is not None:
+        records.append(("count", counter.name, trace_name, amount, labels))
+        return
+    counter.inc(amount, **labels)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.count(trace_name, amount)
+
+@contextmanager
+def recording():
+    """Collects the metrics recorded in this context into the yielded list instead of the registry."""
+    records = []
+    token = _recording.set(records)
+    try:
+        yield records
+    finally:
+        _recording.reset(token)
+
+def replay(records):
+    """Records metrics collected by recording(), e.g. in a worker process, here."""
+    by_name = {metric.name: metric for metric in REGISTRY}
+    for kind, *fields in records:
+        if kind == "stage":
+            observe(*fields)
+        else:
+            name, trace_name, amount, labels = fields
+            count(by_name[name], trace_name, amount, **labels)
+
+async def monitor_event_loop(interval=0.5):
+    """Samples event-loop lag forever: how much later than requested a sleeping task wakes up."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(0.0, loop.time() - start - interval))
@@ -0,0 +1,195 @@
+# your_logic/scan_queue.py
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL, status TEXT, shards INTEGER, finished REAL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    scan_id INTEGER, shard INTEGER, symbols TEXT, status TEXT, worker TEXT, lease_until REAL,
+    attempts INTEGER DEFAULT 0, progress REAL DEFAULT 0, results TEXT, error TEXT,
+    PRIMARY KEY (scan_id, shard)
+);
+CREATE INDEX IF NOT EXISTS shards_by_status ON shards (status, scan_id, shard);
+CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, version INTEGER, value TEXT);
+CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT, expires REAL);
+"""
+
+class ScanQueue:
+    """
+    Scan work and shared scan state in one SQLite database, safe to use from any number of processes.
+    A submitted scan is split into shards of symbols; workers claim a shard under a lease they renew
+    while scanning it, so the shard of a worker that dies is claimed again once its lease runs out.
+    The `state` table holds versioned JSON values (scan status, results, schedule) that every web
+    worker polls, and `leases` elects the one process that owns the scheduler.
+    Other hosts can share the database only over a filesystem with working POSIX locks.
+    """
+    def __init__(self, path="data/scan_state.db"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A connection per operation: callers run in worker threads and in other processes.
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _transaction(self):
+        """A write transaction that takes the database lock up front, so read-then-update steps cannot interleave."""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    # --- Scans and shards ---
+
+    def submit(self, symbol_config, shard_size, keep_scans=20):
+        """Queues a scan of `symbol_config` split into shards of `shard_size` symbols; returns its id."""
+        symbols = list(symbol_config)
+        shards = [symbols[i:i + shard_size] for i in range(0, len(symbols), max(1, shard_size))]
+        with self._transaction() as db:
+            scan_id = db.execute("INSERT INTO scans (created, status, shards) VALUES (?, 'running', ?)",
+                                 (time.time(), len(shards))).lastrowid
+            db.executemany("INSERT INTO shards (scan_id, shard, symbols, status) VALUES (?, ?, ?, 'pending')",
+                           [(scan_id, i, json.dumps({s: symbol_config[s] for s in shard})) for i, shard in enumerate(shards)])
+            # Old scans are only kept for inspection; drop all but the newest few.
+            db.execute("DELETE FROM shards WHERE scan_id <= ?", (scan_id - keep_scans,))
+            db.execute("DELETE FROM scans WHERE id <= ?", (scan_id - keep_scans,))
+        logging.info(f"Queued scan {scan_id}: {len(symbols)} symbols in {len(shards)} shards.")
+        return scan_id
+
+    def claim(self, worker, lease_seconds, max_attempts=3):
+        """
+        Leases the oldest pending shard (or one whose lease expired) to `worker`.
+        Returns (scan_id, shard, symbol_config), or None when there is no work. A shard already
+        claimed `max_attempts` times is marked failed instead of being handed out again.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("""UPDATE shards SET status = 'failed', error = COALESCE(error, 'lease expired')
+                          WHERE attempts >= ? AND (status = 'pending' OR (status = 'leased' AND lease_until < ?))""",
+                       (max_attempts, now))
+            row = db.execute("""SELECT scan_id, shard, symbols FROM shards
+                                WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?)
+                                ORDER BY scan_id, shard LIMIT 1""", (now,)).fetchone()
+            if row is None:
+                return None
+            scan_id, shard, symbols = row
+            db.execute("""UPDATE shards SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1,
+                          progress = 0 WHERE scan_id = ? AND shard = ?""", (worker, now + lease_seconds, scan_id, shard))
+        return scan_id, shard, json.loads(symbols)
+
+    def heartbeat(self, scan_id, shard, worker, lease_seconds, progress):
+        """Renews `worker`'s lease and records its progress; False if the shard was meanwhile given to another worker."""
+        with self._connect() as db:
+            updated = db.execute("""UPDATE shards SET lease_until = ?, progress = ?
+                                    WHERE scan_id = ? AND shard = ? AND worker = ? AND status = 'leased'""",
+                                 (time.time() + lease_seconds, progress, scan_id, shard, worker)).rowcount
+        return updated == 1
+
+    def complete(self, scan_id, shard, worker, results):
+        """
+        Stores a shard's results if `worker` still holds its lease; returns False (and stores nothing) for a
+        worker whose shard was meanwhile given to another worker, marked failed or completed.
+        """
+        with self._connect() as db:
+            updated = db.execute("""UPDATE shards SET status = 'done', progress = 100, results = ?
+                                    WHERE scan_id = ? AND shard = ? AND worker = ? AND status = 'leased'""",
+                                 (json.dumps(results), scan_id, shard, worker)).rowcount
+        return updated == 1
+
+    def release(self, scan_id, shard, worker, error):
+        """Hands a shard that failed on `worker` back to the queue (claim() gives up after max_attempts)."""
+        with self._connect() as db:
+            db.execute("""UPDATE shards SET status = 'pending', worker = NULL, error = ?
+                          WHERE scan_id = ? AND shard = ? AND worker = ? AND status = 'leased'""",
+                       (str(error), scan_id, shard, worker))
+
+    def scan_progress(self, scan_id, seen=()):
+        """
+        {'shards', 'done', 'failed', 'leased', 'progress', 'results'} of a scan, where progress is the mean
+        shard progress (0-100) and results maps each finished shard not in `seen` to its result rows.
+        """
+        with self._connect() as db:
+            rows = db.execute("SELECT shard, status, progress FROM shards WHERE scan_id = ?", (scan_id,)).fetchall()
+            new_shards = [shard for shard, status, _ in rows if status == 'done' and shard not in seen]
+            results = {shard: json.loads(db.execute("SELECT results FROM shards WHERE scan_id = ? AND shard = ?",
+                                                    (scan_id, shard)).fetchone()[0]) for shard in new_shards}
+        statuses = [status for _, status, _ in rows]
+        return {
+            "shards": len(rows),
+            "done": statuses.count('done'),
+            "failed": statuses.count('failed'),
+            "leased": statuses.count('leased'),
+            "progress": sum(100 if status in ('done', 'failed') else progress or 0 for _, status, progress in rows) / max(1, len(rows)),
+            "results": results,
+        }
+
+    def finish_scan(self, scan_id, status):
+        with self._connect() as db:
+            db.execute("UPDATE scans SET status = ?, finished = ? WHERE id = ?", (status, time.time(), scan_id))
+
+    def running_scan(self):
+        """Id of the newest scan still running (e.g. left behind by a scheduler owner that stopped), or None."""
+        with self._connect() as db:
+            row = db.execute("SELECT id FROM scans WHERE status = 'running' ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    # --- Shared state ---
+
+    def publish(self, key, value):
+        """Stores `value` (JSON-serializable) under `key` and bumps its version."""
+        with self._connect() as db:
+            db.execute("""INSERT INTO state (key, version, value) VALUES (?, 1, ?)
+                          ON CONFLICT (key) DO UPDATE SET version = version + 1, value = excluded.value""",
+                       (key, json.dumps(value)))
+
+    def read(self, key, default=None):
+        with self._connect() as db:
+            row = db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def changes(self, versions):
+        """
+        Values whose version differs from `versions` ({key: version}, updated in place), as {key: value}.
+        Only changed values are read and decoded.
+        """
+        with self._connect() as db:
+            current = dict(db.execute("SELECT key, version FROM state").fetchall())
+            changed = [key for key, version in current.items() if versions.get(key) != version]
+            values = {key: json.loads(db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()[0])
+                      for key in changed}
+        versions.update({key: current[key] for key in changed})
+        return values
+
+    # --- Leader election ---
+
+    def acquire_lease(self, name, owner, seconds):
+        """Takes or renews the named lease for `owner`; True while `owner` holds it."""
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute("SELECT owner, expires FROM leases WHERE name = ?", (name,)).fetchone()
+            if row is not None and row[0] != owner and row[1] > now:
+                return False
+            db.execute("INSERT OR REPLACE INTO leases (name, owner, expires) VALUES (?, ?, ?)", (name, owner, now + seconds))
+        return True
+
+    def release_lease(self, name, owner):
+        with self._connect() as db:
+            db.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
@@ -1,11 +1,14 @@
 # your_logic/signal_generator.py
 import pandas as pd
+import numpy as np
 import logging
 
 def generate_signals(all_tf_data, config, timeframe, profile, market_regime_df=None):
     """
     Generates trading signals based on the strategy defined for the given
     symbol's profile and timeframe in the configuration file.
+    Labels every row of the history; the screener only needs the latest bar and uses
+    CompiledStrategy.evaluate_latest instead.
     """
     df = all_tf_data[timeframe].copy()
     
@@ -66,3 +69,57 @@ def generate_signals(all_tf_data, config, timeframe, profile, market_regime_df=N
 
     logging.info(f"Signal generation complete for {profile}/{timeframe}. Found signals: \n{df['signal'].value_counts().to_string()}")
     return df
+
+class CompiledStrategy:
+    """
+    A strategy from the config compiled once into a predicate over raw NumPy arrays.
+    Evaluates the same conditions as generate_signals, but only on the rows asked for and
+    without copying the frame or writing a signal column.
+    """
+    __slots__ = ('name', 'config', 'signal_name', 'checks', 'columns')
+
+    def __init__(self, name, strategy_cfg):
+        self.name = name
+        self.config = strategy_cfg
+        self.signal_name = f"Buy ({name})"
+        # Each check is (kind, *operands); column operands are read from the frame at evaluation time.
+        checks = []
+        if strategy_cfg.get('is_uptrend', False):
+            checks.append(('above', 'close', 'vwma_slow'))
+        if strategy_cfg.get('fast_vwma_above_slow', False):
+            checks.append(('above', 'vwma_fast', 'vwma_slow'))
+        prox_cfg = strategy_cfg.get('proximity_check', {})
+        if prox_cfg.get('enabled', False):
+            checks.append(('near', 'close', prox_cfg.get('ma_column', 'vwma_slow'), prox_cfg.get('proximity_pct', 1.0)))
+        stoch_cfg = strategy_cfg.get('stoch_check', {})
+        if stoch_cfg.get('enabled', False):
+            checks.append(('between', 'stoch_k', stoch_cfg.get('k_min', 0), stoch_cfg.get('k_max', 100)))
+        self.checks = tuple(checks)
+        self.columns = tuple(sorted({op for check in checks for op in check[1:] if isinstance(op, str)}))
+
+    def evaluate(self, df, window=None):
+        """Boolean array for the last `window` rows of `df` (all rows if None); NaN inputs never pass."""
+        if not self.checks:
+            return np.zeros(len(df) if window is None else min(window, len(df)), dtype=bool)
+        start = 0 if window is None else max(len(df) - window, 0)
+        return self.evaluate_arrays({col: df[col].to_numpy(dtype='f8', copy=False)[start:] for col in self.columns})
+
+    def evaluate_arrays(self, values):
+        """Boolean array over equal-length float arrays given as {column: array} (e.g. a backtest's history)."""
+        if not self.checks:
+            return np.zeros(len(next(iter(values.values()), ())), dtype=bool)
+        passed = np.ones(len(values[self.columns[0]]), dtype=bool)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for kind, *operands in self.checks:
+                if kind == 'above':
+                    passed &= values[operands[0]] > values[operands[1]]
+                elif kind == 'near':
+                    price, ma = values[operands[0]], values[operands[1]]
+                    passed &= np.abs(price - ma) / ma * 100 <= operands[2]
+                elif kind == 'between':
+                    passed &= (values[operands[0]] >= operands[1]) & (values[operands[0]] <= operands[2])
+        return passed
+
+    def evaluate_latest(self, df):
+        """True if the latest bar of `df` generates this strategy's buy signal."""
+        return bool(len(df)) and bool(self.evaluate(df, window=1)[-1])
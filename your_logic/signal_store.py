@@ -0,0 +1,140 @@
+# your_logic/signal_store.py
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, time REAL, signals INTEGER, status TEXT
+);
+CREATE TABLE IF NOT EXISTS signals (
+    scan_id INTEGER, time REAL, source TEXT, symbol TEXT, timeframe TEXT, signal TEXT, profile TEXT,
+    price REAL, vwma REAL, stoch_k REAL, stoch_d REAL, sl REAL, tp REAL, row TEXT
+);
+CREATE INDEX IF NOT EXISTS signals_by_pair ON signals (symbol, timeframe, time);
+CREATE INDEX IF NOT EXISTS signals_by_time ON signals (time);
+CREATE INDEX IF NOT EXISTS signals_by_scan ON signals (scan_id);
+"""
+# Result row field -> signals column, for the indicator values queries filter or aggregate on.
+ROW_COLUMNS = {"Signal": "signal", "Profile": "profile", "Price": "price", "VWMA": "vwma",
+               "Stoch_k": "stoch_k", "Stoch_d": "stoch_d", "SL": "sl", "TP": "tp"}
+
+class SignalStore:
+    """
+    History of every scan's signals in one SQLite database: each scan's result rows (with the indicator
+    values they were computed from) and its final status, plus the signals live screening emits between
+    scans. The newest scan's rows and status restore the dashboard at startup; history() and first_fired()
+    answer when a symbol/timeframe signalled, without recomputing anything.
+    """
+    def __init__(self, path="data/signal_history.db"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A connection per operation: callers run in worker threads.
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _signal_rows(scan_id, recorded, source, rows):
+        return [(scan_id, recorded, source, row['Symbol'], row['TF'],
+                 *(row.get(field) for field in ROW_COLUMNS), json.dumps(row)) for row in rows]
+
+    # --- Writes (one transaction per call) ---
+
+    def record_scan(self, rows, status, recorded=None):
+        """Stores a completed scan's result rows and status in one transaction; returns the scan id."""
+        recorded = recorded or time.time()
+        with self._connect() as db:
+            db.execute("BEGIN")
+            scan_id = db.execute("INSERT INTO scans (time, signals, status) VALUES (?, ?, ?)",
+                                 (recorded, len(rows), json.dumps(status))).lastrowid
+            db.executemany(f"INSERT INTO signals VALUES ({', '.join('?' * (6 + len(ROW_COLUMNS)))})",
+                           self._signal_rows(scan_id, recorded, 'scan', rows))
+            db.execute("COMMIT")
+        return scan_id
+
+    def record_live(self, events):
+        """Stores live signals, a list of (time, row), in one transaction."""
+        if not events:
+            return
+        with self._connect() as db:
+            db.execute("BEGIN")
+            db.executemany(f"INSERT INTO signals VALUES ({', '.join('?' * (6 + len(ROW_COLUMNS)))})",
+                           [values for recorded, row in events for values in self._signal_rows(None, recorded, 'live', [row])])
+            db.execute("COMMIT")
+
+    def prune(self, keep_days):
+        """Deletes scans and signals older than `keep_days`."""
+        cutoff = time.time() - keep_days * 86400
+        with self._connect() as db:
+            db.execute("BEGIN")
+            db.execute("DELETE FROM signals WHERE time < ?", (cutoff,))
+            db.execute("DELETE FROM scans WHERE time < ?", (cutoff,))
+            db.execute("COMMIT")
+
+    # --- Queries ---
+
+    def latest_scan(self):
+        """(time, status, rows) of the newest recorded scan, or None when there is none."""
+        with self._connect() as db:
+            scan = db.execute("SELECT id, time, status FROM scans ORDER BY id DESC LIMIT 1").fetchone()
+            if scan is None:
+                return None
+            rows = db.execute("SELECT row FROM signals WHERE scan_id = ? ORDER BY rowid", (scan['id'],)).fetchall()
+        return scan['time'], json.loads(scan['status']), [json.loads(row['row']) for row in rows]
+
+    def history(self, symbol=None, timeframe=None, signal=None, since=None, until=None, source=None, limit=500):
+        """Recorded signals matching the given filters, newest first, each as its result row plus time and source."""
+        conditions, params = [], []
+        for column, value in (("symbol", symbol), ("timeframe", timeframe), ("source", source)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if signal is not None:
+            # Like the result filters: "Buy" matches "Buy (momentum_trend)" too.
+            conditions.append("(signal = ? OR signal LIKE ?)")
+            params += [signal, f"{signal} (%"]
+        if since is not None:
+            conditions.append("time >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("time < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connect() as db:
+            rows = db.execute(f"SELECT time, source, row FROM signals {where} ORDER BY time DESC, rowid DESC LIMIT ?",
+                              params + [limit]).fetchall()
+        return [{**json.loads(row['row']), "time": row['time'], "source": row['source']} for row in rows]
+
+    def first_fired(self, symbol, timeframe):
+        """
+        When `symbol` on `timeframe` signalled: {'first', 'last', 'scans', 'streak_start', 'streak_scans'}, where
+        the streak is the run of consecutive recorded scans, up to the newest, in which it signalled (empty when
+        the newest scan has no signal for it). None if it never signalled.
+        """
+        with self._connect() as db:
+            summary = db.execute("""SELECT MIN(time) AS first, MAX(time) AS last, COUNT(DISTINCT scan_id) AS scans
+                                    FROM signals WHERE symbol = ? AND timeframe = ?""", (symbol, timeframe)).fetchone()
+            if summary['first'] is None:
+                return None
+            fired = {row['scan_id'] for row in db.execute(
+                "SELECT DISTINCT scan_id FROM signals WHERE symbol = ? AND timeframe = ? AND scan_id IS NOT NULL",
+                (symbol, timeframe))}
+            streak_start, streak_scans = None, 0
+            for scan in db.execute("SELECT id, time FROM scans ORDER BY id DESC"):
+                if scan['id'] not in fired:
+                    break
+                streak_start, streak_scans = scan['time'], streak_scans + 1
+        return {"first": summary['first'], "last": summary['last'], "scans": summary['scans'],
+                "streak_start": streak_start, "streak_scans": streak_scans}
@@ -0,0 +1,113 @@
+# your_logic/universe.py
+import csv
+import logging
+import numpy as np
+import pandas as pd
+
+# Rule / filter condition suffix -> column of daily_stats() it is compared with.
+STAT_FIELDS = {"price": "close", "atr_pct": "atr_pct", "dollar_volume": "dollar_volume"}
+RULE_KEYS = {f"{bound}_{field}" for bound in ("min", "max") for field in STAT_FIELDS}
+
+def load_universe(universe_cfg, api=None):
+    """
+    Returns {symbol: profile or None} from the configured source: 'static' (the `symbols` mapping),
+    'file' (CSV of symbol[,profile] rows, '#' comments allowed) or 'assets' (the broker's active,
+    tradable US equities on the configured exchanges). Symbols without a profile get one from the
+    profile rules once their daily bars are known.
+    """
+    source = universe_cfg.get('source', 'static')
+    if source == 'file':
+        path = universe_cfg.get('file', 'data/universe.csv')
+        universe = {}
+        with open(path, newline='') as file:
+            for row in csv.reader(file):
+                if not row or not row[0].strip() or row[0].lstrip().startswith('#') or row[0].strip().lower() == 'symbol':
+                    continue
+                profile = row[1].strip() if len(row) > 1 and row[1].strip() else None
+                universe[row[0].strip().upper()] = profile
+        logging.info(f"Loaded {len(universe)} symbols from {path}.")
+        return universe
+    if source == 'assets':
+        if api is None:
+            logging.error("Universe source 'assets' needs the API; falling back to the static symbols.")
+            return dict(universe_cfg.get('symbols') or {})
+        exchanges = set(universe_cfg.get('exchanges') or [])
+        assets = api.list_assets(status='active', asset_class='us_equity')
+        universe = {asset.symbol: None for asset in assets
+                    if asset.tradable and (not exchanges or asset.exchange in exchanges) and '/' not in asset.symbol}
+        logging.info(f"Loaded {len(universe)} tradable symbols from the asset list.")
+        return universe
+    return dict(universe_cfg.get('symbols') or {})
+
+def daily_stats(frames, trend_period, liquidity_days=20, atr_period=14):
+    """
+    One row per symbol from its daily bars: last close, average dollar volume and ATR (as % of the close)
+    over the recent bars, and whether the close is above the daily slow VWMA. Like the batch indicator path,
+    the VWMA window shrinks to the bars available.
+    """
+    rows = {}
+    for symbol, df in frames.items():
+        if df is None or df.empty:
+            continue
+        high, low, close, volume = (df[col].to_numpy(dtype='f8') for col in ('high', 'low', 'close', 'volume'))
+        recent = slice(-liquidity_days, None)
+        true_range = np.maximum(high[1:], close[:-1]) - np.minimum(low[1:], close[:-1])
+        window = min(trend_period, len(close))
+        weights = volume[-window:]
+        vwma = ((high[-window:] + low[-window:] + close[-window:]) / 3 * weights).sum() / weights.sum() if weights.sum() else np.nan
+        rows[symbol] = {
+            "close": close[-1],
+            "dollar_volume": (close[recent] * volume[recent]).mean(),
+            "atr_pct": true_range[-atr_period:].mean() / close[-1] * 100 if len(true_range) else np.nan,
+            "uptrend": bool(close[-1] > vwma),
+        }
+    return pd.DataFrame.from_dict(rows, orient='index', columns=["close", "dollar_volume", "atr_pct", "uptrend"])
+
+def _matches(stats, conditions):
+    """Boolean Series: rows of `stats` meeting every min_/max_ condition (NaN stats never match a bound)."""
+    passed = pd.Series(True, index=stats.index)
+    for key, value in conditions.items():
+        if key in RULE_KEYS:
+            bound, field = key.split('_', 1)
+            column = stats[STAT_FIELDS[field]]
+            passed &= column >= value if bound == 'min' else column <= value
+    return passed
+
+def assign_profiles(symbol_config, stats, rules):
+    """Gives symbols without a profile the first rule's profile they match; unmatched ones are dropped."""
+    assigned = dict(symbol_config)
+    missing = [symbol for symbol, profile in symbol_config.items() if profile is None]
+    if not missing:
+        return assigned
+    pending = stats.index.intersection(missing)
+    for rule in rules:
+        matched = pending[_matches(stats.loc[pending], rule).to_numpy()]
+        for symbol in matched:
+            assigned[symbol] = rule['profile']
+        pending = pending.difference(matched)
+    dropped = [symbol for symbol in missing if assigned[symbol] is None]
+    for symbol in dropped:
+        del assigned[symbol]
+    if dropped:
+        logging.info(f"No profile rule matched {len(dropped)} symbols; they are not scanned.")
+    return assigned
+
+def prefilter_symbols(stats, prefilter_cfg):
+    """
+    Applies the prefilter's price band, liquidity floor and daily trend requirement to `stats`.
+    Returns (symbols that pass, {reason: symbols rejected for it}); each rejected symbol counts once,
+    under the first check it fails.
+    """
+    checks = [
+        ("price", _matches(stats, {k: v for k, v in prefilter_cfg.items() if k in ("min_price", "max_price")})),
+        ("liquidity", _matches(stats, {k: v for k, v in prefilter_cfg.items() if k == "min_dollar_volume"})),
+    ]
+    if prefilter_cfg.get('daily_uptrend', False):
+        checks.append(("trend", stats['uptrend'].astype(bool)))
+    remaining = pd.Series(True, index=stats.index)
+    rejected = {}
+    for reason, passed in checks:
+        failed = remaining & ~passed
+        rejected[reason] = int(failed.sum())
+        remaining &= passed
+    return list(stats.index[remaining.to_numpy()]), rejected